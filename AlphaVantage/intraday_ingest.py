@@ -0,0 +1,179 @@
+"""
+Download AlphaVantage intraday bars into the local intraday store.
+
+    python AlphaVantage/intraday_ingest.py --symbols IBM,AAPL --interval 5min
+    python AlphaVantage/intraday_ingest.py --symbols IBM --months 2024-01:2024-06
+
+The API key comes from --apikey or the ALPHAVANTAGE_API_KEY environment
+variable. Symbols already stored only fetch the latest bars unless a gap
+since the last stored bar needs backfilling month by month.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from intraday_store import IntradayStore, OHLCV_COLUMNS
+
+API_URL = 'https://www.alphavantage.co/query'
+INTERVALS = ['1min', '5min', '15min', '30min', '60min']
+
+# Free keys allow 5 requests per minute; raise this for premium plans
+REQUESTS_PER_MINUTE = 5
+
+# AlphaVantage field name -> column
+FIELD_COLUMNS = {'1. open': 'Open', '2. high': 'High', '3. low': 'Low', '4. close': 'Close', '5. volume': 'Volume'}
+
+
+class RequestPacer:
+    """Sliding one-minute window shared by all fetch threads"""
+
+    def __init__(self, per_minute=REQUESTS_PER_MINUTE):
+        self.per_minute = per_minute
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= 60:
+                    self._calls.popleft()
+                if len(self._calls) < self.per_minute:
+                    self._calls.append(now)
+                    return
+                delay = 60 - (now - self._calls[0])
+            time.sleep(delay)
+
+
+def parse_time_series(payload, interval):
+    """Turn a TIME_SERIES_INTRADAY response into an OHLCV frame, oldest first
+
+    Raises ValueError for API errors, including rate-limit notices.
+    """
+    for key in ('Error Message', 'Note', 'Information'):
+        if key in payload:
+            raise ValueError(payload[key])
+
+    series = payload.get(f"Time Series ({interval})")
+    if series is None:
+        raise ValueError(f"Response has no {interval} time series")
+    if not series:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Datetime'))
+
+    index = pd.to_datetime(list(series), format='%Y-%m-%d %H:%M:%S')
+    rows = list(series.values())
+    data = pd.DataFrame(
+        {column: np.array([row[field] for row in rows], dtype=np.float64)
+         for field, column in FIELD_COLUMNS.items()},
+        index=index.rename('Datetime'))
+    data['Volume'] = data['Volume'].astype(np.int64)
+
+    # Responses are newest first
+    return data.sort_index()
+
+
+def fetch_intraday(symbol, interval, apikey, month=None, outputsize='compact', session=None, pacer=None):
+    """One TIME_SERIES_INTRADAY request; month (YYYY-MM) selects a past month"""
+    params = {
+        'function': 'TIME_SERIES_INTRADAY',
+        'symbol': symbol,
+        'interval': interval,
+        'outputsize': outputsize,
+        'apikey': apikey,
+    }
+    if month:
+        params['month'] = month
+
+    if pacer is not None:
+        pacer.wait()
+    response = (session or requests).get(API_URL, params=params, timeout=30)
+    response.raise_for_status()
+    return parse_time_series(response.json(), interval)
+
+
+def month_range(first, last):
+    """Months from first to last inclusive, as YYYY-MM strings"""
+    return [period.strftime('%Y-%m') for period in pd.period_range(first, last, freq='M')]
+
+
+def ingest_symbol(symbol, interval, apikey, store, months=None, session=None, pacer=None):
+    """Fetch new bars for one symbol into the store; returns the number of bars added"""
+    fetch = lambda **kwargs: fetch_intraday(symbol, interval, apikey, session=session, pacer=pacer, **kwargs)
+    added = 0
+
+    for month in months or []:
+        added += store.write(symbol, interval, fetch(month=month, outputsize='full'))
+
+    last = store.last_timestamp(symbol, interval)
+    latest = fetch(outputsize='compact' if last is not None else 'full')
+
+    # The compact window (100 bars) may not reach back to the stored data
+    if last is not None and not latest.empty and latest.index[0] > last:
+        latest = fetch(outputsize='full')
+        if not latest.empty and latest.index[0] > last:
+            gap_months = month_range(last.strftime('%Y-%m'), latest.index[0].strftime('%Y-%m'))
+            for month in [m for m in gap_months if m not in (months or [])]:
+                added += store.write(symbol, interval, fetch(month=month, outputsize='full'))
+
+    added += store.write(symbol, interval, latest)
+    return added
+
+
+def ingest(symbols, interval, apikey, store, months=None, per_minute=REQUESTS_PER_MINUTE, max_workers=4):
+    """Ingest many symbols concurrently under one request pace; returns {symbol: bars added or error}"""
+    if interval not in INTERVALS:
+        raise ValueError(f"Interval must be one of {', '.join(INTERVALS)}")
+
+    pacer = RequestPacer(per_minute)
+    results = {}
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(ingest_symbol, symbol, interval, apikey, store, months, session, pacer): symbol
+                   for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+                print(f"{symbol}: {results[symbol]} new {interval} bars")
+            except Exception as e:
+                results[symbol] = e
+                print(f"{symbol}: failed ({e})")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download AlphaVantage intraday bars into the local store')
+    parser.add_argument('--symbols', required=True, help='Comma-separated symbols, e.g. IBM,AAPL')
+    parser.add_argument('--interval', default='5min', choices=INTERVALS)
+    parser.add_argument('--months', help='Backfill months: YYYY-MM or YYYY-MM:YYYY-MM')
+    parser.add_argument('--apikey', default=os.environ.get('ALPHAVANTAGE_API_KEY'))
+    parser.add_argument('--per-minute', type=int, default=REQUESTS_PER_MINUTE,
+                        help='Requests per minute allowed by the API key')
+    parser.add_argument('--root', default='./data_store/intraday/', help='Intraday store directory')
+    args = parser.parse_args()
+
+    if not args.apikey:
+        parser.error("pass --apikey or set ALPHAVANTAGE_API_KEY")
+
+    months = None
+    if args.months:
+        first, _, last = args.months.partition(':')
+        months = month_range(first, last or first)
+
+    symbols = [symbol.strip().upper() for symbol in args.symbols.split(',') if symbol.strip()]
+    results = ingest(symbols, args.interval, args.apikey, IntradayStore(args.root), months, args.per_minute)
+    if any(isinstance(result, Exception) for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
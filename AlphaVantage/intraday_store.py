@@ -0,0 +1,132 @@
+"""
+Local store of AlphaVantage intraday bars, and the replay loader for backtests.
+
+Bars live in Parquet files partitioned as
+    <root>/interval=5min/symbol=IBM/month=2024-05.parquet
+with a DatetimeIndex in US/Eastern exchange time (as AlphaVantage reports it)
+and float Open/High/Low/Close plus integer Volume columns.
+"""
+import glob
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Regular US session; AlphaVantage also returns pre- and post-market bars
+REGULAR_OPEN = '09:30'
+REGULAR_CLOSE = '16:00'
+
+
+class IntradayStore:
+    """Monthly Parquet partitions per interval and symbol"""
+
+    def __init__(self, root='./data_store/intraday/'):
+        if pq is None:
+            raise ImportError("pyarrow is required for the intraday bar store")
+        self.root = root
+
+    def _symbol_dir(self, symbol, interval):
+        return os.path.join(self.root, f"interval={interval}", f"symbol={symbol.upper()}")
+
+    def _month_path(self, symbol, interval, month):
+        return os.path.join(self._symbol_dir(symbol, interval), f"month={month}.parquet")
+
+    def months(self, symbol, interval):
+        """Stored months (YYYY-MM), oldest first"""
+        paths = glob.glob(os.path.join(self._symbol_dir(symbol, interval), 'month=*.parquet'))
+        return sorted(os.path.basename(path)[len('month='):-len('.parquet')] for path in paths)
+
+    def symbols(self, interval):
+        directory = os.path.join(self.root, f"interval={interval}")
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[len('symbol='):] for name in os.listdir(directory) if name.startswith('symbol='))
+
+    def _read_month(self, path):
+        return pq.read_table(path).to_pandas().set_index('Datetime')
+
+    def write(self, symbol, interval, bars):
+        """Merge parsed bars into their monthly partitions; returns the number of new bars"""
+        if bars.empty:
+            return 0
+
+        added = 0
+        os.makedirs(self._symbol_dir(symbol, interval), exist_ok=True)
+        for month, month_bars in bars.groupby(bars.index.strftime('%Y-%m')):
+            path = self._month_path(symbol, interval, month)
+            if os.path.exists(path):
+                existing = self._read_month(path)
+                # Newly fetched bars replace stored ones (the latest bar may have been partial)
+                merged = pd.concat([existing[~existing.index.isin(month_bars.index)], month_bars]).sort_index()
+                added += len(merged) - len(existing)
+            else:
+                merged = month_bars.sort_index()
+                added += len(merged)
+
+            table = pa.Table.from_pandas(merged[OHLCV_COLUMNS].rename_axis('Datetime').reset_index(),
+                                         preserve_index=False)
+            # Write beside the partition and swap it in so readers never see half a file
+            tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+            pq.write_table(table, tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+
+        return added
+
+    def read(self, symbol, interval, start=None, end=None):
+        """Stored bars for a symbol, oldest first; start/end are dates or timestamps"""
+        months = self.months(symbol, interval)
+        if start is not None:
+            months = [m for m in months if m >= pd.Timestamp(start).strftime('%Y-%m')]
+        if end is not None:
+            months = [m for m in months if m <= pd.Timestamp(end).strftime('%Y-%m')]
+        if not months:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Datetime'))
+
+        data = pd.concat([self._read_month(self._month_path(symbol, interval, m)) for m in months])
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+        if end is not None:
+            end = pd.Timestamp(end)
+            # A date-only end includes that whole day
+            if end == end.normalize():
+                end += pd.Timedelta(days=1) - pd.Timedelta(1)
+            data = data[data.index <= end]
+        return data
+
+    def last_timestamp(self, symbol, interval):
+        """Newest stored bar time, or None"""
+        months = self.months(symbol, interval)
+        if not months:
+            return None
+        return self._read_month(self._month_path(symbol, interval, months[-1])).index.max()
+
+
+def load_replay(symbol, interval='5min', start=None, end=None, resample=None,
+                regular_hours=True, root='./data_store/intraday/'):
+    """Stored intraday bars as a backtesting.py OHLCV frame
+
+    resample aggregates to a coarser bar size (e.g. '5min' from 1-minute
+    bars). Bars are labelled by their start time and never span sessions.
+    """
+    data = IntradayStore(root).read(symbol, interval, start, end)
+    if data.empty:
+        raise ValueError(f"No stored {interval} bars for {symbol}")
+
+    if regular_hours:
+        data = data.between_time(REGULAR_OPEN, REGULAR_CLOSE, inclusive='left')
+
+    if resample:
+        data = (data.groupby(data.index.normalize(), group_keys=False)
+                    .apply(lambda day: day.resample(resample, origin='start_day').agg(
+                        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}))
+                    .dropna(subset=['Open']))
+        data['Volume'] = data['Volume'].astype('int64')
+
+    return data[OHLCV_COLUMNS]
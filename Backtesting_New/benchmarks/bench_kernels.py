@@ -0,0 +1,112 @@
+"""
+Benchmark the candlestick and price momentum kernels against the per-bar evaluators.
+
+    python Backtesting_New/benchmarks/bench_kernels.py
+    python Backtesting_New/benchmarks/bench_kernels.py --sizes 10000,1000000
+
+For each size, eval_kstick and eval_price_mmt are called bar by bar on
+growing slices (as backtesting.py's next() sees the data), then the whole
+series is computed by the NumPy kernels and, if Numba is installed, the
+compiled ones. Every kernel's output is checked to be identical to the
+per-bar values, NaNs included. The per-bar loop is capped at --max-loop-bars
+and its time scaled up beyond that.
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import talib as ta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from synthetic import make_ohlcv
+from signals import kernels
+from signals.kstick import eval_kstick
+from signals.mmt import eval_price_mmt
+from signals.volume import rolling_mean, rolling_max
+
+VOLUME_RATIO_THRESHOLD = 1.25
+
+
+def per_bar(columns, average_volume, average_volume_short, volume_max_3, ema5, bb_middle, n_bars):
+    """Both evaluators on the first n_bars bars, one call per bar"""
+    kstick = np.full(n_bars, np.nan)
+    price_mmt = np.full(n_bars, np.nan)
+    for i in range(1, n_bars):
+        end = i + 1
+        strategy = SimpleNamespace(
+            data=SimpleNamespace(**{name: values[:end] for name, values in columns.items()}),
+            bb_middle=bb_middle[:end], volume_max_3=volume_max_3[:end],
+            volume_ratio_threshold=VOLUME_RATIO_THRESHOLD,
+        )
+        kstick[i] = eval_kstick(strategy, average_volume[i], ema5[:end])
+        if i >= 2:
+            price_mmt[i] = eval_price_mmt(strategy, average_volume_short[i])
+    return kstick, price_mmt
+
+
+def timed(func, repeat=3):
+    best, result = np.inf, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pattern kernels vs per-bar evaluation')
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--max-loop-bars', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    implementations = {'numpy': (kernels._kstick_numpy, kernels._price_mmt_numpy)}
+    if kernels.NUMBA_AVAILABLE:
+        implementations['numba'] = (kernels._kstick_kernel, kernels._price_mmt_kernel)
+    else:
+        print('Numba is not installed; timing the NumPy kernels only')
+
+    rows = []
+    for n_bars in [int(size) for size in args.sizes.split(',')]:
+        df = make_ohlcv(n_bars, seed=args.seed)
+        columns = {name: df[name].to_numpy() for name in ['Open', 'High', 'Low', 'Close', 'Volume']}
+        close = columns['Close'].astype(float)
+        average_volume = rolling_mean(columns['Volume'], 20)
+        average_volume_short = rolling_mean(columns['Volume'], 10)
+        volume_max_3 = rolling_max(columns['Volume'], 3)
+        ema5 = ta.EMA(close, 5)
+        bb_middle = ta.BBANDS(close, 20, 2.1)[1]
+
+        loop_bars = min(n_bars, args.max_loop_bars)
+        loop_seconds, (kstick_ref, mmt_ref) = timed(
+            lambda: per_bar(columns, average_volume, average_volume_short, volume_max_3, ema5, bb_middle, loop_bars), repeat=1)
+        loop_seconds *= n_bars / loop_bars
+        row = {'bars': n_bars, 'per-bar s': loop_seconds}
+
+        arrays = kernels._float_arrays(*columns.values())
+        kstick_args = (*arrays, *kernels._float_arrays(average_volume, ema5), VOLUME_RATIO_THRESHOLD)
+        mmt_args = (*arrays, *kernels._float_arrays(average_volume_short, bb_middle), VOLUME_RATIO_THRESHOLD)
+        for name, (kstick_kernel, mmt_kernel) in implementations.items():
+            # The first call compiles the Numba kernels; only later calls are timed
+            kstick_kernel(*kstick_args), mmt_kernel(*mmt_args)
+            seconds, (kstick, price_mmt) = timed(lambda: (kstick_kernel(*kstick_args), mmt_kernel(*mmt_args)))
+            if not (np.array_equal(kstick[:loop_bars], kstick_ref, equal_nan=True)
+                    and np.array_equal(price_mmt[:loop_bars], mmt_ref, equal_nan=True)):
+                raise AssertionError(f"{name} kernels differ from the per-bar evaluators at {n_bars} bars")
+            row[f"{name} s"] = seconds
+            row[f"{name} speedup"] = loop_seconds / seconds
+        rows.append(row)
+
+    print(pd.DataFrame(rows).set_index('bars').to_string(float_format='{:,.4f}'.format))
+    print('All kernel outputs identical to the per-bar evaluators')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare the TPE + successive-halving optimizer with bt.optimize's random grid sampling.
+
+    python Backtesting_New/benchmarks/bench_optimizer.py
+    python Backtesting_New/benchmarks/bench_optimizer.py --bars 2500 --trials 162 --seeds 0,1,2
+
+Both search WeightedStrat's 14 weights (0 to 0.9 in steps of 0.1, as in the
+commented bt.optimize call) on the same synthetic series. The random search
+draws uniform samples of the grid, as max_tries does (bt.optimize itself
+cannot run here: it enumerates all 10^14 combinations before sampling), and
+gets as many full-history backtests as the optimizer's rungs add up to, so
+the comparison is at equal backtesting cost.
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from backtesting import Backtest
+
+from synthetic import make_ohlcv
+from strategy_combined import WeightedStrat
+from optimizer import optimize
+from walk_forward import score_stats
+
+WEIGHTS = [
+    'rsi_daily_weight_buy', 'rsi_daily_weight_sell', 'rsi_weekly_weight',
+    'macd_daily_weight', 'macd_weekly_weight',
+    'bb_weight_buy', 'bb_weight_sell', 'bb_reversal_weight_buy', 'bb_reversal_weight_sell',
+    'ema_cross_weight', 'adx_weight', 'price_mmt_weight', 'kstick_weight', 'stoch_weight',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TPE + successive halving vs random search on WeightedStrat')
+    parser.add_argument('--bars', type=int, default=2000)
+    parser.add_argument('--trials', type=int, default=108, help='Candidates for the optimizer')
+    parser.add_argument('--seeds', default='0', help='Comma-separated search seeds')
+    parser.add_argument('--maximize', default='Sharpe Ratio')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    data = make_ohlcv(args.bars)
+    space = {name: np.round(np.arange(0, 1, 0.1), 1) for name in WEIGHTS}
+    bt = Backtest(data, WeightedStrat, cash=1_000_000, commission=.002, exclusive_orders=True)
+
+    for seed in [int(seed) for seed in args.seeds.split(',')]:
+        start = time.perf_counter()
+        result = optimize(data, WeightedStrat, maximize=args.maximize, n_trials=args.trials,
+                          random_state=seed, processes=args.processes, cash=1_000_000, **space)
+        tpe_seconds = time.perf_counter() - start
+        budget = int(round(result._full_backtests))
+        full_runs = int(result._trials.iloc[:, -1].notna().sum())
+
+        start = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        random_best = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for _ in range(budget):
+                params = {name: rng.choice(values) for name, values in space.items()}
+                random_best = np.nanmax([random_best, score_stats(bt.run(**params), args.maximize)])
+        random_seconds = time.perf_counter() - start
+
+        print(f"seed {seed}: TPE + halving {result[args.maximize]:.3f} from {args.trials} candidates "
+              f"({full_runs} full-history runs, {result._full_backtests:.1f} full-backtest equivalents, "
+              f"{tpe_seconds:.0f}s); "
+              f"random search {random_best:.3f} from {budget} full backtests "
+              f"({random_seconds:.0f}s)")
+
+
+if __name__ == '__main__':
+    main()
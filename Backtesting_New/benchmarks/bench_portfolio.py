@@ -0,0 +1,71 @@
+"""
+Benchmark the multi-asset portfolio simulator on synthetic symbols.
+
+    python Backtesting_New/benchmarks/bench_portfolio.py
+    python Backtesting_New/benchmarks/bench_portfolio.py --symbols 500 --bars 7500
+    python Backtesting_New/benchmarks/bench_portfolio.py --symbols 20 --bars 2500 --weighted
+
+Each symbol is an independent GBM series from make_ohlcv. By default the buy
+and sell scores are random quarter steps that cross the thresholds about as
+often as WeightedStrat's do, so only the simulator is timed; --weighted
+computes the real WeightedStrat scores first (about a second per symbol per
+5,000 bars, spread over --processes).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from synthetic import make_ohlcv
+from portfolio import backtest_portfolio, signal_matrices
+
+
+def random_scores(index, symbols, seed):
+    """Quarter-step scores like WeightedStrat's, past the thresholds a few percent of bars"""
+    rng = np.random.default_rng(seed)
+    shape = (len(index), len(symbols))
+    buy = np.round(np.clip(rng.normal(0.25, 0.45, shape), 0, None) * 4) / 4
+    sell = np.round(np.clip(rng.normal(-0.25, 0.45, shape), None, 0) * 4) / 4
+    return pd.DataFrame(buy, index=index, columns=symbols), pd.DataFrame(sell, index=index, columns=symbols)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized portfolio backtester')
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--bars', type=int, default=7500, help='Daily bars per symbol (7,500 is about 30 years)')
+    parser.add_argument('--max-positions', type=int, default=20)
+    parser.add_argument('--weighted', action='store_true', help="Use WeightedStrat's scores instead of random ones")
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+    data = {symbol: make_ohlcv(args.bars, seed=args.seed + i, start_price=20 + 5 * (i % 40))
+            for i, symbol in enumerate(symbols)}
+    print(f"Generated {args.symbols} symbols x {args.bars} bars in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    if args.weighted:
+        buy, sell = signal_matrices(data, processes=args.processes)
+        print(f"WeightedStrat scores in {time.perf_counter() - start:.1f}s")
+    else:
+        buy, sell = random_scores(data[symbols[0]].index, symbols, args.seed)
+
+    start = time.perf_counter()
+    stats = backtest_portfolio(data, buy, sell, cash=1_000_000, max_positions=args.max_positions)
+    elapsed = time.perf_counter() - start
+    print(f"Portfolio backtest in {elapsed:.2f}s "
+          f"({args.symbols * args.bars / elapsed / 1e6:,.2f}M symbol-bars/s)\n")
+    print(stats.drop(['_equity_curve', '_trades']).to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+Benchmark WeightedStrat and the standalone strategies on synthetic OHLCV data.
+
+    python Backtesting_New/benchmarks/bench_strategies.py
+    python Backtesting_New/benchmarks/bench_strategies.py --sizes 1000,1000000 --strategies WeightedStrat
+
+Each backtest is timed end to end and split into phases:
+    init    Strategy.init (indicator computation)
+    next    time spent inside Strategy.next
+    engine  the rest of the bar loop (broker, order fills, indicator slicing)
+    stats   compute_stats after the last bar
+Runs are appended to history.json next to this file, and each result is
+compared with the latest earlier run of the same strategy and size.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import backtesting
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# Strategy modules use top-level `signals` imports
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+from synthetic import make_ohlcv
+from strategy_combined import WeightedStrat
+from signals.rsi import RSIStrategy
+from signals.macd import MACDStrategy
+from signals.bb import BBStrategy
+from signals.mmt import MMTStrat
+
+STRATEGIES = {
+    'WeightedStrat': WeightedStrat,
+    'RSIStrategy': RSIStrategy,
+    'MACDStrategy': MACDStrategy,
+    'BBStrategy': BBStrategy,
+    'MMTStrat': MMTStrat,
+}
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+HISTORY_FILE = os.path.join(BENCH_DIR, 'history.json')
+PHASES = ['init', 'next', 'engine', 'stats']
+
+
+def timed_strategy(strategy_class, clock):
+    """Subclass that records init and next timings into clock"""
+
+    class Timed(strategy_class):
+        def init(self):
+            clock['init_start'] = time.perf_counter()
+            super().init()
+            clock['init_end'] = time.perf_counter()
+
+        def next(self):
+            start = time.perf_counter()
+            super().next()
+            end = time.perf_counter()
+            clock['next'] += end - start
+            clock['last_next_end'] = end
+
+    Timed.__name__ = strategy_class.__name__
+    return Timed
+
+
+def run_once(strategy_class, data):
+    """One backtest; returns (phase seconds, stats)"""
+    clock = {'next': 0.0}
+    bt = Backtest(data, timed_strategy(strategy_class, clock), cash=1_000_000, commission=.002,
+                  exclusive_orders=True)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        start = time.perf_counter()
+        stats = bt.run()
+        end = time.perf_counter()
+
+    last_next_end = clock.get('last_next_end', clock['init_end'])
+    phases = {
+        'total': end - start,
+        'init': clock['init_end'] - clock['init_start'],
+        'next': clock['next'],
+        'engine': last_next_end - clock['init_end'] - clock['next'],
+        'stats': end - last_next_end,
+    }
+    return phases, stats
+
+
+def bench(strategy_name, n_bars, repeat, seed):
+    """Best-of-repeat phase timings plus a fingerprint of the results"""
+    data = make_ohlcv(n_bars, seed=seed)
+    runs = [run_once(STRATEGIES[strategy_name], data) for _ in range(repeat)]
+    best, stats = min(runs, key=lambda run: run[0]['total'])
+
+    return {
+        'strategy': strategy_name,
+        'bars': n_bars,
+        'seed': seed,
+        'repeat': repeat,
+        **{phase: round(seconds, 6) for phase, seconds in best.items()},
+        'us_per_bar': round(best['total'] / n_bars * 1e6, 3),
+        # Optimizations must leave these unchanged
+        'trades': int(stats['# Trades']),
+        'final_equity': round(float(stats['Equity Final [$]']), 6),
+    }
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BENCH_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return revision + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def previous_result(history, result):
+    """Latest earlier result for the same strategy, size and seed"""
+    for run in reversed(history):
+        for old in run['results']:
+            if (old['strategy'], old['bars'], old.get('seed')) == (result['strategy'], result['bars'], result['seed']):
+                return old
+    return None
+
+
+def compare(result, previous, threshold):
+    """Change in total time against the previous run, flagged past the threshold"""
+    if previous is None:
+        return 'new'
+
+    change = (result['total'] / previous['total'] - 1) * 100
+    notes = [f"{change:+.1f}%"]
+    if change > threshold:
+        notes.append('REGRESSION')
+    if (result['trades'], result['final_equity']) != (previous['trades'], previous['final_equity']):
+        notes.append('RESULTS CHANGED')
+    return ' '.join(notes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Backtesting_New strategies on synthetic data')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated bar counts (1k to 1M)')
+    parser.add_argument('--strategies', default=','.join(STRATEGIES),
+                        help='Comma-separated strategy names')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the fastest is kept')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Slowdown in percent reported as a regression')
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--no-save', action='store_true', help='Do not append this run to the history')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = [name.strip() for name in args.strategies.split(',')]
+    unknown = [name for name in names if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+
+    history = load_history(args.history)
+    results = []
+
+    header = f"{'strategy':<14}{'bars':>9}{'total s':>10}" + ''.join(f"{p + ' s':>10}" for p in PHASES)
+    print(header + f"{'us/bar':>9}{'trades':>8}  vs previous")
+    for n_bars in sizes:
+        for name in names:
+            result = bench(name, n_bars, args.repeat, args.seed)
+            results.append(result)
+            print(f"{name:<14}{n_bars:>9}{result['total']:>10.3f}"
+                  + ''.join(f"{result[p]:>10.3f}" for p in PHASES)
+                  + f"{result['us_per_bar']:>9.1f}{result['trades']:>8}  "
+                  + compare(result, previous_result(history, result), args.threshold))
+
+    if not args.no_save:
+        history.append({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'backtesting': backtesting.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor() or None,
+            'results': results,
+        })
+        with open(args.history, 'w') as f:
+            json.dump(history, f, indent=1)
+        print(f"Appended to {args.history}")
+
+
+if __name__ == '__main__':
+    main()
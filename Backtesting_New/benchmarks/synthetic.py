@@ -0,0 +1,47 @@
+"""
+Deterministic synthetic OHLCV series for benchmarks.
+
+Closes follow geometric Brownian motion; opens gap from the previous close,
+highs and lows extend past the candle body, and volume is lognormal with
+spikes on large moves so the volume-confirmed signals fire.
+"""
+import numpy as np
+import pandas as pd
+
+# Daily bars stop fitting pandas' timestamp range past roughly 60k bars
+MAX_DAILY_BARS = 50_000
+
+
+def make_ohlcv(n_bars, seed=42, start_price=100.0, mu=0.08, sigma=0.25, freq=None):
+    """GBM OHLCV frame with n_bars rows, identical for the same arguments
+
+    mu and sigma are annualised. freq defaults to business days, or to
+    5-minute bars when n_bars exceeds MAX_DAILY_BARS.
+    """
+    rng = np.random.default_rng(seed)
+    if freq is None:
+        freq = 'B' if n_bars <= MAX_DAILY_BARS else '5min'
+    dt = 1 / 252 if freq == 'B' else 1 / (252 * 78)
+
+    returns = (mu - sigma ** 2 / 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(n_bars)
+    close = start_price * np.exp(np.cumsum(returns))
+
+    prev_close = np.concatenate(([start_price], close[:-1]))
+    open_ = prev_close * np.exp(sigma * np.sqrt(dt) * 0.3 * rng.standard_normal(n_bars))
+
+    wick = sigma * np.sqrt(dt) * 0.5
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.standard_normal(n_bars)) * wick)
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.standard_normal(n_bars)) * wick)
+
+    # Heavier volume on bigger moves
+    move = np.abs(returns) / (sigma * np.sqrt(dt))
+    volume = rng.lognormal(13, 0.4, n_bars) * (1 + move)
+
+    index = pd.date_range('1990-01-01', periods=n_bars, freq=freq, name='Date')
+    return pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': np.round(volume).astype(np.int64),
+    }, index=index)
@@ -6,6 +6,7 @@ import numpy as np
 import talib as ta
 import datetime as dt
 from signals import rsi, macd, bb, ema, adx, mmt, kstick, stoch
+from signals.volume import rolling_mean, rolling_max
 #from utils import math_func
 
 
@@ -88,6 +89,11 @@ class RSIStrat(Strategy):
             fastk_period=self.stoch_k_period, slowk_period=self.stoch_d_period, slowk_matype=0,
             slowd_period=self.stoch_d_period, slowd_matype=0
             )
+
+        # Rolling volume statistics eval_bb and eval_price_mmt read by index
+        self.volume_mean_2 = self.I(rolling_mean, self.data.Volume, 2, name='Volume Mean 2', plot=False)
+        self.volume_max_2 = self.I(rolling_max, self.data.Volume, 2, name='Volume Max 2', plot=False)
+        self.volume_max_3 = self.I(rolling_max, self.data.Volume, 3, name='Volume Max 3', plot=False)
         
         # Calculate weekly indicators
         self.rsi_weekly = resample_apply('W-FRI', ta.RSI, close, self.rsi_daily_days)
@@ -0,0 +1,211 @@
+"""
+Model-based parameter search with successive halving, for WeightedStrat's weights.
+
+    output = optimize(stock, WeightedStrat, maximize='Sharpe Ratio', n_trials=300, processes=4,
+                      rsi_daily_weight_buy=np.arange(0, 1, 0.1),
+                      macd_daily_weight=np.arange(0, 1, 0.1),
+                      ...)
+    print(output._strategy)
+    print(output._trials)          # every candidate with its score on each rung
+
+A random max_tries sample of the 14-weight grid covers almost none of it,
+and every sample costs a full-history backtest. Here candidates come in
+batches from a tree-structured Parzen estimator (TPE): after a few random
+batches, new candidates are drawn where the best-scoring quarter of earlier
+trials concentrates and the rest does not. Each batch is then raced over
+rungs of growing history (by default the last quarter, the last half, then
+all of it), and only the top 1/eta of a rung is promoted, so most
+candidates cost a fraction of a full backtest.
+
+maximize= and constraint= behave as in bt.optimize: a stats key or a
+function of the stats Series (optim_func), and a function of the
+parameters. Runs without trades score NaN and are never promoted. Trials
+run in parallel worker processes; a custom maximize must then be a
+module-level function.
+"""
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+
+from walk_forward import score_stats
+
+# Data and settings for trials, set once per worker process
+_worker = {}
+
+
+def _init_worker(data, strategy, backtest_kwargs, maximize):
+    _worker.update(data=data, strategy=strategy, backtest_kwargs=backtest_kwargs, maximize=maximize)
+
+
+def _evaluate(task):
+    params, start = task
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        bt = Backtest(_worker['data'].iloc[start:], _worker['strategy'], **_worker['backtest_kwargs'])
+        stats = bt.run(**params)
+    return score_stats(stats, _worker['maximize'])
+
+
+class ParzenSampler:
+    """TPE over discrete parameter values, preferring those common among the best trials"""
+
+    def __init__(self, space, constraint=None, gamma=0.25, n_startup=20, n_candidates=32, random_state=None):
+        self.space = space
+        self.constraint = constraint
+        self.gamma = gamma
+        self.n_startup = n_startup
+        self.n_candidates = n_candidates
+        self.rng = np.random.default_rng(random_state)
+        self.observed = []   # (value indices, score)
+        self.seen = set()
+
+    def observe(self, params, score):
+        if np.isfinite(score):
+            indices = tuple(self.space[name].index(value) for name, value in params.items())
+            self.observed.append((indices, score))
+
+    def _density(self, rows, size):
+        """Smoothed probability of each value index; neighbouring values share weight"""
+        counts = np.bincount(rows, minlength=size).astype(float) if len(rows) else np.zeros(size)
+        if size > 1:
+            counts = np.convolve(counts, [0.25, 0.5, 0.25], mode='same')
+        counts += 1.0 / size
+        return counts / counts.sum()
+
+    def _draw(self):
+        if len(self.observed) < self.n_startup:
+            return [tuple(self.rng.integers(len(values)) for values in self.space.values())]
+
+        ranked = sorted(self.observed, key=lambda item: item[1], reverse=True)
+        n_good = max(1, int(np.ceil(self.gamma * len(ranked))))
+        good = np.array([indices for indices, _ in ranked[:n_good]])
+        bad = np.array([indices for indices, _ in ranked[n_good:]]).reshape(-1, len(self.space))
+
+        draws = np.empty((self.n_candidates, len(self.space)), dtype=np.int64)
+        log_ratio = np.zeros(self.n_candidates)
+        for column, values in enumerate(self.space.values()):
+            l = self._density(good[:, column], len(values))
+            g = self._density(bad[:, column], len(values))
+            draws[:, column] = self.rng.choice(len(values), size=self.n_candidates, p=l)
+            log_ratio += np.log(l[draws[:, column]]) - np.log(g[draws[:, column]])
+        return [tuple(draws[row]) for row in np.argsort(-log_ratio, kind='stable')]
+
+    def sample(self, max_attempts=100):
+        """Next untried admissible parameters, or None when none can be found"""
+        for _ in range(max_attempts):
+            for indices in self._draw():
+                if indices in self.seen:
+                    continue
+                params = {name: values[i] for (name, values), i in zip(self.space.items(), indices)}
+                if self.constraint is not None and not self.constraint(SimpleNamespace(**params)):
+                    continue
+                self.seen.add(indices)
+                return params
+        return None
+
+
+def optimize(data, strategy, maximize='Sharpe Ratio', constraint=None, n_trials=300,
+             rungs=(0.25, 0.5, 1.0), eta=3, batch_size=None, processes=1, random_state=None,
+             cash=10000, commission=.002, exclusive_orders=True, **params):
+    """Search params with TPE and successive halving; return full-history stats of the best
+
+    rungs are the trailing fractions of data each batch is raced on, the
+    last normally 1.0; eta is how many candidates compete per promotion.
+    The result carries '_trials' with each candidate's score per rung.
+    """
+    space = {name: list(values) if isinstance(values, (list, tuple, np.ndarray, range)) else [values]
+             for name, values in params.items()}
+    sampler = ParzenSampler(space, constraint, random_state=random_state)
+    batch_size = batch_size or eta ** (len(rungs) - 1) * 2
+    starts = [len(data) - int(round(len(data) * fraction)) for fraction in rungs]
+    backtest_kwargs = {'cash': cash, 'commission': commission, 'exclusive_orders': exclusive_orders}
+
+    pool = None
+    if processes > 1:
+        pool = ProcessPoolExecutor(processes, initializer=_init_worker,
+                                   initargs=(data, strategy, backtest_kwargs, maximize))
+    else:
+        _init_worker(data, strategy, backtest_kwargs, maximize)
+
+    def run_tasks(tasks):
+        return list(pool.map(_evaluate, tasks)) if pool is not None else [_evaluate(task) for task in tasks]
+
+    trials = []
+    try:
+        while len(trials) < n_trials:
+            batch = []
+            for _ in range(min(batch_size, n_trials - len(trials))):
+                candidate = sampler.sample()
+                if candidate is None:
+                    break
+                batch.append({'params': candidate})
+            if not batch:
+                break
+            trials.extend(batch)
+
+            survivors = batch
+            for rung, start in enumerate(starts):
+                scores = run_tasks([(trial['params'], start) for trial in survivors])
+                for trial, score in zip(survivors, scores):
+                    trial[rung] = score
+                    if rung == 0:
+                        sampler.observe(trial['params'], score)
+                # Promote the top 1/eta; runs without trades drop out
+                ranked = sorted((trial for trial in survivors if np.isfinite(trial[rung])),
+                                key=lambda trial: trial[rung], reverse=True)
+                survivors = ranked[:max(1, len(survivors) // eta)]
+                if not survivors:
+                    break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if not trials:
+        raise ValueError('No admissible parameter combinations to test')
+
+    last = len(starts) - 1
+    table = pd.DataFrame([{**trial['params'], **{f"rung_{rung}": trial.get(rung, np.nan) for rung in range(len(starts))}}
+                          for trial in trials])
+    finished = [trial for trial in trials if np.isfinite(trial.get(last, np.nan))]
+    # Like bt.optimize, fall back to the first candidate when nothing traded
+    best = max(finished, key=lambda trial: trial[last])['params'] if finished else trials[0]['params']
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        stats = Backtest(data, strategy, **backtest_kwargs).run(**best)
+    bars = sum(len(data) - starts[rung] for trial in trials for rung in range(len(starts)) if rung in trial)
+    stats.loc['_trials'] = table
+    stats.loc['_full_backtests'] = bars / len(data)
+    return stats
+
+
+if __name__ == '__main__':
+    import datetime as dt
+    import os
+    import yfinance as yf
+
+    from strategy_combined import WeightedStrat
+
+    # Get financial data from yfinance
+    ticker = 'SPY'
+    end_date = dt.datetime.now().date() - dt.timedelta(days=1)
+    stock = yf.download(ticker, start='2015-01-01', end=end_date)[['Open', 'High', 'Low', 'Close', 'Volume']]
+    stock.columns = stock.columns.droplevel(1)  # Reshape multi-index columns
+
+    # The 14 weight ranges of the bt.optimize call in strategy_combined.py
+    weights = {name: np.arange(0, 1, 0.1) for name in [
+        'rsi_daily_weight_buy', 'rsi_daily_weight_sell', 'rsi_weekly_weight',
+        'macd_daily_weight', 'macd_weekly_weight',
+        'bb_weight_buy', 'bb_weight_sell', 'bb_reversal_weight_buy', 'bb_reversal_weight_sell',
+        'ema_cross_weight', 'adx_weight', 'price_mmt_weight', 'kstick_weight', 'stoch_weight',
+    ]}
+    output = optimize(stock, WeightedStrat, maximize='Sharpe Ratio', n_trials=300,
+                      random_state=0, processes=os.cpu_count(), **weights)
+    print(output._strategy)
+    print(output._trials.sort_values('rung_2', ascending=False).head(10))
+    print(f"{output._full_backtests:.0f} full-backtest equivalents")
+    print(output)
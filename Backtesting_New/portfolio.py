@@ -0,0 +1,261 @@
+"""
+Multi-asset portfolio backtests on WeightedStrat's weighted signals.
+
+    data = {'AAPL': aapl, 'MSFT': msft, ...}                 # OHLCV frames
+    buy, sell = signal_matrices(data, processes=4)           # bars x symbols
+    stats = backtest_portfolio(data, buy, sell, cash=100_000, max_positions=10)
+    print(stats)
+    stats._equity_curve, stats._trades
+
+backtesting.py simulates one instrument per run. Here the per-bar buy and
+sell scores of every symbol sit in (bars x symbols) matrices, and all symbols
+share one cash balance. Each bar is a handful of array operations across
+symbols, so hundreds of symbols over decades of daily bars take seconds.
+
+Trading follows WeightedStrat.place_orders, with orders filled at the next
+open as in backtesting.py:
+    - a held symbol is sold when its sell score <= sell_threshold
+    - an unheld symbol is bought when its buy score >= buy_threshold, with a
+      stop at stop_loss x the signal bar's close, hit intrabar (at the open
+      if the bar gaps below it)
+    - at most max_positions are held; the highest buy scores go first, each
+      entry gets equity / max_positions in whole shares, limited by cash
+    - commission is charged on both sides as a fraction of traded value
+"""
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+
+from strategy_combined import WeightedStrat
+
+
+def _symbol_signals(job):
+    """Buy and sell scores of one symbol, from the strategy's own evaluators"""
+    symbol, df, strategy_class, params = job
+
+    class SignalsOnly(strategy_class):
+        def place_orders(self, buy_signal, sell_signal, price, current_day):
+            pass
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        stats = Backtest(df, SignalsOnly, cash=1e12).run(**params)
+    values = stats._strategy.signal_values
+    return symbol, pd.Series(values['buy'], index=df.index), pd.Series(values['sell'], index=df.index)
+
+
+def signal_matrices(data, strategy=WeightedStrat, processes=1, **params):
+    """Weighted buy and sell scores for every symbol as (bars x symbols) frames
+
+    strategy must record its scores in signal_values['buy'] and ['sell'] like
+    WeightedStrat; params override its class attributes, as in bt.run(). Bars
+    before the indicators warm up, or where a symbol has no data, are NaN.
+    """
+    jobs = [(symbol, df, strategy, params) for symbol, df in data.items()]
+    if processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            results = list(pool.map(_symbol_signals, jobs))
+    else:
+        results = [_symbol_signals(job) for job in jobs]
+
+    buy = pd.DataFrame({symbol: scores for symbol, scores, _ in results}).sort_index()
+    sell = pd.DataFrame({symbol: scores for symbol, _, scores in results}).sort_index()
+    return buy, sell
+
+
+def _matrix(data, column, index, symbols):
+    return pd.DataFrame({symbol: data[symbol][column] for symbol in symbols}).reindex(index)
+
+
+def backtest_portfolio(data, buy, sell, cash=100_000, commission=0.002, max_positions=10,
+                       buy_threshold=1.0, sell_threshold=-1.0, stop_loss=0.95):
+    """Simulate the portfolio and return backtesting.py-style stats
+
+    data maps each column of buy/sell to its OHLCV frame. The result holds
+    the equity curve (with drawdown and open positions) under
+    '_equity_curve' and closed trades under '_trades'.
+    """
+    index, symbols = buy.index, list(buy.columns)
+    sell = sell.reindex(index=index, columns=symbols)
+    open_ = _matrix(data, 'Open', index, symbols).to_numpy(float)
+    low = _matrix(data, 'Low', index, symbols).to_numpy(float)
+    close_frame = _matrix(data, 'Close', index, symbols)
+    close = close_frame.to_numpy(float)
+    # Holdings are valued at the last known close while a symbol has no bar
+    mark = close_frame.ffill().fillna(0).to_numpy(float)
+    buy_scores, sell_scores = buy.to_numpy(float), sell.to_numpy(float)
+
+    n_bars, n_symbols = close.shape
+    shares = np.zeros(n_symbols)
+    stop = np.full(n_symbols, np.nan)
+    entry_price = np.zeros(n_symbols)
+    entry_bar = np.zeros(n_symbols, dtype=np.int64)
+    pending_exit = np.zeros(n_symbols, dtype=bool)
+    pending_entry = np.array([], dtype=np.int64)
+    equity = np.empty(n_bars)
+    positions = np.empty(n_bars, dtype=np.int64)
+    trades = []
+    balance = float(cash)
+
+    def exit_positions(idx, price, bar):
+        size = shares[idx]
+        pnl = size * (price * (1 - commission) - entry_price[idx] * (1 + commission))
+        trades.append((idx, size, entry_bar[idx], np.full(idx.size, bar), entry_price[idx], price, pnl))
+        shares[idx] = 0
+        stop[idx] = np.nan
+        return (size * price * (1 - commission)).sum()
+
+    with np.errstate(invalid='ignore'):
+        for bar in range(n_bars):
+            bar_open = open_[bar]
+
+            # Orders from the previous close fill at this open: exits first, so they free cash
+            exits = np.flatnonzero(pending_exit & np.isfinite(bar_open))
+            if exits.size:
+                balance += exit_positions(exits, bar_open[exits], bar)
+
+            entries = pending_entry[np.isfinite(bar_open[pending_entry])]
+            if entries.size:
+                target = (equity[bar - 1] if bar else balance) / max_positions
+                unit_cost = bar_open[entries] * (1 + commission)
+                size = np.floor(np.minimum(target, balance) / unit_cost)
+                cost = size * unit_cost
+                # Highest scores first; entries the remaining cash cannot cover are dropped
+                size[np.cumsum(cost) > balance] = 0
+                filled = size > 0
+                entries, size = entries[filled], size[filled]
+                balance -= (size * bar_open[entries] * (1 + commission)).sum()
+                shares[entries] = size
+                entry_price[entries] = bar_open[entries]
+                entry_bar[entries] = bar
+                stop[entries] = stop_loss * close[bar - 1, entries]
+
+            stopped = np.flatnonzero(low[bar] <= stop)
+            if stopped.size:
+                balance += exit_positions(stopped, np.minimum(bar_open[stopped], stop[stopped]), bar)
+
+            held = shares > 0
+            equity[bar] = balance + shares @ mark[bar]
+            positions[bar] = held.sum()
+
+            # Signals at this close become orders for the next open; exits wait out missing bars
+            pending_exit = held & ((sell_scores[bar] <= sell_threshold) | pending_exit)
+            free = max_positions - positions[bar] + pending_exit.sum()
+            candidates = np.flatnonzero(~held & (buy_scores[bar] >= buy_threshold))
+            if free > 0 and candidates.size:
+                ranked = candidates[np.argsort(-buy_scores[bar, candidates], kind='stable')]
+                pending_entry = ranked[:free]
+            else:
+                pending_entry = np.array([], dtype=np.int64)
+
+    return compute_portfolio_stats(equity, positions, index, symbols, trades, close_frame, cash)
+
+
+def _trades_frame(trades, index, symbols):
+    columns = ['Symbol', 'Size', 'EntryBar', 'ExitBar', 'EntryPrice', 'ExitPrice', 'PnL',
+               'ReturnPct', 'EntryTime', 'ExitTime', 'Duration']
+    if not trades:
+        return pd.DataFrame(columns=columns)
+
+    idx, size, entry_bar, exit_bar, entry_price, exit_price, pnl = (np.concatenate(part) for part in zip(*trades))
+    df = pd.DataFrame({
+        'Symbol': np.asarray(symbols, dtype=object)[idx],
+        'Size': size.astype(np.int64),
+        'EntryBar': entry_bar,
+        'ExitBar': exit_bar,
+        'EntryPrice': entry_price,
+        'ExitPrice': exit_price,
+        'PnL': pnl,
+        'ReturnPct': pnl / (size * entry_price),
+        'EntryTime': index[entry_bar],
+        'ExitTime': index[exit_bar],
+    })
+    df['Duration'] = df['ExitTime'] - df['EntryTime']
+    return df.sort_values(['ExitBar', 'EntryBar'], kind='stable').reset_index(drop=True)
+
+
+def equity_stats(equity):
+    """Annualized return, volatility, risk ratios and drawdown of an equity curve
+
+    Annualized from daily returns the same way as backtesting.py, so figures
+    are comparable with single-instrument runs.
+    """
+    annual_return, annual_volatility, sortino_denominator = np.nan, np.nan, np.nan
+    if isinstance(equity.index, pd.DatetimeIndex):
+        day_returns = equity.resample('D').last().dropna().pct_change().dropna()
+        annual_days = 365 if (equity.index.dayofweek >= 5).any() else 252
+        if len(day_returns):
+            gmean = np.exp(np.log1p(day_returns).mean()) - 1
+            annual_return = (1 + gmean) ** annual_days - 1
+            annual_volatility = np.sqrt((day_returns.var(ddof=1) + (1 + gmean) ** 2) ** annual_days
+                                        - (1 + gmean) ** (2 * annual_days))
+            sortino_denominator = np.sqrt(np.mean(day_returns.clip(upper=0) ** 2)) * np.sqrt(annual_days)
+
+    values = equity.to_numpy(float)
+    max_drawdown = (1 - values / np.maximum.accumulate(values)).max()
+    return pd.Series({
+        'Return (Ann.) [%]': annual_return * 100,
+        'Volatility (Ann.) [%]': annual_volatility * 100,
+        'Sharpe Ratio': annual_return / (annual_volatility or np.nan),
+        'Sortino Ratio': annual_return / (sortino_denominator or np.nan),
+        'Calmar Ratio': annual_return / (max_drawdown or np.nan),
+        'Max. Drawdown [%]': -max_drawdown * 100,
+    }, dtype=object)
+
+
+def compute_portfolio_stats(equity, positions, index, symbols, trades, close, cash):
+    """Summary statistics, annualized the same way as backtesting.py"""
+    equity_curve = pd.DataFrame({'Equity': equity, 'Positions': positions}, index=index)
+    peak = np.maximum.accumulate(equity)
+    equity_curve['DrawdownPct'] = 1 - equity / peak
+    trades_df = _trades_frame(trades, index, symbols)
+
+    s = pd.Series(dtype=object)
+    s.loc['Start'] = index[0]
+    s.loc['End'] = index[-1]
+    s.loc['Duration'] = s.End - s.Start
+    s.loc['Symbols'] = len(symbols)
+    s.loc['Exposure Time [%]'] = (positions > 0).mean() * 100
+    s.loc['Avg. Positions'] = positions.mean()
+    s.loc['Max. Positions'] = positions.max()
+    s.loc['Equity Final [$]'] = equity[-1]
+    s.loc['Equity Peak [$]'] = peak[-1]
+    s.loc['Return [%]'] = (equity[-1] - cash) / cash * 100
+    # Equal-weight buy and hold over each symbol's own history
+    first = close.apply(lambda col: col.loc[col.first_valid_index()] if col.notna().any() else np.nan)
+    last = close.ffill().iloc[-1]
+    s.loc['Buy & Hold Return [%]'] = ((last / first).mean() - 1) * 100
+
+    s = pd.concat([s, equity_stats(equity_curve['Equity'])])
+
+    returns = trades_df['ReturnPct']
+    s.loc['# Trades'] = len(trades_df)
+    s.loc['Win Rate [%]'] = (returns > 0).mean() * 100 if len(returns) else np.nan
+    s.loc['Best Trade [%]'] = returns.max() * 100
+    s.loc['Worst Trade [%]'] = returns.min() * 100
+    s.loc['Avg. Trade [%]'] = returns.mean() * 100
+    s.loc['Avg. Trade Duration'] = trades_df['Duration'].mean() if len(trades_df) else np.nan
+    s.loc['Open Positions'] = positions[-1]
+
+    s.loc['_equity_curve'] = equity_curve
+    s.loc['_trades'] = trades_df
+    return s
+
+
+if __name__ == '__main__':
+    import datetime as dt
+    import yfinance as yf
+
+    # Get financial data from yfinance
+    tickers = ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL', 'META', 'TSLA', 'JPM', 'XOM', 'UNH']
+    end_date = dt.datetime.now().date() - dt.timedelta(days=1)
+    stocks = yf.download(tickers, start='2015-01-01', end=end_date, group_by='ticker')
+    data = {ticker: stocks[ticker][['Open', 'High', 'Low', 'Close', 'Volume']].dropna() for ticker in tickers}
+
+    buy, sell = signal_matrices(data)
+    output = backtest_portfolio(data, buy, sell, cash=100_000, commission=.002, max_positions=5)
+    print(output._trades)
+    print(output)
@@ -0,0 +1,48 @@
+import time
+
+import pandas as pd
+
+
+class SignalProfiler:
+    """Cumulative wall time and call counts for named sections of a strategy's next()"""
+
+    def __init__(self):
+        self.totals = {}
+        self.calls = {}
+
+    def wrap(self, name, func):
+        """Return func timed under name; only used when profiling is switched on"""
+        self.totals.setdefault(name, 0.0)
+        self.calls.setdefault(name, 0)
+        totals, calls, clock = self.totals, self.calls, time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                totals[name] += clock() - start
+                calls[name] += 1
+
+        return timed
+
+    def summary(self, total_name='next (total)'):
+        """One row per section, slowest first, with the untimed rest of next() as 'other'"""
+        rows = pd.DataFrame({
+            'calls': pd.Series(self.calls),
+            'total_s': pd.Series(self.totals),
+        })
+        if total_name in rows.index:
+            total = rows.loc[total_name, 'total_s']
+            rows.loc['other', ['calls', 'total_s']] = [rows.loc[total_name, 'calls'],
+                                                     total - rows['total_s'].drop(total_name).sum()]
+            rows['share_%'] = rows['total_s'] / total * 100 if total else 0.0
+        rows['calls'] = rows['calls'].astype(int)
+        rows['per_call_us'] = rows['total_s'] / rows['calls'].where(rows['calls'] > 0) * 1e6
+        return rows.sort_values('total_s', ascending=False)
+
+    def report(self):
+        """Print the summary table"""
+        with pd.option_context('display.float_format', '{:,.3f}'.format):
+            print('\nSignal profile')
+            print(self.summary())
@@ -3,6 +3,6 @@ from .macd import eval_macd_daily, eval_macd_weekly
 from .bb import eval_bb
 from .ema import eval_ema_cross
 from .adx import eval_adx
-from .mmt import eval_price_mmt
-from .kstick import eval_kstick
+from .mmt import eval_price_mmt, eval_price_mmt_series
+from .kstick import eval_kstick, eval_kstick_series
 from .stoch import eval_stoch
\ No newline at end of file
@@ -1,8 +1,8 @@
 from backtesting import Strategy, Backtest
 import talib as ta
-import numpy as np
 import datetime as dt
 import yfinance as yf
+from signals.volume import rolling_mean, rolling_max
 
 # SIGNAL EVALUATION
 def eval_bb(strategy, average_volume):
@@ -31,13 +31,13 @@ def eval_bb(strategy, average_volume):
     # Bollinger Band upper breakout
     if (strategy.data.Close[-2] > strategy.bb_upper[-2]
             and strategy.data.Close[-1] > strategy.bb_upper[-1]
-            and np.mean(strategy.data.Volume[-2:]) / average_volume > strategy.volume_ratio_threshold
+            and strategy.volume_mean_2[-1] / average_volume > strategy.volume_ratio_threshold
             ):
         bb_signal_2 = 1
     # Bollinger Band lower breakout
     elif (strategy.data.Close[-2] < strategy.bb_lower[-2] 
         and strategy.data.Close[-1] < strategy.bb_lower[-1]
-        and np.mean(strategy.data.Volume[-2:]) / average_volume > strategy.volume_ratio_threshold
+        and strategy.volume_mean_2[-1] / average_volume > strategy.volume_ratio_threshold
         ):
         bb_signal_2 = -1
     else: bb_signal_2 = 0
@@ -46,12 +46,12 @@ def eval_bb(strategy, average_volume):
     # Extreme reversal signal - top / bottom with enlarged volume
     if (strategy.data.Close[-2] < strategy.bb_lower[-2] and
         (strategy.data.Close[-1] + strategy.data.Open[-1]) / 2 > (strategy.data.Close[-2] + strategy.data.Open[-2]) / 2 and
-        max(strategy.data.Volume[-1], strategy.data.Volume[-2]) / average_volume > strategy.volume_ratio_threshold_high
+        strategy.volume_max_2[-1] / average_volume > strategy.volume_ratio_threshold_high
         ):
         bb_signal_3 = 1
     elif (strategy.data.Close[-2] > strategy.bb_upper[-2] and
         (strategy.data.Close[-1] + strategy.data.Open[-1]) / 2 < (strategy.data.Close[-2] + strategy.data.Open[-2]) / 2 and
-            max(strategy.data.Volume[-1], strategy.data.Volume[-2]) / average_volume > strategy.volume_ratio_threshold_high
+            strategy.volume_max_2[-1] / average_volume > strategy.volume_ratio_threshold_high
             ):
         bb_signal_3 = -1
     else: bb_signal_3 = 0
@@ -123,9 +123,13 @@ class BBStrategy(Strategy):
     def init(self):
         close = self.data.Close
         self.bb_upper, self.bb_middle, self.bb_lower = self.I(ta.BBANDS, close, self.bb_period, self.bb_stdev)
+        # Rolling volume statistics eval_bb reads by index
+        self.average_volume = self.I(rolling_mean, self.data.Volume, self.volume_avg_period, name='Volume Avg', plot=False)
+        self.volume_mean_2 = self.I(rolling_mean, self.data.Volume, 2, name='Volume Mean 2', plot=False)
+        self.volume_max_2 = self.I(rolling_max, self.data.Volume, 2, name='Volume Max 2', plot=False)
         
     def next(self):
-        average_volume = np.mean(self.data.Volume[-self.volume_avg_period:])
+        average_volume = self.average_volume[-1]
         bb_signal = eval_bb(self, average_volume)
         if bb_signal > 0 and not self.position.is_long:
             self.buy()
@@ -0,0 +1,148 @@
+"""
+Whole-series kernels for the candlestick and price momentum patterns.
+
+kstick_series and price_mmt_series return, for every bar, the value
+eval_kstick and eval_price_mmt return when called on that bar, so a strategy
+can compute them once in init() and read them by index in next(). The
+average volumes come from signals/volume.py. Bars without enough history for
+the per-bar evaluator are NaN.
+
+The kernels are compiled with Numba when it is installed; otherwise the
+NumPy versions run. Both evaluate the same floating-point expressions in the
+same order as the per-bar code, so the results are identical, not just close.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+
+def _kstick_loop(open_, high, low, close, volume, average_volume, ema5, volume_ratio_threshold):
+    out = np.full(len(close), np.nan)
+    for i in range(1, len(close)):
+        o, c = open_[i], close[i]
+        signal = 0
+        # Large green candle at the bottom / large red candle at the top
+        if c > o and (c + o) / 2 < ema5[i] and c / o > 1.02 and volume[i] / average_volume[i] > volume_ratio_threshold:
+            signal += 1
+        if c < o and (c + o) / 2 > ema5[i] and o / c > 1.02 and volume[i] / average_volume[i] > volume_ratio_threshold:
+            signal -= 1
+        # Bullish / bearish engulfing
+        if (close[i - 1] < open_[i - 1] and c > o and c > open_[i - 1] and o < close[i - 1]
+                and volume[i] > volume[i - 1]):
+            signal += 1
+        if (close[i - 1] > open_[i - 1] and c < o and c < open_[i - 1] and o > close[i - 1]
+                and volume[i] > volume[i - 1]):
+            signal -= 1
+        # Hammer / hanging man against the mean of the last three closes
+        if i >= 2:
+            mean3 = (close[i - 2] + close[i - 1] + c) / 3
+        else:
+            mean3 = (close[i - 1] + c) / 2
+        if c > o and (high[i] - low[i]) > 2 * (c - o) and c < mean3:
+            signal += 1
+        if c < o and (high[i] - low[i]) > 2 * (o - c) and c > mean3:
+            signal -= 1
+        out[i] = signal
+    return out
+
+
+def _kstick_numpy(open_, high, low, close, volume, average_volume, ema5, volume_ratio_threshold):
+    if len(close) < 2:
+        return np.full(len(close), np.nan)
+    o, c, h, l, v = open_[1:], close[1:], high[1:], low[1:], volume[1:]
+    po, pc, pv = open_[:-1], close[:-1], volume[:-1]
+    ema, avg = ema5[1:], average_volume[1:]
+    mean3 = np.empty(len(c))
+    mean3[:1] = (pc[:1] + c[:1]) / 2
+    mean3[1:] = (close[:-2] + close[1:-1] + close[2:]) / 3
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        signal = ((c > o) & ((c + o) / 2 < ema) & (c / o > 1.02) & (v / avg > volume_ratio_threshold)).astype(float)
+        signal -= (c < o) & ((c + o) / 2 > ema) & (o / c > 1.02) & (v / avg > volume_ratio_threshold)
+        signal += (pc < po) & (c > o) & (c > po) & (o < pc) & (v > pv)
+        signal -= (pc > po) & (c < o) & (c < po) & (o > pc) & (v > pv)
+        signal += (c > o) & ((h - l) > 2 * (c - o)) & (c < mean3)
+        signal -= (c < o) & ((h - l) > 2 * (o - c)) & (c > mean3)
+    return np.concatenate(([np.nan], signal))
+
+
+def _price_mmt_loop(open_, high, low, close, volume, average_volume_short, bb_middle, volume_ratio_threshold):
+    out = np.full(len(close), np.nan)
+    for i in range(2, len(close)):
+        o, c = open_[i], close[i]
+        # max() of three volumes, keeping the first of equal values as the builtin does
+        peak = volume[i]
+        if volume[i - 1] > peak:
+            peak = volume[i - 1]
+        if volume[i - 2] > peak:
+            peak = volume[i - 2]
+        surge = peak / average_volume_short[i] > volume_ratio_threshold
+
+        # Three bars of directional movement on enlarged volume
+        if (c > o and close[i - 2] > open_[i - 2] and c > close[i - 2] and o > open_[i - 2]
+                and surge and c > bb_middle[i]):
+            signal = 1
+        elif (c < o and close[i - 2] < open_[i - 2] and c < close[i - 2] and o < open_[i - 2]
+                and surge and c < bb_middle[i]):
+            signal = -1
+        else:
+            signal = 0
+
+        # Candlestick gap
+        if c > o and low[i] > high[i - 1] and volume[i] / average_volume_short[i] > volume_ratio_threshold:
+            signal += 1
+        elif c < o and high[i] < low[i - 1] and volume[i] / average_volume_short[i] > volume_ratio_threshold:
+            signal -= 1
+        out[i] = signal
+    return out
+
+
+def _price_mmt_numpy(open_, high, low, close, volume, average_volume_short, bb_middle, volume_ratio_threshold):
+    if len(close) < 3:
+        return np.full(len(close), np.nan)
+    o, c, h, l, v = open_[2:], close[2:], high[2:], low[2:], volume[2:]
+    o3, c3 = open_[:-2], close[:-2]
+    avg, middle = average_volume_short[2:], bb_middle[2:]
+    peak = np.where(volume[1:-1] > v, volume[1:-1], v)
+    peak = np.where(volume[:-2] > peak, volume[:-2], peak)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        surge = peak / avg > volume_ratio_threshold
+        up = (c > o) & (c3 > o3) & (c > c3) & (o > o3) & surge & (c > middle)
+        down = (c < o) & (c3 < o3) & (c < c3) & (o < o3) & surge & (c < middle)
+        signal = np.where(up, 1.0, np.where(down, -1.0, 0.0))
+
+        gap_volume = v / avg > volume_ratio_threshold
+        gap_up = (c > o) & (l > high[1:-1]) & gap_volume
+        gap_down = (c < o) & (h < low[1:-1]) & gap_volume
+        signal += np.where(gap_up, 1.0, np.where(gap_down, -1.0, 0.0))
+    return np.concatenate(([np.nan, np.nan], signal))
+
+
+if NUMBA_AVAILABLE:
+    _kstick_kernel = numba.njit(cache=True)(_kstick_loop)
+    _price_mmt_kernel = numba.njit(cache=True)(_price_mmt_loop)
+else:
+    _kstick_kernel = _kstick_numpy
+    _price_mmt_kernel = _price_mmt_numpy
+
+
+def _float_arrays(*arrays):
+    return [np.ascontiguousarray(array, dtype=np.float64) for array in arrays]
+
+
+def kstick_series(open_, high, low, close, volume, average_volume, ema5, volume_ratio_threshold):
+    """eval_kstick for every bar; average_volume and ema5 are per-bar arrays"""
+    return _kstick_kernel(*_float_arrays(open_, high, low, close, volume, average_volume, ema5),
+                          float(volume_ratio_threshold))
+
+
+def price_mmt_series(open_, high, low, close, volume, average_volume_short, bb_middle, volume_ratio_threshold):
+    """eval_price_mmt for every bar; average_volume_short and bb_middle are per-bar arrays"""
+    return _price_mmt_kernel(*_float_arrays(open_, high, low, close, volume, average_volume_short, bb_middle),
+                             float(volume_ratio_threshold))
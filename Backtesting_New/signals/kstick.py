@@ -54,4 +54,8 @@ def eval_kstick(strategy, average_volume, ema5):
             ):  
             kstick_signal -= 1
 
-        return kstick_signal
\ No newline at end of file
+        return kstick_signal
+
+def eval_kstick_series(strategy, average_volume, ema5):
+        # eval_kstick for strategies that precompute strategy.kstick_signal in init() (signals/kernels.py)
+        return int(strategy.kstick_signal[-1])
@@ -1,7 +1,8 @@
 from backtesting import Strategy, Backtest
-import numpy as np
+import talib as ta
 import datetime as dt
 import yfinance as yf
+from signals.volume import rolling_mean, rolling_max
 
 # SIGNAL EVALUATION
 def eval_price_mmt(strategy, average_volume_short):
@@ -10,7 +11,7 @@ def eval_price_mmt(strategy, average_volume_short):
             strategy.data.Close[-3] > strategy.data.Open[-3] and
             strategy.data.Close[-1] > strategy.data.Close[-3] and
             strategy.data.Open[-1] > strategy.data.Open[-3] and
-            max(strategy.data.Volume[-1], strategy.data.Volume[-2], strategy.data.Volume[-3]) / average_volume_short > strategy.volume_ratio_threshold
+            strategy.volume_max_3[-1] / average_volume_short > strategy.volume_ratio_threshold
             and strategy.data.Close[-1] > strategy.bb_middle[-1]
             ):
             price_mmt_signal_1 = 1
@@ -18,7 +19,7 @@ def eval_price_mmt(strategy, average_volume_short):
               strategy.data.Close[-3] < strategy.data.Open[-3] and
               strategy.data.Close[-1] < strategy.data.Close[-3] and
               strategy.data.Open[-1] < strategy.data.Open[-3] and
-              max(strategy.data.Volume[-1], strategy.data.Volume[-2], strategy.data.Volume[-3]) / average_volume_short > strategy.volume_ratio_threshold
+              strategy.volume_max_3[-1] / average_volume_short > strategy.volume_ratio_threshold
               and strategy.data.Close[-1] < strategy.bb_middle[-1]
               ):
             price_mmt_signal_1 = -1
@@ -40,20 +41,30 @@ def eval_price_mmt(strategy, average_volume_short):
             price_mmt_signal_2 = 0
         
         return price_mmt_signal_1 + price_mmt_signal_2
+
+def eval_price_mmt_series(strategy, average_volume_short):
+        # eval_price_mmt for strategies that precompute strategy.price_mmt_signal in init() (signals/kernels.py)
+        return int(strategy.price_mmt_signal[-1])
     
 # STANDALONE STRATEGY
 class MMTStrat(Strategy):
+    bb_period = 20
+    bb_stdev = 2.1
     volume_avg_period = 20
     volume_avg_period_short = 10
     volume_ratio_threshold = 1.25
     volume_ratio_threshold_high = 1.75
     
     def init(self):
-        pass
+        # eval_price_mmt confirms momentum against the Bollinger middle band
+        close = self.data.Close
+        self.bb_upper, self.bb_middle, self.bb_lower = self.I(ta.BBANDS, close, self.bb_period, self.bb_stdev)
+        # Rolling volume statistics eval_price_mmt reads by index
+        self.average_volume_short = self.I(rolling_mean, self.data.Volume, self.volume_avg_period_short, name='Volume Avg Short', plot=False)
+        self.volume_max_3 = self.I(rolling_max, self.data.Volume, 3, name='Volume Max 3', plot=False)
     
     def next(self):
-        average_volume = np.mean(self.data.Volume[-self.volume_avg_period:])
-        average_volume_short = np.mean(self.data.Volume[-self.volume_avg_period_short:])
+        average_volume_short = self.average_volume_short[-1]
         price_mmt_signal = eval_price_mmt(self, average_volume_short)
         
         if price_mmt_signal > 0 and not self.position.is_long:
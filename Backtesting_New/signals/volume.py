@@ -0,0 +1,34 @@
+"""
+Rolling volume statistics for every bar, computed once in a strategy's init().
+
+Window sums are differences of one cumulative sum, so a whole series costs
+O(n) instead of an array slice and np.mean per bar. Volumes are share counts
+(whole numbers), so the sums are exact and every value equals np.mean or
+max() over the same per-bar slice. The first bars average whatever history
+exists, as the shorter slices do.
+"""
+import numpy as np
+
+
+def rolling_mean(values, window):
+    """np.mean(values[-window:]) as seen on every bar"""
+    values = np.asarray(values, dtype=np.float64)
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    ends = np.arange(1, len(values) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (cumsum[ends] - cumsum[starts]) / (ends - starts)
+
+
+def rolling_max(values, window):
+    """max(values[-1], values[-2], ...) over window bars as seen on every bar; NaN until window bars exist"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    peak = values[window - 1:].copy()
+    # Like the builtin, keep the earlier argument unless a later one is strictly larger
+    for lag in range(1, window):
+        earlier = values[window - 1 - lag:len(values) - lag]
+        peak = np.where(earlier > peak, earlier, peak)
+    out[window - 1:] = peak
+    return out
@@ -5,7 +5,9 @@ import pandas as pd
 import numpy as np
 import talib as ta
 import datetime as dt
-from signals import rsi, macd, bb, ema, adx, mmt, kstick, stoch
+from signals import rsi, macd, bb, ema, adx, mmt, kstick, stoch, kernels
+from signals.volume import rolling_mean, rolling_max
+from signal_profiler import SignalProfiler
 #from utils import math_func
 
 
@@ -70,6 +72,23 @@ class WeightedStrat(Strategy):
     volume_ratio_threshold = 1.25
     volume_ratio_threshold_high = 1.75
     
+    # Time each signal evaluator, window maintenance and order placement
+    # and print a summary after the last bar: bt.run(profile_signals=True)
+    profile_signals = False
+    
+    # Signal evaluators called from next(), in evaluation order
+    EVALUATORS = {
+        'rsi_daily': rsi.eval_rsi_daily,
+        'rsi_weekly': rsi.eval_rsi_weekly,
+        'macd_daily': macd.eval_macd_daily,
+        'macd_weekly': macd.eval_macd_weekly,
+        'bb': bb.eval_bb,
+        'ema_cross': ema.eval_ema_cross,
+        'adx': adx.eval_adx,
+        'price_mmt': mmt.eval_price_mmt_series,
+        'kstick': kstick.eval_kstick_series,
+        'stoch': stoch.eval_stoch,
+    }
 
     def init(self):
         close = self.data.Close
@@ -93,6 +112,22 @@ class WeightedStrat(Strategy):
             slowd_period=self.stoch_d_period, slowd_matype=0
             )
         
+        # Rolling volume statistics, read by index in next() and the signal evaluators
+        self.average_volume = self.I(rolling_mean, self.data.Volume, self.volume_avg_period, name='Volume Avg', plot=False)
+        self.average_volume_short = self.I(rolling_mean, self.data.Volume, self.volume_avg_period_short, name='Volume Avg Short', plot=False)
+        self.volume_mean_2 = self.I(rolling_mean, self.data.Volume, 2, name='Volume Mean 2', plot=False)
+        self.volume_max_2 = self.I(rolling_max, self.data.Volume, 2, name='Volume Max 2', plot=False)
+        
+        # Candlestick and momentum patterns for every bar at once, read by index in next()
+        self.kstick_signal = self.I(
+            kernels.kstick_series, self.data.Open, self.data.High, self.data.Low, close, self.data.Volume,
+            self.average_volume, self.ema5, self.volume_ratio_threshold, name='Kstick Pattern', plot=False
+            )
+        self.price_mmt_signal = self.I(
+            kernels.price_mmt_series, self.data.Open, self.data.High, self.data.Low, close, self.data.Volume,
+            self.average_volume_short, self.bb_middle, self.volume_ratio_threshold, name='Price Momentum Pattern', plot=False
+            )
+        
         # Calculate weekly indicators
         self.rsi_weekly = resample_apply('W-FRI', ta.RSI, close, self.rsi_daily_days)
         self.macd_weekly, self.signal_weekly, _ = resample_apply('W-FRI', ta.MACD, close, self.fast_period, self.slow_period, self.signal_period)
@@ -144,7 +179,18 @@ class WeightedStrat(Strategy):
         
         #print(len(self.data.Close))
         
+        self.evaluators = dict(self.EVALUATORS)
+        self.profiler = None
+        if self.profile_signals:
+            self.enable_profiling()
+        
     def next(self):
+        if self.profiler is not None:
+            self._profiled_next()
+        else:
+            self.evaluate_bar()
+
+    def evaluate_bar(self):
 
         price = self.data.Close[-1]
         low = self.data.Low[-1]
@@ -155,33 +201,51 @@ class WeightedStrat(Strategy):
         current_day = len(self.data.Close) - 1
 
         #print(current_day)
-        average_volume = np.mean(self.data.Volume[-self.volume_avg_period:])
-        average_volume_short = np.mean(self.data.Volume[-self.volume_avg_period_short:])
+        average_volume = self.average_volume[-1]
+        average_volume_short = self.average_volume_short[-1]
 
         # Call function to evaluate signals
-        rsi_daily_signal = rsi.eval_rsi_daily(self)
-        rsi_weekly_signal = rsi.eval_rsi_weekly(self)
-        macd_daily_signal = macd.eval_macd_daily(self)
-        macd_weekly_signal = macd.eval_macd_weekly(self)
-        bb_signal = bb.eval_bb(self, average_volume)
-        #bb_reversal_signal = self.eval_bb_reversal(price)
-        ema_cross_signal = ema.eval_ema_cross(self, price, volume, average_volume)
-        adx_signal = adx.eval_adx(self)
-        price_mmt_signal = mmt.eval_price_mmt(self, average_volume_short)
-        kstick_signal = kstick.eval_kstick(self, average_volume, self.ema5)
-        stoch_signal = stoch.eval_stoch(self)
+        evaluators = self.evaluators
+        latest = {
+            'rsi_daily': evaluators['rsi_daily'](self),
+            'rsi_weekly': evaluators['rsi_weekly'](self),
+            'macd_daily': evaluators['macd_daily'](self),
+            'macd_weekly': evaluators['macd_weekly'](self),
+            'bb': evaluators['bb'](self, average_volume),
+            #'bb_reversal': self.eval_bb_reversal(price),
+            'ema_cross': evaluators['ema_cross'](self, price, volume, average_volume),
+            'adx': evaluators['adx'](self),
+            'price_mmt': evaluators['price_mmt'](self, average_volume_short),
+            'kstick': evaluators['kstick'](self, average_volume, self.ema5),
+            'stoch': evaluators['stoch'](self),
+        }
 
+        buy_signal, sell_signal = self.update_signal_windows(latest)
+        self.place_orders(buy_signal, sell_signal, price, current_day)
+   
+        """
+        # Check for price recovery within the recovery timeframe
+        if self.sell_price is not None and self.sell_day is not None:
+            if (current_day - self.sell_day <= self.recovery_window and 
+                price > self.sell_price and 
+                not self.position.is_long
+                ):
+                self.buy()
+                self.sell_price = None
+                self.sell_day = None
+        """
+        
+        # Update self-defined values for plotting
+        for name, value in latest.items():
+            self.signal_values[name][current_day] = value
+        
+        self.signal_values['buy'][current_day] = buy_signal
+        self.signal_values['sell'][current_day] = sell_signal
+
+    def update_signal_windows(self, latest):
         # Store signals in lists
-        self.signals['rsi_daily'].append(rsi_daily_signal)
-        self.signals['rsi_weekly'].append(rsi_weekly_signal)
-        self.signals['macd_daily'].append(macd_daily_signal)
-        self.signals['macd_weekly'].append(macd_weekly_signal)
-        self.signals['bb'].append(bb_signal)
-        self.signals['ema_cross'].append(ema_cross_signal)
-        self.signals['adx'].append(adx_signal)
-        self.signals['price_mmt'].append(price_mmt_signal)
-        self.signals['kstick'].append(kstick_signal)
-        self.signals['stoch'].append(stoch_signal)
+        for name, value in latest.items():
+            self.signals[name].append(value)
 
         # Keep only the last `signal_window` signals
         if len(self.signals['rsi_daily']) > self.signal_window:
@@ -233,7 +297,10 @@ class WeightedStrat(Strategy):
             np.min(self.signals['kstick']) * self.kstick_weight +
             np.min(self.signals['stoch']) * self.stoch_weight
         )
-        
+
+        return buy_signal, sell_signal
+
+    def place_orders(self, buy_signal, sell_signal, price, current_day):
         # Execute order if total weighted signal value exceeds the threshold
         if (sell_signal <= self.sell_threshold 
             and self.position.is_long
@@ -249,33 +316,23 @@ class WeightedStrat(Strategy):
                 #size=0.5, 
                 sl=0.95*price,
             )
-   
-        """
-        # Check for price recovery within the recovery timeframe
-        if self.sell_price is not None and self.sell_day is not None:
-            if (current_day - self.sell_day <= self.recovery_window and 
-                price > self.sell_price and 
-                not self.position.is_long
-                ):
-                self.buy()
-                self.sell_price = None
-                self.sell_day = None
-        """
-        
-        # Update self-defined values for plotting
-        self.signal_values['rsi_daily'][current_day] = rsi_daily_signal
-        self.signal_values['rsi_weekly'][current_day] = rsi_weekly_signal
-        self.signal_values['macd_daily'][current_day] = macd_daily_signal
-        self.signal_values['macd_weekly'][current_day] = macd_weekly_signal
-        self.signal_values['adx'][current_day] = adx_signal
-        self.signal_values['bb'][current_day] = bb_signal
-        self.signal_values['price_mmt'][current_day] = price_mmt_signal
-        self.signal_values['ema_cross'][current_day] = ema_cross_signal
-        self.signal_values['kstick'][current_day] = kstick_signal
-        self.signal_values['stoch'][current_day] = stoch_signal
-        
-        self.signal_values['buy'][current_day] = buy_signal
-        self.signal_values['sell'][current_day] = sell_signal
+
+    def enable_profiling(self):
+        # Route the bar's sections through timers; next() stays a class method, so
+        # subclasses that override it and call super().next() are profiled too
+        self.profiler = SignalProfiler()
+        self.evaluators = {name: self.profiler.wrap(name, evaluator)
+                           for name, evaluator in self.evaluators.items()}
+        self.update_signal_windows = self.profiler.wrap('window maintenance', self.update_signal_windows)
+        self.place_orders = self.profiler.wrap('order placement', self.place_orders)
+        self._timed_bar = self.profiler.wrap('next (total)', self.evaluate_bar)
+        self._last_day = len(self.data.Close) - 1
+
+    def _profiled_next(self):
+        self._timed_bar()
+        if len(self.data.Close) - 1 == self._last_day:
+            self.profiler.report()
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,257 @@
+"""
+Walk-forward and anchored cross-validated optimization for any Strategy.
+
+    output = walk_forward(stock, WeightedStrat, n_folds=5, train_bars=750, test_bars=250,
+                          maximize='Sharpe Ratio', max_tries=200, processes=4,
+                          kstick_weight=np.arange(0, 1, 0.25), adx_weight=np.arange(0, 1, 0.25))
+    print(output._folds)           # best parameters, in-sample and out-of-sample score per fold
+    print(output)                  # stats of the stitched out-of-sample equity
+    output._equity_curve, output._trades
+
+Each fold picks parameters on its training window the way bt.optimize does
+(same maximize=, constraint= and max_tries= semantics) and then trades them
+on the following, unseen test window. Test windows tile the end of the data;
+training windows roll with them, or all start at the first bar with
+anchored=True. The out-of-sample equity of the folds is compounded into one
+curve, so the report shows what the optimization would have earned live.
+
+Folds run in parallel processes. Within a fold, indicators are cached by
+function, arguments and data window, so a grid over weights or thresholds
+computes each TA-Lib indicator once per window instead of once per
+backtest. Every window is preceded by warmup_bars of history that feed the
+indicators but are never traded; scores and stats cover the window alone.
+"""
+import itertools
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+from backtesting._stats import compute_stats
+
+from portfolio import equity_stats
+
+
+def make_folds(n_bars, n_folds, train_bars, test_bars=None, anchored=False):
+    """(train_start, test_start, test_end) bar positions for each fold
+
+    test_bars defaults to splitting everything after the first train_bars
+    evenly between the folds.
+    """
+    if test_bars is None:
+        test_bars = (n_bars - train_bars) // n_folds
+    first_test = n_bars - n_folds * test_bars
+    if test_bars < 1 or first_test < train_bars:
+        raise ValueError(f"{n_bars} bars cannot hold {n_folds} test windows of {test_bars} bars "
+                         f"after {train_bars} training bars")
+
+    folds = []
+    for fold in range(n_folds):
+        test_start = first_test + fold * test_bars
+        train_start = 0 if anchored else test_start - train_bars
+        folds.append((train_start, test_start, test_start + test_bars))
+    return folds
+
+
+def param_combos(params, constraint=None, max_tries=None, random_state=None):
+    """Grid of parameter dicts, filtered and sampled like bt.optimize's grid search"""
+    names = list(params)
+    values = [value if isinstance(value, (list, tuple, np.ndarray, range)) else [value]
+              for value in params.values()]
+    grid_size = np.prod([len(value) for value in values])
+    grid_frac = (1 if max_tries is None else
+                 max_tries if 0 < max_tries <= 1 else
+                 max_tries / grid_size)
+
+    rand = np.random.default_rng(random_state).random
+    combos = [dict(zip(names, combo)) for combo in itertools.product(*values)]
+    combos = [combo for combo in combos
+              if (constraint is None or constraint(SimpleNamespace(**combo))) and rand() <= grid_frac]
+    if not combos:
+        raise ValueError('No admissible parameter combinations to test')
+    return combos
+
+
+def _array_key(value):
+    if isinstance(value, (np.ndarray, pd.Series)):
+        array = np.asarray(value)
+        return array.dtype.str, array.shape, hash(array.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(_array_key(item) for item in value)
+    return value
+
+
+def _fold_strategy(strategy_class, trade_start, cache):
+    """Subclass that caches indicators and places no orders before trade_start"""
+
+    class FoldStrategy(strategy_class):
+        def I(self, func, *args, **kwargs):
+            # Lambdas and closures can capture per-run state, so only plain functions are cached
+            qualname = getattr(func, '__qualname__', '<lambda>')
+            if '<lambda>' in qualname or '<locals>' in qualname:
+                return super().I(func, *args, **kwargs)
+
+            def cached(*func_args, **func_kwargs):
+                key = (func.__module__, qualname, _array_key(func_args),
+                       tuple((name, _array_key(value)) for name, value in sorted(func_kwargs.items())))
+                if key not in cache:
+                    cache[key] = func(*func_args, **func_kwargs)
+                return cache[key]
+
+            cached.__name__ = func.__name__
+            return super().I(cached, *args, **kwargs)
+
+        def buy(self, **kwargs):
+            if len(self.data) > trade_start:
+                return super().buy(**kwargs)
+
+        def sell(self, **kwargs):
+            if len(self.data) > trade_start:
+                return super().sell(**kwargs)
+
+    FoldStrategy.__name__ = strategy_class.__name__
+    return FoldStrategy
+
+
+def score_stats(stats, maximize):
+    """The value to maximize, NaN for runs without trades as in bt.optimize"""
+    if stats['# Trades'] == 0:
+        return np.nan
+    return float(maximize(stats) if callable(maximize) else stats[maximize])
+
+
+def _window_stats(stats, window_data, offset):
+    """Stats of a run recomputed on its bars from offset on, leaving out the untraded warm-up"""
+    trades = stats._trades[stats._trades['EntryBar'] >= offset].copy()
+    trades['EntryBar'] -= offset
+    trades['ExitBar'] -= offset
+    equity = stats._equity_curve['Equity'].to_numpy()[offset:]
+    window_stats = compute_stats(trades=trades, equity=equity, ohlc_data=window_data, strategy_instance=None)
+    window_stats.loc['_strategy'] = stats._strategy
+    return window_stats
+
+
+def _run_fold(job):
+    """Optimize on a fold's training window, then trade the best parameters on its test window"""
+    (fold, data, strategy_class, (train_start, test_start, test_end), combos,
+     maximize, warmup_bars, backtest_kwargs) = job
+    cache = {}
+
+    def run(start, end, params):
+        window_start = max(0, start - warmup_bars)
+        strategy = _fold_strategy(strategy_class, start - window_start, cache)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            bt = Backtest(data.iloc[window_start:end], strategy, finalize_trades=True, **backtest_kwargs)
+            stats = bt.run(**params)
+        # Score [start, end) only; flat warm-up equity would dilute Sharpe and annual returns
+        return _window_stats(stats, data.iloc[start:end], start - window_start)
+
+    scores = np.array([score_stats(run(train_start, test_start, params), maximize) for params in combos])
+    best = int(np.nanargmax(scores)) if np.isfinite(scores).any() else 0
+
+    stats = run(test_start, test_end, combos[best])
+    equity = stats._equity_curve['Equity']
+    trades = stats._trades.copy()
+    trades['EntryBar'] += test_start
+    trades['ExitBar'] += test_start
+    trades.insert(0, 'Fold', fold)
+
+    row = {
+        'Fold': fold,
+        'Train Start': data.index[train_start],
+        'Test Start': data.index[test_start],
+        'Test End': data.index[test_end - 1],
+        'Combos Tried': len(combos),
+        'In-Sample Score': scores[best],
+        'Out-of-Sample Score': score_stats(stats, maximize),
+        'Out-of-Sample Return [%]': stats['Return [%]'],
+        '# Trades': stats['# Trades'],
+        **combos[best],
+    }
+    return row, equity, trades
+
+
+def walk_forward(data, strategy, n_folds=5, train_bars=750, test_bars=None, anchored=False,
+                 maximize='Sharpe Ratio', constraint=None, max_tries=None, random_state=None,
+                 warmup_bars=200, processes=1, cash=10000, commission=.002, exclusive_orders=True,
+                 **params):
+    """Walk-forward optimize strategy over params and report stitched out-of-sample stats
+
+    params are value ranges as for bt.optimize; maximize is a stats key or a
+    function of the stats Series, constraint a function of the parameters
+    (p.rsi_upper_bound > p.rsi_lower_bound). Every fold searches the same
+    sampled grid. With processes > 1 a custom maximize must be a module-level
+    function so it can be sent to the workers. Returns a Series of stats
+    with '_folds', '_equity_curve' and '_trades'.
+    """
+    folds = make_folds(len(data), n_folds, train_bars, test_bars, anchored)
+    combos = param_combos(params, constraint, max_tries, random_state)
+    backtest_kwargs = {'cash': cash, 'commission': commission, 'exclusive_orders': exclusive_orders}
+    jobs = [(fold, data, strategy, window, combos, maximize, warmup_bars, backtest_kwargs)
+            for fold, window in enumerate(folds)]
+
+    if processes > 1:
+        with ProcessPoolExecutor(min(processes, n_folds)) as pool:
+            results = list(pool.map(_run_fold, jobs))
+    else:
+        results = [_run_fold(job) for job in jobs]
+
+    # Compound each fold's out-of-sample growth onto the equity the previous folds ended with
+    equity_parts, capital = [], float(cash)
+    for _, equity, _ in results:
+        part = equity / equity.iloc[0] * capital
+        capital = part.iloc[-1]
+        equity_parts.append(part)
+    equity = pd.concat(equity_parts)
+    trades = pd.concat([trades for _, _, trades in results], ignore_index=True)
+    fold_table = pd.DataFrame([row for row, _, _ in results]).set_index('Fold')
+
+    returns = trades['ReturnPct']
+    s = pd.Series(dtype=object)
+    s.loc['Start'] = equity.index[0]
+    s.loc['End'] = equity.index[-1]
+    s.loc['Duration'] = s.End - s.Start
+    s.loc['Folds'] = n_folds
+    s.loc['Equity Final [$]'] = equity.iloc[-1]
+    s.loc['Return [%]'] = (equity.iloc[-1] - cash) / cash * 100
+    s.loc['Buy & Hold Return [%]'] = (data['Close'].iloc[-1] / data['Close'].loc[s.Start] - 1) * 100
+    s = pd.concat([s, equity_stats(equity)])
+    s.loc['# Trades'] = len(trades)
+    s.loc['Win Rate [%]'] = (returns > 0).mean() * 100 if len(returns) else np.nan
+    s.loc['Avg. Trade [%]'] = returns.mean() * 100
+    s.loc['Avg. In-Sample Score'] = fold_table['In-Sample Score'].mean()
+    s.loc['Avg. Out-of-Sample Score'] = fold_table['Out-of-Sample Score'].mean()
+    s.loc['_folds'] = fold_table
+    s.loc['_equity_curve'] = equity.to_frame('Equity')
+    s.loc['_trades'] = trades
+    return s
+
+
+if __name__ == '__main__':
+    import datetime as dt
+    import os
+    import yfinance as yf
+
+    from strategy_combined import WeightedStrat
+
+    # Get financial data from yfinance
+    ticker = 'SPY'
+    end_date = dt.datetime.now().date() - dt.timedelta(days=1)
+    stock = yf.download(ticker, start='2010-01-01', end=end_date)[['Open', 'High', 'Low', 'Close', 'Volume']]
+    stock.columns = stock.columns.droplevel(1)  # Reshape multi-index columns
+
+    output = walk_forward(
+        stock, WeightedStrat, n_folds=6, train_bars=750, test_bars=250,
+        maximize='Sharpe Ratio', max_tries=200, random_state=0, processes=os.cpu_count(),
+        rsi_daily_weight_buy=np.arange(0, 1, 0.25),
+        macd_daily_weight=np.arange(0, 1, 0.25),
+        bb_weight_buy=np.arange(0, 1, 0.25),
+        ema_cross_weight=np.arange(0, 1, 0.25),
+        adx_weight=np.arange(0, 1, 0.25),
+        kstick_weight=np.arange(0, 1, 0.25),
+    )
+    print(output._folds)
+    print(output)
@@ -0,0 +1,107 @@
+"""
+Run futu_execution.py's moving-average strategy against the OpenD simulator.
+
+    python FutuAPI/bench_execution.py
+    python FutuAPI/bench_execution.py --bars 5000 --ticks-per-bar 10 --latency-ms 2
+    python FutuAPI/bench_execution.py --record pushes.bin
+    python FutuAPI/bench_execution.py --replay pushes.bin --speed 10
+
+Synthetic 1-minute bars are streamed as ticker and K-line pushes through the
+script's own handler classes. Reports pushes per second, time spent in each
+handler type, the simulated OpenD calls the strategy made and its orders.
+--record saves the pushes the handlers receive; --replay feeds a recorded log
+(synthetic or from a live session) back through them instead, and reports
+handler latency percentiles.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import futu
+
+FUTU_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FUTU_DIR)
+sys.path.append(os.path.join(os.path.dirname(FUTU_DIR), 'Backtesting_New', 'benchmarks'))
+
+from opend_simulator import OpenDSimulator, SimMarket, DEFAULT_RATE_LIMITS
+from push_recorder import PushRecorder, MARKET_DATA_PUSHES, replay
+from synthetic import make_ohlcv
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark futu_execution.py on a simulated OpenD')
+    parser.add_argument('--bars', type=int, default=1000, help='1-minute bars to stream')
+    parser.add_argument('--ticks-per-bar', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Mean simulated OpenD latency per call')
+    parser.add_argument('--rate-limits', action='store_true',
+                        help="Enforce OpenD's per-30-second request limits")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--record', metavar='LOG', help='Record the pushes the handlers receive to a log')
+    parser.add_argument('--replay', metavar='LOG', help='Replay a recorded push log instead of synthetic bars')
+    parser.add_argument('--speed', type=float,
+                        help='Replay pace relative to the recording (1.0 = real time); default as fast as possible')
+    parser.add_argument('--verbose', action='store_true', help="Show the strategy's own output")
+    args = parser.parse_args()
+
+    sim = OpenDSimulator(SimMarket(n_symbols=0, seed=args.seed), latency_ms=args.latency_ms,
+                         rate_limits=DEFAULT_RATE_LIMITS if args.rate_limits else {})
+    with sim.patch():
+        import futu_execution as strategy
+
+    # The same wiring as futu_execution's __main__ block
+    handlers = [strategy.OnTickClass(), strategy.OnBarClass(), strategy.OnOrderClass(), strategy.OnFillClass()]
+    recorder = PushRecorder(args.record) if args.record else None
+    if recorder:
+        handlers = [recorder.wrap(handler) for handler in handlers]
+    strategy.quote_context.set_handler(handlers[0])
+    strategy.quote_context.set_handler(handlers[1])
+    strategy.trade_context.set_handler(handlers[2])
+    strategy.trade_context.set_handler(handlers[3])
+    strategy.quote_context.subscribe(code_list=[strategy.TRADING_SECURITY],
+                                     subtype_list=[futu.SubType.TICKER, futu.SubType.ORDER_BOOK,
+                                                   strategy.TRADING_PERIOD])
+
+    output = sys.stdout if args.verbose else io.StringIO()
+    if args.replay:
+        # Orders and fills come from the simulator as the strategy trades, not from the log
+        sim.market.add(strategy.TRADING_SECURITY)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            latency = replay(args.replay, simulator=sim, speed=args.speed, proto_ids=MARKET_DATA_PUSHES)
+        elapsed = time.perf_counter() - start
+        print(f"Replayed {int(latency['pushes'].sum())} handler calls from {args.replay} in {elapsed:.2f}s "
+              f"(speed {args.speed or 'max'})")
+        print(latency.to_string(float_format='{:,.3f}'.format))
+        print('\nSimulated OpenD requests')
+        print(sim.stats()[0].to_string())
+        filled = sum(order['order_status'] == futu.OrderStatus.FILLED_ALL for order in sim.orders)
+        print(f"\n{len(sim.orders)} orders, {filled} filled, cash {sim.cash:,.2f}")
+        return
+
+    bars = make_ohlcv(args.bars, seed=args.seed, start_price=300.0, freq='1min')
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        sim.play(strategy.TRADING_SECURITY, bars, ktype=strategy.TRADING_PERIOD, ticks_per_bar=args.ticks_per_bar)
+    elapsed = time.perf_counter() - start
+    if recorder:
+        recorder.close()
+        print(f"Recorded {recorder.count} pushes to {args.record}")
+
+    requests, pushes = sim.stats()
+    pushes['per_push_us'] = pushes['handler_s'] / pushes['pushes'] * 1e6
+    print(f"{args.bars} bars, {int(pushes['pushes'].sum())} pushes in {elapsed:.2f}s "
+          f"({pushes['pushes'].sum() / elapsed:,.0f} pushes/s)")
+    print('\nHandlers (K-line handler time includes the order and deal pushes it triggers)')
+    print(pushes.to_string(float_format='{:,.3f}'.format))
+    print('\nSimulated OpenD requests')
+    print(requests.to_string())
+
+    filled = sum(order['order_status'] == futu.OrderStatus.FILLED_ALL for order in sim.orders)
+    print(f"\n{len(sim.orders)} orders, {filled} filled, cash {sim.cash:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
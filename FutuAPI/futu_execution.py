@@ -11,6 +11,7 @@ TRADING_PERIOD = KLType.K_1M  # 信号 K 线周期
 TRADING_SECURITY = 'HK.00700'  # 交易标的
 FAST_MOVING_AVERAGE = 1  # 均线快线的周期
 SLOW_MOVING_AVERAGE = 3  # 均线慢线的周期
+PUSH_LOG_PATH = ''  # 推送录制文件路径，留空则不录制（见 push_recorder.py）
 
 quote_context = OpenQuoteContext(host=FUTUOPEND_ADDRESS, port=FUTUOPEND_PORT)  # 行情对象
 trade_context = OpenSecTradeContext(filter_trdmarket=TRADING_MARKET, host=FUTUOPEND_ADDRESS, port=FUTUOPEND_PORT, security_firm=SecurityFirm.FUTUSECURITIES)  # 交易对象，根据交易品种修改交易对象类型
@@ -273,11 +274,19 @@ if __name__ == '__main__':
         quote_context.close()
         trade_context.close()
     else:
-        # 设置回调
-        quote_context.set_handler(OnTickClass())
-        quote_context.set_handler(OnBarClass())
-        trade_context.set_handler(OnOrderClass())
-        trade_context.set_handler(OnFillClass())
+        # 设置回调，需要时录制所有推送以便离线回放
+        handlers = [OnTickClass(), OnBarClass(), OnOrderClass(), OnFillClass()]
+        if PUSH_LOG_PATH:
+            import atexit
+            from push_recorder import PushRecorder
+            # 每条推送立即写入，进程被终止也不会丢失已收到的推送
+            recorder = PushRecorder(PUSH_LOG_PATH, flush_every=1)
+            atexit.register(recorder.close)
+            handlers = [recorder.wrap(handler) for handler in handlers]
+        quote_context.set_handler(handlers[0])
+        quote_context.set_handler(handlers[1])
+        trade_context.set_handler(handlers[2])
+        trade_context.set_handler(handlers[3])
 
         # 订阅标的合约的 逐笔，K 线和摆盘，以便获取数据
         quote_context.subscribe(code_list=[TRADING_SECURITY], subtype_list=[SubType.TICKER, SubType.ORDER_BOOK, TRADING_PERIOD])
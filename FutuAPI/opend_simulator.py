@@ -0,0 +1,917 @@
+"""
+Local stand-in for FutuOpenD, for offline screening and execution benchmarks.
+
+    sim = OpenDSimulator(SimMarket(n_symbols=5000), latency_ms=5)
+    with sim.patch():
+        quote_ctx = OpenQuoteContext(host='127.0.0.1', port=11111)  # a SimQuoteContext
+        ret, data = quote_ctx.get_market_snapshot(['US.SIM0001'])
+
+Quote and trade contexts answer the calls our code makes with the futu SDK's
+(ret, data) conventions and the columns we read, served from deterministic
+synthetic data or recorded K-lines. Every call counts against OpenD's
+per-30-second request limits and can be given a latency. Push handlers
+receive the protobuf messages OpenD sends, so TickerHandlerBase,
+CurKlineHandlerBase and the order/deal handler subclasses run unchanged;
+pushes are delivered synchronously on the thread that caused them.
+"""
+import contextlib
+import functools
+import random
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from datetime import datetime
+
+import futu
+import numpy as np
+import pandas as pd
+from futu import (RET_OK, RET_ERROR, KLType, MarketState, OrderStatus, OrderType, RelativePosition, StockField,
+                  SubType, TrdEnv, TrdMarket, TrdSide, CustomIndicatorFilter)
+from futu.common.constant import ProtoId
+from futu.common.pb import (Qot_UpdateBasicQot_pb2, Qot_UpdateBroker_pb2, Qot_UpdateKL_pb2,
+                            Qot_UpdateOrderBook_pb2, Qot_UpdateRT_pb2, Qot_UpdateTicker_pb2, Trd_Common_pb2,
+                            Trd_UpdateOrder_pb2, Trd_UpdateOrderFill_pb2)
+from futu.quote.quote_query import CurKlinePush, TickerQuery
+from futu.common.utils import split_stock_str
+
+# Requests allowed per 30 seconds for the throttled endpoints
+DEFAULT_RATE_LIMITS = {
+    'get_market_snapshot': 60,
+    'request_history_kline': 60,
+    'get_stock_filter': 10,
+    'get_plate_stock': 10,
+    'place_order': 15,
+    'unlock_trade': 10,
+}
+RATE_WINDOW = 30
+
+# Distinct codes request_history_kline may download per 30 days
+DEFAULT_HISTORY_QUOTA = 2000
+
+# Push proto -> (response message, handler base class that receives it)
+PUSH_TYPES = {
+    ProtoId.Qot_UpdateBasicQot: (Qot_UpdateBasicQot_pb2.Response, futu.StockQuoteHandlerBase),
+    ProtoId.Qot_UpdateKL: (Qot_UpdateKL_pb2.Response, futu.CurKlineHandlerBase),
+    ProtoId.Qot_UpdateRT: (Qot_UpdateRT_pb2.Response, futu.RTDataHandlerBase),
+    ProtoId.Qot_UpdateTicker: (Qot_UpdateTicker_pb2.Response, futu.TickerHandlerBase),
+    ProtoId.Qot_UpdateOrderBook: (Qot_UpdateOrderBook_pb2.Response, futu.OrderBookHandlerBase),
+    ProtoId.Qot_UpdateBroker: (Qot_UpdateBroker_pb2.Response, futu.BrokerHandlerBase),
+    ProtoId.Trd_UpdateOrder: (Trd_UpdateOrder_pb2.Response, futu.TradeOrderHandlerBase),
+    ProtoId.Trd_UpdateOrderFill: (Trd_UpdateOrderFill_pb2.Response, futu.TradeDealHandlerBase),
+}
+TRADE_PUSHES = {ProtoId.Trd_UpdateOrder, ProtoId.Trd_UpdateOrderFill}
+
+# Code prefix -> (trading market, trading security market) in trade pushes
+TRADE_MARKETS = {
+    'HK': (Trd_Common_pb2.TrdMarket_HK, Trd_Common_pb2.TrdSecMarket_HK),
+    'US': (Trd_Common_pb2.TrdMarket_US, Trd_Common_pb2.TrdSecMarket_US),
+    'SH': (Trd_Common_pb2.TrdMarket_CN, Trd_Common_pb2.TrdSecMarket_CN_SH),
+    'SZ': (Trd_Common_pb2.TrdMarket_CN, Trd_Common_pb2.TrdSecMarket_CN_SZ),
+}
+
+KLINE_COLUMNS = ['code', 'time_key', 'open', 'close', 'high', 'low', 'volume', 'turnover',
+                 'pe_ratio', 'turnover_rate', 'change_rate', 'last_close']
+ORDER_COLUMNS = ['code', 'stock_name', 'trd_side', 'order_type', 'order_status', 'order_id', 'qty', 'price',
+                 'create_time', 'updated_time', 'dealt_qty', 'dealt_avg_price', 'last_err_msg', 'remark']
+DEAL_COLUMNS = ['code', 'stock_name', 'deal_id', 'order_id', 'qty', 'price', 'trd_side', 'create_time']
+
+
+def _market(code):
+    return code.split('.', 1)[0]
+
+
+def _name(code):
+    return f"{code.split('.', 1)[1]} Sim"
+
+
+def _lot_size(code):
+    return 1 if _market(code) == 'US' else 100
+
+
+def _rsi(close, period):
+    """Wilder RSI of the last bar"""
+    delta = np.diff(close[-(period * 5):])
+    gain = pd.Series(np.clip(delta, 0, None)).ewm(alpha=1 / period, adjust=False).mean().iloc[-1]
+    loss = pd.Series(np.clip(-delta, 0, None)).ewm(alpha=1 / period, adjust=False).mean().iloc[-1]
+    return 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+
+def _hk_tick(price):
+    """HKEX spread table, abridged"""
+    for bound, tick in ((0.25, 0.001), (0.5, 0.005), (10, 0.01), (20, 0.02), (100, 0.05),
+                        (200, 0.1), (500, 0.2), (1000, 0.5)):
+        if price < bound:
+            return tick
+    return 1.0
+
+
+class SimMarket:
+    """Deterministic per-symbol bars, quotes and financials
+
+    Each market gets n_symbols synthetic codes whose daily bars follow
+    geometric Brownian motion up to end. Codes in history (code -> Futu
+    K-line frame, e.g. from BarStore.read_kline) are served from those bars
+    instead; their financials are still synthetic.
+    """
+
+    def __init__(self, n_symbols=500, markets=('US', 'HK', 'SH'), n_bars=300, seed=42, history=None, end=None):
+        self.n_bars = n_bars
+        self.seed = seed
+        self.end = pd.Timestamp(end or datetime.now()).normalize()
+        self.history = dict(history or {})
+        self.codes = {market: [self._make_code(market, i) for i in range(n_symbols)] for market in markets}
+        for code in self.history:
+            if code not in self.codes.setdefault(_market(code), []):
+                self.codes[_market(code)].append(code)
+
+        self._dates = pd.bdate_range(end=self.end, periods=n_bars).strftime('%Y-%m-%d %H:%M:%S')
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_code(market, i):
+        if market == 'HK':
+            return f"HK.{i + 1:05d}"
+        if market == 'SH':
+            return f"SH.{600000 + i}"
+        if market == 'SZ':
+            return f"SZ.{i + 1:06d}"
+        return f"{market}.SIM{i:04d}"
+
+    def all_codes(self):
+        return [code for codes in self.codes.values() for code in codes]
+
+    def has(self, code):
+        return code in self.history or code in self.codes.get(_market(code), ())
+
+    def add(self, code):
+        """Make a code known, e.g. the instrument an execution script trades"""
+        if not self.has(code):
+            self.codes.setdefault(_market(code), []).append(code)
+
+    def build_all(self):
+        """Build every profile now, so the first requests are not charged for it"""
+        for code in self.all_codes():
+            self.profile(code)
+
+    def profile(self, code):
+        """Bars, financials and filterable fields for one code, built once"""
+        profile = self._profiles.get(code)
+        if profile is None:
+            profile = self._build_profile(code)
+            with self._lock:
+                profile = self._profiles.setdefault(code, profile)
+        return profile
+
+    def _build_profile(self, code):
+        rng = np.random.default_rng([self.seed, zlib.crc32(code.encode())])
+        shares = float(rng.lognormal(19.5, 1.2))
+        bars = self._recorded_bars(code) if code in self.history else self._synthetic_bars(code, rng, shares)
+        price = float(bars['close'].iloc[-1])
+
+        # Annual statements, newest first, consistent with the price level
+        revenue = price * shares / rng.lognormal(0.5, 0.8)
+        margin = rng.normal(0.08, 0.12)
+        assets = revenue * rng.lognormal(0.3, 0.5)
+        debt_ratio = rng.uniform(0.1, 0.8)
+        revenue_growth = rng.normal(0.08, 0.15)
+        rows = []
+        for year in range(3):
+            year_revenue = revenue / (1 + revenue_growth) ** year
+            equity = assets * (1 - debt_ratio)
+            rows.append({
+                'period': str(self.end.year - 1 - year),
+                'total_revenue': year_revenue,
+                'net_income': year_revenue * margin,
+                'total_assets': assets,
+                'total_equity': equity,
+                'total_debt': assets * debt_ratio * 0.6,
+                'eps_basic': year_revenue * margin / shares,
+                'book_value_per_share': equity / shares,
+            })
+        financials = pd.DataFrame(rows)
+        latest = rows[0]
+
+        close = bars['close'].to_numpy()
+        fields = {
+            StockField.CUR_PRICE: price,
+            StockField.MARKET_VAL: price * shares,
+            StockField.VOLUME: float(bars['volume'].iloc[-1]),
+            StockField.TURNOVER: float(bars['turnover'].iloc[-1]),
+            StockField.CHANGE_RATE: float(bars['change_rate'].iloc[-1]),
+            StockField.PE_TTM: price / latest['eps_basic'],
+            StockField.PB_RATE: price / latest['book_value_per_share'],
+            StockField.PS_TTM: price * shares / latest['total_revenue'],
+            StockField.RETURN_ON_EQUITY_RATE: latest['net_income'] / latest['total_equity'] * 100,
+            StockField.ROA_TTM: latest['net_income'] / latest['total_assets'] * 100,
+            StockField.NET_PROFIT_RATE: margin * 100,
+            StockField.DEBT_ASSET_RATE: debt_ratio * 60,
+            StockField.SUM_OF_BUSINESS_GROWTH: revenue_growth * 100,
+            StockField.NET_PROFIX_GROWTH: revenue_growth * 100,
+            StockField.PRICE: price,
+        }
+        for period in (5, 10, 20, 60):
+            fields[getattr(StockField, f"MA{period}")] = float(close[-period:].mean())
+
+        return {
+            'name': _name(code),
+            'lot_size': _lot_size(code),
+            'shares': shares,
+            'bars': bars,
+            'financials': financials,
+            'fields': fields,
+        }
+
+    def _synthetic_bars(self, code, rng, shares):
+        n = self.n_bars
+        dt = 1 / 252
+        sigma = rng.uniform(0.15, 0.6)
+        mu = rng.normal(0.06, 0.1)
+        start_price = rng.lognormal(3.3, 1.0)
+
+        shocks = rng.standard_normal(n)
+        returns = (mu - sigma ** 2 / 2) * dt + sigma * np.sqrt(dt) * shocks
+        close = start_price * np.exp(np.cumsum(returns))
+        prev_close = np.concatenate(([start_price], close[:-1]))
+        open_ = prev_close * np.exp(sigma * np.sqrt(dt) * 0.3 * rng.standard_normal(n))
+        wick = sigma * np.sqrt(dt) * 0.5
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.standard_normal(n)) * wick)
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.standard_normal(n)) * wick)
+        volume = np.round(rng.lognormal(13, 0.8, n) * (1 + np.abs(shocks))).astype(np.int64)
+
+        return pd.DataFrame({
+            'code': code,
+            'time_key': self._dates,
+            'open': open_.round(3),
+            'close': close.round(3),
+            'high': high.round(3),
+            'low': low.round(3),
+            'volume': volume,
+            'turnover': (volume * close).round(2),
+            'pe_ratio': 0.0,
+            'turnover_rate': (volume / shares * 100).round(4),
+            'change_rate': ((close / prev_close - 1) * 100).round(4),
+            'last_close': prev_close.round(3),
+        })
+
+    def _recorded_bars(self, code):
+        bars = self.history[code].copy()
+        bars['code'] = code
+        bars['time_key'] = pd.to_datetime(bars['time_key']).dt.strftime('%Y-%m-%d %H:%M:%S')
+        bars = bars.sort_values('time_key').reset_index(drop=True)
+        if 'turnover' not in bars:
+            bars['turnover'] = bars['volume'] * bars['close']
+        bars['last_close'] = bars['close'].shift().fillna(bars['open'])
+        bars['change_rate'] = (bars['close'] / bars['last_close'] - 1) * 100
+        for column in ('pe_ratio', 'turnover_rate'):
+            if column not in bars:
+                bars[column] = 0.0
+        return bars[KLINE_COLUMNS]
+
+
+class FilterItem:
+    """One get_stock_filter result; item[stock_filter] is that filter's value"""
+
+    def __init__(self, stock_code, stock_name, values):
+        self.stock_code = stock_code
+        self.stock_name = stock_name
+        self._values = values
+
+    def __getitem__(self, stock_filter):
+        return self._values[id(stock_filter)]
+
+
+class OpenDSimulator:
+    """Shared state behind every simulated context: data, limits, account and push routing"""
+
+    def __init__(self, market=None, latency_ms=0.0, jitter_ms=0.0, rate_limits=DEFAULT_RATE_LIMITS,
+                 history_quota=DEFAULT_HISTORY_QUOTA, market_state=MarketState.AFTERNOON, cash=1_000_000.0,
+                 seed=42):
+        self.market = market or SimMarket(seed=seed)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limits = dict(rate_limits or {})
+        self.history_quota = history_quota
+        self.market_state = market_state
+
+        self.calls = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self.push_seconds = defaultdict(float)
+        self.push_counts = defaultdict(int)
+        self._windows = defaultdict(deque)
+        self._history_codes = set()
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+
+        # Live state built up by play() and the trade contexts
+        self.quote_contexts = []
+        self.trade_contexts = []
+        self.streams = defaultdict(list)
+        self.last_prices = {}
+        self.clock = None
+        self.cash = cash
+        self.positions = {}
+        self.orders = []
+        self.deals = []
+
+    # ---- request accounting -------------------------------------------------
+
+    def enter(self, endpoint):
+        """Count a request and apply its rate limit and latency; returns an error message when throttled"""
+        with self._lock:
+            self.calls[endpoint] += 1
+            limit = self.rate_limits.get(endpoint)
+            if limit:
+                window = self._windows[endpoint]
+                now = time.monotonic()
+                while window and now - window[0] >= RATE_WINDOW:
+                    window.popleft()
+                if len(window) >= limit:
+                    self.throttled[endpoint] += 1
+                    return f"Request too frequent: at most {limit} {endpoint} calls per {RATE_WINDOW} seconds"
+                window.append(now)
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000 \
+                if self.latency_ms or self.jitter_ms else 0.0
+
+        if delay:
+            time.sleep(delay)
+        return None
+
+    def stats(self):
+        """Calls and throttled calls per endpoint, plus handler time per push type"""
+        requests = pd.DataFrame({'calls': pd.Series(self.calls, dtype=int),
+                                 'throttled': pd.Series(self.throttled, dtype=int)}).fillna(0).astype(int)
+        pushes = pd.DataFrame({'pushes': pd.Series(self.push_counts, dtype=int),
+                               'handler_s': pd.Series(self.push_seconds, dtype=float)})
+        return requests.sort_values('calls', ascending=False), pushes
+
+    def now(self):
+        """Stream time while play() runs, otherwise the wall clock"""
+        return self.clock or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # ---- contexts -------------------------------------------------------------
+
+    def quote_context(self, *args, **kwargs):
+        return SimQuoteContext(self, *args, **kwargs)
+
+    def trade_context(self, *args, **kwargs):
+        return SimTradeContext(self, *args, **kwargs)
+
+    @contextlib.contextmanager
+    def patch(self):
+        """Make futu.OpenQuoteContext and OpenSecTradeContext open simulated contexts
+
+        Modules that do `from futu import *` must be imported inside the block.
+        """
+        replacements = {
+            'OpenQuoteContext': functools.partial(SimQuoteContext, self),
+            'OpenSecTradeContext': functools.partial(SimTradeContext, self),
+        }
+        saved = {name: getattr(futu, name) for name in replacements}
+        for name, replacement in replacements.items():
+            setattr(futu, name, replacement)
+        try:
+            yield self
+        finally:
+            for name, original in saved.items():
+                setattr(futu, name, original)
+
+    # ---- pushes -------------------------------------------------------------------
+
+    def dispatch(self, proto_id, rsp_pb, code=None, subtype=None):
+        """Hand a push message to every matching handler; quote pushes only reach subscribers"""
+        handler_base = PUSH_TYPES[proto_id][1]
+        contexts = self.trade_contexts if proto_id in TRADE_PUSHES \
+            else [ctx for ctx in self.quote_contexts if code is None or (code, subtype) in ctx.subscriptions]
+
+        for ctx in contexts:
+            for handler in ctx.handlers:
+                if isinstance(handler, handler_base):
+                    start = time.perf_counter()
+                    handler.on_recv_rsp(rsp_pb)
+                    with self._lock:
+                        self.push_seconds[handler_base.__name__] += time.perf_counter() - start
+                        self.push_counts[handler_base.__name__] += 1
+
+    def play(self, code, bars, ktype=KLType.K_1M, ticks_per_bar=4):
+        """Stream OHLCV bars (Open/High/Low/Close/Volume, datetime index) as OpenD pushes
+
+        Each bar becomes ticks_per_bar ticker pushes along open, high, low,
+        close, each followed by a K-line push of the bar so far.
+        """
+        self.market.add(code)
+        name = self.market.profile(code)['name']
+        stream = self.streams[(code, ktype)]
+        sequence = 0
+        last_close = float(bars['Close'].iloc[0])
+        path_points = np.linspace(0, 3, ticks_per_bar) if ticks_per_bar > 1 else np.array([3.0])
+
+        for timestamp, bar in zip(bars.index, bars[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy()):
+            open_, high, low, close, volume = (float(value) for value in bar)
+            time_key = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+            self.clock = time_key
+            prices = np.interp(path_points, [0, 1, 2, 3], [open_, high, low, close])
+            tick_volume = max(int(volume // len(prices)), 1)
+
+            kline = {'code': code, 'time_key': time_key, 'open': open_, 'close': open_, 'high': open_,
+                     'low': open_, 'volume': 0, 'turnover': 0.0, 'pe_ratio': 0.0, 'turnover_rate': 0.0,
+                     'change_rate': 0.0, 'last_close': last_close}
+            stream.append(kline)
+            for price in prices:
+                sequence += 1
+                price = round(float(price), 3)
+                self.last_prices[code] = price
+                kline.update(close=price, high=max(kline['high'], price), low=min(kline['low'], price),
+                             volume=kline['volume'] + tick_volume,
+                             turnover=kline['turnover'] + tick_volume * price,
+                             change_rate=(price / last_close - 1) * 100)
+                self.dispatch(ProtoId.Qot_UpdateTicker,
+                              ticker_push(code, name, time_key, price, tick_volume, sequence),
+                              code, SubType.TICKER)
+                self.dispatch(ProtoId.Qot_UpdateKL, kline_push(code, name, kline, ktype), code, ktype)
+            last_close = close
+
+        self.clock = None
+
+    def apply_push(self, proto_id, rsp_pb):
+        """Update streamed bars, last prices and the clock from a recorded market data push"""
+        if proto_id == ProtoId.Qot_UpdateKL:
+            ret, _, klines = CurKlinePush.unpack_rsp(rsp_pb)
+            for kline in klines if ret == RET_OK else []:
+                code = kline['code']
+                self.market.add(code)
+                row = {column: kline.get(column, 0.0) for column in KLINE_COLUMNS}
+                if kline['last_close']:
+                    row['change_rate'] = (kline['close'] / kline['last_close'] - 1) * 100
+                stream = self.streams[(code, kline['k_type'])]
+                if stream and stream[-1]['time_key'] == row['time_key']:
+                    stream[-1] = row
+                else:
+                    stream.append(row)
+                self.last_prices[code] = kline['close']
+                self.clock = kline['time_key']
+        elif proto_id == ProtoId.Qot_UpdateTicker:
+            ret, _, ticks = TickerQuery.unpack_rsp(rsp_pb)
+            for tick in ticks if ret == RET_OK else []:
+                self.market.add(tick['code'])
+                self.last_prices[tick['code']] = tick['price']
+                self.clock = tick['time'][:19]
+
+    # ---- account --------------------------------------------------------------------
+
+    def place_order(self, price, qty, code, trd_side, order_type, trd_env, remark):
+        """Accept an order and fill it in full at its price (the last price for market orders)"""
+        with self._lock:
+            if qty <= 0:
+                return RET_ERROR, 'Order quantity must be positive'
+            fill_price = price if order_type != OrderType.MARKET else self.last_prices.get(code, price)
+            position = self.positions.get(code, {'qty': 0, 'cost': 0.0})
+            if trd_side == TrdSide.BUY and fill_price * qty > self.cash:
+                return RET_ERROR, 'Insufficient buying power'
+            if trd_side == TrdSide.SELL and qty > position['qty']:
+                return RET_ERROR, 'Insufficient position to sell'
+
+            now = self.now()
+            order = {'code': code, 'stock_name': code, 'trd_side': trd_side, 'order_type': order_type,
+                     'order_status': OrderStatus.SUBMITTED, 'order_id': str(len(self.orders) + 1),
+                     'qty': qty, 'price': price, 'create_time': now, 'updated_time': now,
+                     'dealt_qty': 0, 'dealt_avg_price': 0.0, 'last_err_msg': '', 'remark': remark or ''}
+            self.orders.append(order)
+        self.dispatch(ProtoId.Trd_UpdateOrder, order_push(order, trd_env))
+
+        with self._lock:
+            if trd_side == TrdSide.BUY:
+                self.cash -= fill_price * qty
+                cost = position['cost'] * position['qty'] + fill_price * qty
+                position = {'qty': position['qty'] + qty, 'cost': cost / (position['qty'] + qty)}
+            else:
+                self.cash += fill_price * qty
+                position = {'qty': position['qty'] - qty, 'cost': position['cost']}
+            self.positions[code] = position
+
+            order.update(order_status=OrderStatus.FILLED_ALL, dealt_qty=qty, dealt_avg_price=fill_price)
+            deal = {'code': code, 'stock_name': code, 'deal_id': str(len(self.deals) + 1),
+                    'order_id': order['order_id'], 'qty': qty, 'price': fill_price, 'trd_side': trd_side,
+                    'create_time': self.now()}
+            self.deals.append(deal)
+        self.dispatch(ProtoId.Trd_UpdateOrder, order_push(order, trd_env))
+        self.dispatch(ProtoId.Trd_UpdateOrderFill, deal_push(deal, trd_env))
+
+        return RET_OK, pd.DataFrame([order], columns=ORDER_COLUMNS)
+
+
+class _SimContext:
+    """Handler registration and lifecycle shared by quote and trade contexts"""
+
+    def __init__(self, simulator):
+        self.sim = simulator
+        self.handlers = []
+
+    def set_handler(self, handler):
+        self.handlers.append(handler)
+        return RET_OK
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        contexts = self.sim.quote_contexts if isinstance(self, SimQuoteContext) else self.sim.trade_contexts
+        if self in contexts:
+            contexts.remove(self)
+
+
+class SimQuoteContext(_SimContext):
+    """Drop-in for OpenQuoteContext"""
+
+    def __init__(self, simulator, host='127.0.0.1', port=11111, is_encrypt=None, is_async_connect=False, **kwargs):
+        super().__init__(simulator)
+        self.subscriptions = set()
+        simulator.quote_contexts.append(self)
+
+    def _missing(self, code_list):
+        missing = [code for code in code_list if not self.sim.market.has(code)]
+        return f"Unknown stock {', '.join(missing)}" if missing else None
+
+    def subscribe(self, code_list, subtype_list, is_first_push=True, subscribe_push=True, **kwargs):
+        error = self.sim.enter('subscribe')
+        if error:
+            return RET_ERROR, error
+        self.subscriptions.update((code, subtype) for code in code_list for subtype in subtype_list)
+        return RET_OK, None
+
+    def unsubscribe(self, code_list, subtype_list, unsubscribe_all=False):
+        self.subscriptions.difference_update((code, subtype) for code in code_list for subtype in subtype_list)
+        return RET_OK, None
+
+    def get_market_state(self, code_list):
+        error = self.sim.enter('get_market_state')
+        if error:
+            return RET_ERROR, error
+        return RET_OK, pd.DataFrame({'code': code_list, 'stock_name': code_list,
+                                     'market_state': self.sim.market_state})
+
+    def get_plate_stock(self, plate_code, sort_field='CODE', ascend=True):
+        """Codes of the plate's market; FutuClient passes Plate.ALL with the market second"""
+        error = self.sim.enter('get_plate_stock')
+        if error:
+            return RET_ERROR, error
+        market = _market(plate_code) if '.' in plate_code else sort_field
+        codes = self.sim.market.codes.get(market, self.sim.market.all_codes())
+        return RET_OK, pd.DataFrame({
+            'code': codes,
+            'lot_size': [_lot_size(code) for code in codes],
+            'stock_name': [_name(code) for code in codes],
+            'stock_type': 'STOCK',
+        })
+
+    def get_stock_basicinfo(self, market, stock_type='STOCK', code_list=None):
+        error = self.sim.enter('get_stock_basicinfo')
+        if error:
+            return RET_ERROR, error
+        codes = code_list or self.sim.market.codes.get(market, [])
+        codes = [code for code in codes if self.sim.market.has(code)]
+        rows = []
+        for code in codes:
+            profile = self.sim.market.profile(code)
+            rows.append({'code': code, 'name': profile['name'], 'lot_size': profile['lot_size'],
+                         'stock_type': stock_type, 'main_contract': False,
+                         'market_val': profile['fields'][StockField.MARKET_VAL]})
+        return RET_OK, pd.DataFrame(rows, columns=['code', 'name', 'lot_size', 'stock_type', 'main_contract',
+                                                   'market_val'])
+
+    def get_market_snapshot(self, code_list):
+        error = self.sim.enter('get_market_snapshot') or self._missing(code_list)
+        if error:
+            return RET_ERROR, error
+        if len(code_list) > 400:
+            return RET_ERROR, 'At most 400 codes per snapshot request'
+
+        rows = []
+        for code in code_list:
+            profile = self.sim.market.profile(code)
+            bar = profile['bars'].iloc[-1]
+            price = self.sim.last_prices.get(code, float(bar['close']))
+            rows.append({
+                'code': code, 'name': profile['name'], 'update_time': self.sim.now(),
+                'last_price': price, 'open_price': float(bar['open']), 'high_price': float(bar['high']),
+                'low_price': float(bar['low']), 'prev_close_price': float(bar['last_close']),
+                'change_rate': (price / float(bar['last_close']) - 1) * 100,
+                'volume': int(bar['volume']), 'turnover': float(bar['turnover']),
+                'lot_size': profile['lot_size'], 'total_market_val': price * profile['shares'],
+                'pe_ttm_ratio': profile['fields'][StockField.PE_TTM],
+                'pb_ratio': profile['fields'][StockField.PB_RATE],
+            })
+        return RET_OK, pd.DataFrame(rows)
+
+    def _kline(self, code, ktype):
+        """Streamed bars for the K-line type, else daily (or weekly) history"""
+        if (code, ktype) in self.sim.streams:
+            return pd.DataFrame(self.sim.streams[(code, ktype)], columns=KLINE_COLUMNS)
+        bars = self.sim.market.profile(code)['bars']
+        if ktype == KLType.K_DAY:
+            return bars
+        if ktype == KLType.K_WEEK:
+            daily = bars.set_index(pd.to_datetime(bars['time_key']))
+            weekly = daily.resample('W-FRI').agg({'open': 'first', 'close': 'last', 'high': 'max', 'low': 'min',
+                                                  'volume': 'sum', 'turnover': 'sum'}).dropna()
+            weekly['code'] = code
+            weekly['time_key'] = weekly.index.strftime('%Y-%m-%d %H:%M:%S')
+            weekly['last_close'] = weekly['close'].shift().fillna(weekly['open'])
+            weekly['change_rate'] = (weekly['close'] / weekly['last_close'] - 1) * 100
+            weekly['pe_ratio'] = weekly['turnover_rate'] = 0.0
+            return weekly[KLINE_COLUMNS].reset_index(drop=True)
+        return None
+
+    def _history(self, code, start, end, ktype):
+        bars = self._kline(code, ktype)
+        if bars is None:
+            return None
+        if start:
+            bars = bars[bars['time_key'] >= str(start)]
+        if end:
+            bars = bars[bars['time_key'] <= f"{end} 23:59:59"]
+        return bars.reset_index(drop=True)
+
+    def get_history_kline(self, code, start=None, end=None, ktype=KLType.K_DAY, autype='qfq', count=None, **kwargs):
+        error = self.sim.enter('get_history_kline') or self._missing([code])
+        if error:
+            return RET_ERROR, error
+        bars = self._history(code, start, end, ktype)
+        if bars is None:
+            return RET_ERROR, f"K-line type {ktype} is not simulated"
+        return RET_OK, bars.tail(count).reset_index(drop=True) if count else bars
+
+    def request_history_kline(self, code, start=None, end=None, ktype=KLType.K_DAY, autype='qfq', fields=None,
+                              max_count=1000, page_req_key=None, extended_time=False, **kwargs):
+        error = self.sim.enter('request_history_kline') or self._missing([code])
+        if error:
+            return RET_ERROR, error, None
+        with self.sim._lock:
+            if code not in self.sim._history_codes:
+                if len(self.sim._history_codes) >= self.sim.history_quota:
+                    return RET_ERROR, 'Historical K-line quota exhausted', None
+                self.sim._history_codes.add(code)
+
+        bars = self._history(code, start, end, ktype)
+        if bars is None:
+            return RET_ERROR, f"K-line type {ktype} is not simulated", None
+        offset = int(page_req_key.decode()) if page_req_key else 0
+        page = bars.iloc[offset:offset + max_count].reset_index(drop=True)
+        next_key = str(offset + max_count).encode() if offset + max_count < len(bars) else None
+        return RET_OK, page, next_key
+
+    def get_history_kl_quota(self, get_detail=False):
+        used = len(self.sim._history_codes)
+        detail = [{'code': code} for code in sorted(self.sim._history_codes)] if get_detail else []
+        return RET_OK, (used, self.sim.history_quota - used, detail)
+
+    def get_financial(self, code, quarter=None):
+        """Annual statements, newest first; not an SDK call, but FutuClient makes it"""
+        error = self.sim.enter('get_financial') or self._missing([code])
+        if error:
+            return RET_ERROR, error
+        return RET_OK, self.sim.market.profile(code)['financials'].copy()
+
+    def get_cur_kline(self, code, num, ktype=KLType.K_DAY, autype='qfq'):
+        error = self.sim.enter('get_cur_kline')
+        if error:
+            return RET_ERROR, error
+        if (code, ktype) not in self.subscriptions:
+            return RET_ERROR, f"Subscribe to {code} {ktype} first"
+        bars = self._kline(code, ktype)
+        if bars is None:
+            return RET_ERROR, f"K-line type {ktype} is not simulated"
+        return RET_OK, bars.tail(num).reset_index(drop=True)
+
+    def get_order_book(self, code, num=10, order_book_type=None):
+        """Levels one tick apart around the last price"""
+        error = self.sim.enter('get_order_book') or self._missing([code])
+        if error:
+            return RET_ERROR, error
+        profile = self.sim.market.profile(code)
+        price = self.sim.last_prices.get(code, float(profile['bars']['close'].iloc[-1]))
+        tick = _hk_tick(price) if _market(code) == 'HK' else 0.01
+        bid = np.floor(price / tick) * tick
+        levels = range(min(num, 10))
+        return RET_OK, {
+            'code': code,
+            'name': profile['name'],
+            'svr_recv_time_bid': self.sim.now(),
+            'svr_recv_time_ask': self.sim.now(),
+            'Bid': [(round(bid - i * tick, 3), profile['lot_size'] * (10 + i), 1 + i, {}) for i in levels],
+            'Ask': [(round(bid + (i + 1) * tick, 3), profile['lot_size'] * (10 + i), 1 + i, {}) for i in levels],
+        }
+
+    def get_stock_filter(self, market, filter_list=None, plate_code=None, begin=0, num=200):
+        """Evaluate Simple, Financial and CustomIndicator filters against the simulated fields"""
+        error = self.sim.enter('get_stock_filter')
+        if error:
+            return RET_ERROR, error
+        filter_list = filter_list or []
+
+        matches = []
+        for code in self.sim.market.codes.get(market, []):
+            profile = self.sim.market.profile(code)
+            values = {}
+            for stock_filter in filter_list:
+                try:
+                    value, keep = self._evaluate(profile, stock_filter)
+                except KeyError as e:
+                    return RET_ERROR, f"Filter {e} is not simulated"
+                if not keep:
+                    break
+                values[id(stock_filter)] = value
+            else:
+                matches.append(FilterItem(code, profile['name'], values))
+
+        page = matches[begin:begin + num]
+        return RET_OK, (begin + num >= len(matches), len(matches), page)
+
+    @staticmethod
+    def _indicator(profile, field, para):
+        if field == StockField.RSI:
+            return _rsi(profile['bars']['close'].to_numpy(), int(para[0]) if para else 12)
+        return profile['fields'][field]
+
+    def _evaluate(self, profile, stock_filter):
+        """(value, passes) for one filter"""
+        if isinstance(stock_filter, CustomIndicatorFilter):
+            left = self._indicator(profile, stock_filter.stock_field1, stock_filter.stock_field1_para)
+            right = stock_filter.stock_field2_para[0] if stock_filter.stock_field2 == StockField.VALUE \
+                else self._indicator(profile, stock_filter.stock_field2, stock_filter.stock_field2_para)
+            if stock_filter.relative_position == RelativePosition.MORE:
+                return left, stock_filter.is_no_filter or left > right
+            if stock_filter.relative_position == RelativePosition.LESS:
+                return left, stock_filter.is_no_filter or left < right
+            raise KeyError(stock_filter.relative_position)
+
+        value = profile['fields'][stock_filter.stock_field]
+        keep = stock_filter.is_no_filter or (
+            (stock_filter.filter_min is None or value >= stock_filter.filter_min)
+            and (stock_filter.filter_max is None or value <= stock_filter.filter_max))
+        return value, keep
+
+
+class SimTradeContext(_SimContext):
+    """Drop-in for OpenSecTradeContext backed by one simulated cash account"""
+
+    def __init__(self, simulator, filter_trdmarket=TrdMarket.HK, host='127.0.0.1', port=11111, is_encrypt=None,
+                 security_firm=None, **kwargs):
+        super().__init__(simulator)
+        self.filter_trdmarket = filter_trdmarket
+        simulator.trade_contexts.append(self)
+
+    def unlock_trade(self, password=None, password_md5=None, is_unlock=True):
+        error = self.sim.enter('unlock_trade')
+        return (RET_ERROR, error) if error else (RET_OK, None)
+
+    def place_order(self, price, qty, code, trd_side, order_type=OrderType.NORMAL, adjust_limit=0,
+                    trd_env=TrdEnv.REAL, acc_id=0, acc_index=0, remark=None, **kwargs):
+        error = self.sim.enter('place_order')
+        if error:
+            return RET_ERROR, error
+        return self.sim.place_order(price, qty, code, trd_side, order_type, trd_env, remark)
+
+    def position_list_query(self, code='', trd_env=TrdEnv.REAL, **kwargs):
+        error = self.sim.enter('position_list_query')
+        if error:
+            return RET_ERROR, error
+        rows = []
+        for position_code, position in self.sim.positions.items():
+            if position['qty'] == 0 or (code and position_code != code):
+                continue
+            price = self.sim.last_prices.get(position_code, position['cost'])
+            rows.append({'code': position_code, 'stock_name': position_code, 'qty': position['qty'],
+                         'can_sell_qty': position['qty'], 'cost_price': position['cost'], 'nominal_price': price,
+                         'market_val': price * position['qty'],
+                         'pl_val': (price - position['cost']) * position['qty']})
+        return RET_OK, pd.DataFrame(rows, columns=['code', 'stock_name', 'qty', 'can_sell_qty', 'cost_price',
+                                                   'nominal_price', 'market_val', 'pl_val'])
+
+    def acctradinginfo_query(self, order_type, code, price, order_id=None, adjust_limit=0, trd_env=TrdEnv.REAL,
+                             **kwargs):
+        error = self.sim.enter('acctradinginfo_query')
+        if error:
+            return RET_ERROR, error
+        lot_size = self.sim.market.profile(code)['lot_size'] if self.sim.market.has(code) else 1
+        max_buy = int(self.sim.cash // (price * lot_size)) * lot_size if price > 0 else 0
+        held = self.sim.positions.get(code, {'qty': 0})['qty']
+        return RET_OK, pd.DataFrame([{'max_cash_buy': max_buy, 'max_cash_and_margin_buy': max_buy,
+                                      'max_position_sell': held, 'max_sell_short': 0, 'max_buy_back': 0}])
+
+    def accinfo_query(self, trd_env=TrdEnv.REAL, **kwargs):
+        error = self.sim.enter('accinfo_query')
+        if error:
+            return RET_ERROR, error
+        market_val = sum(self.sim.last_prices.get(code, p['cost']) * p['qty'] for code, p in self.sim.positions.items())
+        return RET_OK, pd.DataFrame([{'power': self.sim.cash, 'total_assets': self.sim.cash + market_val,
+                                      'cash': self.sim.cash, 'market_val': market_val}])
+
+    def order_list_query(self, order_id='', status_filter_list=[], code='', **kwargs):
+        orders = [order for order in self.sim.orders
+                  if (not order_id or order['order_id'] == order_id) and (not code or order['code'] == code)
+                  and (not status_filter_list or order['order_status'] in status_filter_list)]
+        return RET_OK, pd.DataFrame(orders, columns=ORDER_COLUMNS)
+
+    def deal_list_query(self, code='', **kwargs):
+        deals = [deal for deal in self.sim.deals if not code or deal['code'] == code]
+        return RET_OK, pd.DataFrame(deals, columns=DEAL_COLUMNS)
+
+
+def _security(pb_security, code):
+    _, (market, partial_code) = split_stock_str(code)
+    pb_security.market = market
+    pb_security.code = partial_code
+
+
+def kline_push(code, name, kline, ktype):
+    """Qot_UpdateKL message for one bar"""
+    rsp = Qot_UpdateKL_pb2.Response()
+    rsp.retType = RET_OK
+    rsp.s2c.rehabType = 1
+    rsp.s2c.klType = KLType.to_number(ktype)[1]
+    _security(rsp.s2c.security, code)
+    rsp.s2c.name = name
+    record = rsp.s2c.klList.add()
+    record.time = kline['time_key']
+    record.isBlank = False
+    record.openPrice = kline['open']
+    record.highPrice = kline['high']
+    record.lowPrice = kline['low']
+    record.closePrice = kline['close']
+    record.lastClosePrice = kline['last_close']
+    record.volume = int(kline['volume'])
+    record.turnover = kline['turnover']
+    return rsp
+
+
+def ticker_push(code, name, time_key, price, volume, sequence):
+    """Qot_UpdateTicker message for one trade"""
+    rsp = Qot_UpdateTicker_pb2.Response()
+    rsp.retType = RET_OK
+    _security(rsp.s2c.security, code)
+    rsp.s2c.name = name
+    record = rsp.s2c.tickerList.add()
+    record.time = time_key
+    record.sequence = sequence
+    record.dir = 1
+    record.price = price
+    record.volume = volume
+    record.turnover = price * volume
+    return rsp
+
+
+def _trade_header(pb_header, code, trd_env):
+    pb_header.trdEnv = TrdEnv.to_number(trd_env)[1]
+    pb_header.accID = 1
+    pb_header.trdMarket = TRADE_MARKETS.get(_market(code), TRADE_MARKETS['HK'])[0]
+
+
+def order_push(order, trd_env):
+    """Trd_UpdateOrder message for an order's current state"""
+    rsp = Trd_UpdateOrder_pb2.Response()
+    rsp.retType = RET_OK
+    _trade_header(rsp.s2c.header, order['code'], trd_env)
+    trd_market, sec_market = TRADE_MARKETS.get(_market(order['code']), TRADE_MARKETS['HK'])
+    pb = rsp.s2c.order
+    pb.trdSide = TrdSide.to_number(order['trd_side'])[1]
+    pb.orderType = OrderType.to_number(order['order_type'])[1]
+    pb.orderStatus = OrderStatus.to_number(order['order_status'])[1]
+    pb.orderID = int(order['order_id'])
+    pb.orderIDEx = order['order_id']
+    pb.code = order['code'].split('.', 1)[1]
+    pb.name = order['stock_name']
+    pb.qty = order['qty']
+    pb.price = order['price']
+    pb.createTime = order['create_time']
+    pb.updateTime = order['updated_time']
+    pb.fillQty = order['dealt_qty']
+    pb.fillAvgPrice = order['dealt_avg_price']
+    pb.secMarket = sec_market
+    pb.trdMarket = trd_market
+    pb.remark = order['remark']
+    return rsp
+
+
+def deal_push(deal, trd_env):
+    """Trd_UpdateOrderFill message for one fill"""
+    rsp = Trd_UpdateOrderFill_pb2.Response()
+    rsp.retType = RET_OK
+    _trade_header(rsp.s2c.header, deal['code'], trd_env)
+    pb = rsp.s2c.orderFill
+    pb.trdSide = TrdSide.to_number(deal['trd_side'])[1]
+    pb.fillID = int(deal['deal_id'])
+    pb.fillIDEx = deal['deal_id']
+    pb.orderID = int(deal['order_id'])
+    pb.orderIDEx = deal['order_id']
+    pb.code = deal['code'].split('.', 1)[1]
+    pb.name = deal['stock_name']
+    pb.qty = deal['qty']
+    pb.price = deal['price']
+    pb.createTime = deal['create_time']
+    pb.secMarket = TRADE_MARKETS.get(_market(deal['code']), TRADE_MARKETS['HK'])[1]
+    return rsp
@@ -0,0 +1,197 @@
+"""
+Record Futu push streams to an append-only binary log and replay them.
+
+    recorder = PushRecorder('pushes.bin')
+    quote_context.set_handler(recorder.wrap(OnBarClass()))   # records, then runs the handler
+    ...
+    recorder.close()
+
+    stats = replay('pushes.bin', handlers=[OnBarClass()], speed=None)   # as fast as possible
+    python FutuAPI/push_recorder.py pushes.bin                           # summarize a log
+
+Log layout: an 8-byte header (b'FPUSH', version), then one record per push:
+receive time in nanoseconds (int64), proto id (uint16), payload length
+(uint32), all little-endian, followed by the serialized protobuf response
+exactly as OpenD sent it. A partial record left by a crash is dropped when
+the log is reopened or read.
+"""
+import argparse
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from opend_simulator import PUSH_TYPES, TRADE_PUSHES
+
+MAGIC = b'FPUSH\x00\x01\x00'
+RECORD = struct.Struct('<qHI')
+HANDLER_PROTOS = {handler_base: proto_id for proto_id, (_, handler_base) in PUSH_TYPES.items()}
+MARKET_DATA_PUSHES = set(PUSH_TYPES) - TRADE_PUSHES
+
+
+def _records(path):
+    """(time_ns, proto_id, payload) for each complete record"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a push log")
+
+    offset = len(MAGIC)
+    while offset + RECORD.size <= len(data):
+        time_ns, proto_id, length = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        if start + length > len(data):
+            break
+        yield time_ns, proto_id, data[start:start + length]
+        offset = start + length
+
+
+class PushRecorder:
+    """Append every push a wrapped handler receives to a log, from any thread
+
+    Writes are buffered and flushed every flush_every records. Live sessions
+    should use flush_every=1 and close() on exit, so a killed process loses
+    no pushes.
+    """
+
+    def __init__(self, path, flush_every=1000):
+        self.path = path
+        self.flush_every = flush_every
+        self.count = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(path) and os.path.getsize(path):
+            end = len(MAGIC) + sum(RECORD.size + len(payload) for _, _, payload in _records(path))
+            if end < os.path.getsize(path):
+                os.truncate(path, end)
+            self._file = open(path, 'ab')
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(MAGIC)
+
+    def record(self, proto_id, rsp_pb, time_ns=None):
+        payload = rsp_pb.SerializeToString()
+        header = RECORD.pack(time_ns or time.time_ns(), proto_id, len(payload))
+        with self._lock:
+            self._file.write(header + payload)
+            self.count += 1
+            if self.count % self.flush_every == 0:
+                self._file.flush()
+
+    def wrap(self, handler):
+        """Record the handler's pushes before it processes them; returns the same handler"""
+        proto_id = next((proto for base, proto in HANDLER_PROTOS.items() if isinstance(handler, base)), None)
+        if proto_id is None:
+            raise TypeError(f"{type(handler).__name__} is not a push handler")
+
+        on_recv_rsp = handler.on_recv_rsp
+
+        def recording(rsp_pb):
+            self.record(proto_id, rsp_pb)
+            return on_recv_rsp(rsp_pb)
+
+        handler.on_recv_rsp = recording
+        return handler
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_pushes(path, proto_ids=None):
+    """Yield (time_ns, proto_id, response message) for each complete record"""
+    for time_ns, proto_id, payload in _records(path):
+        if proto_id in PUSH_TYPES and (proto_ids is None or proto_id in proto_ids):
+            rsp_pb = PUSH_TYPES[proto_id][0]()
+            rsp_pb.ParseFromString(payload)
+            yield time_ns, proto_id, rsp_pb
+
+
+def replay(path, handlers=(), simulator=None, speed=None, proto_ids=None):
+    """Feed a log's pushes through handlers and report per-type handler latency
+
+    speed=None replays as fast as possible; 1.0 keeps the recorded pacing and
+    10.0 plays ten times faster. With a simulator, market data pushes also
+    update its bars and prices, and the handlers registered on its contexts
+    receive the pushes, so strategies that query OpenD see consistent state.
+    Pass proto_ids=MARKET_DATA_PUSHES to leave orders and fills to the
+    simulator. Lag is how far dispatch fell behind the paced schedule.
+    """
+    durations, lags = {}, {}
+    start_ns = first_ns = None
+    handler_list = list(handlers)
+
+    for time_ns, proto_id, rsp_pb in read_pushes(path, proto_ids):
+        if speed:
+            if first_ns is None:
+                first_ns, start_ns = time_ns, time.perf_counter_ns()
+            due = start_ns + (time_ns - first_ns) / speed
+            wait = due - time.perf_counter_ns()
+            if wait > 0:
+                time.sleep(wait / 1e9)
+            lags.setdefault(proto_id, []).append(max(time.perf_counter_ns() - due, 0))
+
+        targets = handler_list
+        if simulator is not None:
+            simulator.apply_push(proto_id, rsp_pb)
+            contexts = simulator.trade_contexts if proto_id in TRADE_PUSHES else simulator.quote_contexts
+            # A handler passed in and also registered on a context gets each push once
+            registered = [handler for ctx in contexts for handler in ctx.handlers]
+            targets = list({id(handler): handler for handler in handler_list + registered}.values())
+
+        handler_base = PUSH_TYPES[proto_id][1]
+        for handler in targets:
+            if isinstance(handler, handler_base):
+                begin = time.perf_counter_ns()
+                handler.on_recv_rsp(rsp_pb)
+                durations.setdefault(proto_id, []).append(time.perf_counter_ns() - begin)
+
+    rows = {}
+    for proto_id, values in durations.items():
+        values = np.array(values) / 1e3
+        row = {'pushes': len(values), 'total_s': values.sum() / 1e6, 'p50_us': np.percentile(values, 50),
+               'p95_us': np.percentile(values, 95), 'max_us': values.max()}
+        if proto_id in lags:
+            row['p95_lag_ms'] = np.percentile(np.array(lags[proto_id]) / 1e6, 95)
+        rows[PUSH_TYPES[proto_id][1].__name__] = row
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def summarize(path):
+    """Pushes, bytes and time span per push type"""
+    rows = {}
+    for time_ns, proto_id, payload in _records(path):
+        name = PUSH_TYPES[proto_id][1].__name__ if proto_id in PUSH_TYPES else str(proto_id)
+        row = rows.setdefault(name, {'pushes': 0, 'bytes': 0, 'first_ns': time_ns})
+        row['pushes'] += 1
+        row['bytes'] += RECORD.size + len(payload)
+        row['last_ns'] = time_ns
+
+    summary = pd.DataFrame.from_dict(rows, orient='index')
+    if not summary.empty:
+        summary['first'] = pd.to_datetime(summary.pop('first_ns'), unit='ns')
+        summary['last'] = pd.to_datetime(summary.pop('last_ns'), unit='ns')
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a recorded Futu push log')
+    parser.add_argument('log', help='Push log written by PushRecorder')
+    args = parser.parse_args()
+
+    summary = summarize(args.log)
+    print(summary.to_string() if not summary.empty else 'No pushes recorded')
+
+
+if __name__ == '__main__':
+    main()
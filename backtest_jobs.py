@@ -0,0 +1,212 @@
+"""
+Backtest jobs for the desktop app, run in worker processes.
+
+Workers report progress as messages on a queue shared with the GUI:
+    ('progress', job_id, bars_done, total_bars)
+The finished result or error comes back through the job's future, and
+JobRunner turns both into messages the GUI drains from its event loop.
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Add the Backtesting_New directory to the path (signals use top-level imports)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backtesting_New'))
+
+from backtesting import Backtest
+from csv_loader import load_price_csv
+from Backtesting_New.strategy_combined import WeightedStrat
+from Backtesting_New.signals.rsi import RSIStrategy
+from Backtesting_New.signals.macd import MACDStrategy
+from Backtesting_New.signals.bb import BBStrategy
+
+STRATEGIES = {
+    "WeightedStrat": WeightedStrat,
+    "RSIStrategy": RSIStrategy,
+    "MACDStrategy": MACDStrategy,
+    "BBStrategy": BBStrategy,
+}
+
+# Progress messages per run; each also checks for cancellation
+PROGRESS_STEPS = 100
+
+
+def parse_param_values(text):
+    """Parse a parameter field: a number, a comma list "10,14,20" or an inclusive range "10:20:2" """
+    text = str(text).strip()
+    if ':' in text:
+        parts = [float(part) for part in text.split(':')]
+        if len(parts) not in (2, 3):
+            raise ValueError(f"Range must be start:stop or start:stop:step, got '{text}'")
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) == 3 else 1.0
+        if step <= 0 or stop < start:
+            raise ValueError(f"Range must increase with a positive step, got '{text}'")
+        # Half a step of slack so float steps still include the stop value
+        return [float(round(value, 10)) for value in np.arange(start, stop + step / 2, step)]
+    if ',' in text:
+        return [float(part) for part in text.split(',') if part.strip()]
+    return [float(text)]
+
+
+def expand_grid(param_values):
+    """Cartesian product of {name: [values]} as a list of parameter dicts"""
+    names = list(param_values)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(param_values[name] for name in names))]
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when the GUI cancels its job"""
+
+
+def make_strategy(strategy_name, params, job_id=None, progress_queue=None, cancel_event=None, total_bars=0):
+    """Subclass the chosen strategy with the given parameters and progress reporting"""
+    strategy_class = STRATEGIES[strategy_name]
+    report_every = max(1, total_bars // PROGRESS_STEPS)
+
+    class DynamicStrategy(strategy_class):
+        def next(self):
+            super().next()
+
+            bars_done = len(self.data)
+            if bars_done % report_every:
+                return
+            if cancel_event is not None and cancel_event.is_set():
+                raise JobCancelled()
+            if progress_queue is not None:
+                progress_queue.put(('progress', job_id, bars_done, total_bars))
+
+    # Set strategy parameters
+    for param_name, param_value in params.items():
+        setattr(DynamicStrategy, param_name, param_value)
+
+    return DynamicStrategy
+
+
+def run_backtest_job(job_id, strategy_name, params, data, cash, commission,
+                     progress_queue=None, cancel_event=None):
+    """Run one backtest; returns the stats with the strategy instance removed so they pickle
+
+    data is an OHLCV frame, a CSV path or a picklable zero-argument loader such as
+    functools.partial(load_replay, 'IBM', '5min'). Paths are loaded through the
+    csv_loader cache, so each worker keeps one cleaned copy shared by all of its jobs.
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        raise JobCancelled()
+
+    if isinstance(data, str):
+        data, _ = load_price_csv(data)
+    elif callable(data):
+        data = data()
+
+    strategy = make_strategy(strategy_name, params, job_id, progress_queue, cancel_event, len(data))
+    bt = Backtest(data, strategy, cash=cash, commission=commission, exclusive_orders=True)
+    stats = bt.run()
+
+    if progress_queue is not None:
+        progress_queue.put(('progress', job_id, len(data), len(data)))
+
+    return {
+        'job_id': job_id,
+        'strategy': strategy_name,
+        'params': params,
+        'stats': stats.drop(labels=['_strategy'], errors='ignore'),
+    }
+
+
+class JobRunner:
+    """Process pool plus the queues the GUI polls; all methods are called from the Tk thread"""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self._executor = None
+        self._manager = None
+        self._progress_queue = None
+        # Done callbacks fire on the executor's thread, so they only touch this queue
+        self._done_queue = queue.Queue()
+        self._futures = {}
+        self._cancel_events = {}
+        self._next_id = 0
+
+    def _start(self):
+        # Spawned workers never inherit the Tk interpreter state
+        context = multiprocessing.get_context('spawn')
+        self._manager = context.Manager()
+        self._progress_queue = self._manager.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def submit(self, strategy_name, params, data, cash, commission):
+        """Queue a backtest and return its job id"""
+        if self._executor is None:
+            self._start()
+
+        job_id = self._next_id
+        self._next_id += 1
+
+        cancel_event = self._manager.Event()
+        future = self._executor.submit(run_backtest_job, job_id, strategy_name, params, data,
+                                       cash, commission, self._progress_queue, cancel_event)
+        self._futures[job_id] = future
+        self._cancel_events[job_id] = cancel_event
+        future.add_done_callback(lambda f, job_id=job_id: self._done_queue.put((job_id, f)))
+        return job_id
+
+    def cancel(self, job_id=None):
+        """Cancel one job, or all jobs when job_id is None"""
+        job_ids = list(self._futures) if job_id is None else [job_id]
+        for job_id in job_ids:
+            future = self._futures.get(job_id)
+            # Queued jobs are dropped; running ones stop at their next progress check
+            if future is not None and not future.cancel():
+                self._cancel_events[job_id].set()
+
+    def poll(self):
+        """Drain pending messages: progress, then ('done', id, result) / ('error', id, msg) / ('cancelled', id)"""
+        messages = []
+
+        if self._progress_queue is not None:
+            while True:
+                try:
+                    messages.append(self._progress_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+        while True:
+            try:
+                job_id, future = self._done_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            self._futures.pop(job_id, None)
+            self._cancel_events.pop(job_id, None)
+
+            if future.cancelled():
+                messages.append(('cancelled', job_id))
+                continue
+            error = future.exception()
+            if isinstance(error, JobCancelled):
+                messages.append(('cancelled', job_id))
+            elif error is not None:
+                messages.append(('error', job_id, str(error) or type(error).__name__))
+            else:
+                messages.append(('done', job_id, future.result()))
+
+        return messages
+
+    def active(self):
+        """Number of submitted jobs whose completion has not been polled yet"""
+        return len(self._futures)
+
+    def shutdown(self):
+        """Stop workers, cancelling anything still queued or running"""
+        if self._executor is None:
+            return
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
+        self._executor = None
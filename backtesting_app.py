@@ -3,18 +3,218 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import threading
 import os
 import sys
 
 # Add the Backtesting_New directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'Backtesting_New'))
 
-from backtesting import Backtest
-from Backtesting_New.strategy_combined import WeightedStrat
-from Backtesting_New.signals.rsi import RSIStrategy
-from Backtesting_New.signals.macd import MACDStrategy
-from Backtesting_New.signals.bb import BBStrategy
+from backtest_jobs import JobRunner, STRATEGIES, parse_param_values, expand_grid
+from csv_loader import load_price_csv
+
+# How often the GUI drains worker messages (ms)
+POLL_INTERVAL_MS = 50
+
+# Ask before submitting sweeps larger than this many backtests
+SWEEP_CONFIRM_SIZE = 200
+
+# Metrics a sweep can be ranked and colored by
+SWEEP_METRICS = ["Sharpe Ratio", "Return [%]", "Return (Ann.) [%]", "Max. Drawdown [%]", "Win Rate [%]"]
+
+# Parameter fields per strategy: (label, parameter, default)
+STRATEGY_PARAMS = {
+    "WeightedStrat": [
+        ("RSI Period", "rsi_daily_days", 10),
+        ("RSI Upper Bound", "rsi_upper_bound", 70),
+        ("RSI Lower Bound", "rsi_lower_bound", 30),
+        ("MACD Fast", "fast_period", 12),
+        ("MACD Slow", "slow_period", 26),
+        ("MACD Signal", "signal_period", 9),
+        ("BB Period", "bb_period", 20),
+        ("BB Std Dev", "bb_stdev", 2.1),
+        ("RSI Buy Weight", "rsi_daily_weight_buy", 0.5),
+        ("RSI Sell Weight", "rsi_daily_weight_sell", 0.25),
+        ("MACD Weight", "macd_daily_weight", 0.5),
+        ("BB Weight", "bb_weight_buy", 0.5),
+        ("Buy Threshold", "buy_threshold", 1.0),
+        ("Sell Threshold", "sell_threshold", -1.0),
+    ],
+    "RSIStrategy": [
+        ("RSI Period", "rsi_daily_days", 12),
+        ("RSI Upper Bound", "rsi_upper_bound", 75),
+        ("RSI Lower Bound", "rsi_lower_bound", 25),
+    ],
+    "MACDStrategy": [
+        ("Fast Period", "fast_period", 12),
+        ("Slow Period", "slow_period", 26),
+        ("Signal Period", "signal_period", 9),
+    ],
+    "BBStrategy": [
+        ("BB Period", "bb_period", 20),
+        ("BB Std Dev", "bb_stdev", 2.1),
+        ("Volume Avg Period", "volume_avg_period", 20),
+    ],
+}
+
+# Key performance metrics shown for a backtest: (stats key, display format)
+RESULT_METRICS = [
+    ("Start", "{}"),
+    ("End", "{}"),
+    ("Duration", "{}"),
+    ("Exposure Time [%]", "{:.2f}%"),
+    ("Equity Final [$]", "${:,.2f}"),
+    ("Equity Peak [$]", "${:,.2f}"),
+    ("Return [%]", "{:.2f}%"),
+    ("Buy & Hold Return [%]", "{:.2f}%"),
+    ("Return (Ann.) [%]", "{:.2f}%"),
+    ("Volatility (Ann.) [%]", "{:.2f}%"),
+    ("Sharpe Ratio", "{:.3f}"),
+    ("Sortino Ratio", "{:.3f}"),
+    ("Calmar Ratio", "{:.3f}"),
+    ("Max. Drawdown [%]", "{:.2f}%"),
+    ("Avg. Drawdown [%]", "{:.2f}%"),
+    ("Max. Drawdown Duration", "{}"),
+    ("Avg. Drawdown Duration", "{}"),
+    ("# Trades", "{}"),
+    ("Win Rate [%]", "{:.2f}%"),
+    ("Best Trade [%]", "{:.2f}%"),
+    ("Worst Trade [%]", "{:.2f}%"),
+    ("Avg. Trade [%]", "{:.2f}%"),
+    ("Max. Trade Duration", "{}"),
+    ("Avg. Trade Duration", "{}"),
+    ("Profit Factor", "{:.3f}"),
+    ("Expectancy [%]", "{:.2f}%"),
+    ("SQN", "{:.3f}"),
+]
+
+def format_metrics(result):
+    """Formatted (metric, value) pairs for a backtest's stats"""
+    return [(metric, fmt.format(result[metric])) for metric, fmt in RESULT_METRICS]
+
+class ComparisonTable:
+    """Side-by-side metrics for strategies run on the same data"""
+    
+    def __init__(self, parent, strategy_names):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Strategy Comparison")
+        
+        columns = ["metric"] + strategy_names
+        self.tree = ttk.Treeview(self.window, columns=columns, show="headings", height=len(RESULT_METRICS))
+        self.tree.heading("metric", text="Metric")
+        self.tree.column("metric", width=180, anchor=tk.W)
+        for name in strategy_names:
+            self.tree.heading(name, text=name)
+            self.tree.column(name, width=140, anchor=tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        self.strategy_names = strategy_names
+        self.values = {metric: ["..."] * len(strategy_names) for metric, _ in RESULT_METRICS}
+        for metric, _ in RESULT_METRICS:
+            self.tree.insert("", tk.END, iid=metric, values=[metric] + self.values[metric])
+    
+    def exists(self):
+        return bool(self.window.winfo_exists())
+    
+    def set_column(self, strategy_name, values):
+        """Fill one strategy's column with formatted values, or a status string"""
+        if not self.exists():
+            return
+        col = self.strategy_names.index(strategy_name)
+        for metric, _ in RESULT_METRICS:
+            self.values[metric][col] = values.get(metric, "") if isinstance(values, dict) else values
+            self.tree.item(metric, values=[metric] + self.values[metric])
+
+class SweepHeatmap:
+    """Heatmap of a sweep metric over the two swept parameters with the most values"""
+    
+    def __init__(self, parent, param_values, swept):
+        self.param_values = param_values
+        # Extra swept parameters are collapsed by taking the best value
+        self.axes = sorted(swept, key=lambda name: -len(param_values[name]))[:2]
+        self.collapsed = len(swept) > 2
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("Parameter Sweep Heatmap")
+        self.canvas = tk.Canvas(self.window, width=720, height=520, bg="white")
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", lambda event: self.redraw())
+        
+        self.rows = []
+        self.metric = SWEEP_METRICS[0]
+    
+    def exists(self):
+        return bool(self.window.winfo_exists())
+    
+    def update(self, rows, metric):
+        self.rows = rows
+        self.metric = metric
+        self.redraw()
+    
+    @staticmethod
+    def _color(t):
+        """Red (worst) through yellow to green (best)"""
+        if np.isnan(t):
+            return "#dddddd"
+        r = 255 if t < 0.5 else int(255 * (1 - t) * 2)
+        g = int(255 * t * 2) if t < 0.5 else 255
+        return f"#{r:02x}{g:02x}66"
+    
+    def redraw(self):
+        if not self.exists():
+            return
+        
+        canvas = self.canvas
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        left, right, top, bottom = 90, 20, 40, 60
+        
+        x_name = self.axes[0]
+        y_name = self.axes[1] if len(self.axes) > 1 else None
+        xs = self.param_values[x_name]
+        ys = self.param_values[y_name] if y_name else [None]
+        
+        grid = np.full((len(ys), len(xs)), np.nan)
+        for row in self.rows:
+            value = row.get(self.metric, np.nan)
+            if value is None or np.isnan(value):
+                continue
+            i = ys.index(row['params'][y_name]) if y_name else 0
+            j = xs.index(row['params'][x_name])
+            grid[i, j] = value if np.isnan(grid[i, j]) else max(grid[i, j], value)
+        
+        finite = grid[np.isfinite(grid)]
+        low, high = (finite.min(), finite.max()) if finite.size else (0.0, 0.0)
+        span = high - low
+        
+        cell_w = max(1, (width - left - right) / len(xs))
+        cell_h = max(1, (height - top - bottom) / len(ys))
+        
+        title = f"{self.metric}" + (" (best over other swept parameters)" if self.collapsed else "")
+        canvas.create_text(width / 2, top / 2, text=title, font=("TkDefaultFont", 10, "bold"))
+        
+        for i, y_value in enumerate(ys):
+            # Highest y value at the top
+            y0 = top + (len(ys) - 1 - i) * cell_h
+            for j, x_value in enumerate(xs):
+                x0 = left + j * cell_w
+                value = grid[i, j]
+                t = (value - low) / span if span else (np.nan if np.isnan(value) else 1.0)
+                canvas.create_rectangle(x0, y0, x0 + cell_w, y0 + cell_h, fill=self._color(t), outline="white")
+                if not np.isnan(value) and cell_w > 40 and cell_h > 16:
+                    canvas.create_text(x0 + cell_w / 2, y0 + cell_h / 2, text=f"{value:.2f}",
+                                       font=("TkDefaultFont", 8))
+            if y_name:
+                canvas.create_text(left - 6, y0 + cell_h / 2, text=f"{y_value:g}", anchor=tk.E)
+        
+        # Label roughly every column that has room
+        label_every = max(1, int(40 // cell_w) + 1)
+        for j, x_value in enumerate(xs):
+            if j % label_every == 0:
+                canvas.create_text(left + (j + 0.5) * cell_w, height - bottom + 12, text=f"{x_value:g}")
+        
+        canvas.create_text(left + (width - left - right) / 2, height - bottom + 36, text=x_name)
+        if y_name:
+            canvas.create_text(12, top + (height - top - bottom) / 2, text=y_name, angle=90)
 
 class BacktestingApp:
     def __init__(self, root):
@@ -32,7 +232,22 @@ class BacktestingApp:
         # Strategy parameters
         self.strategy_params = {}
         
+        # Backtests run in worker processes; the GUI only polls their messages
+        self.jobs = JobRunner()
+        self.job_progress = {}
+        self.polling = False
+        
+        # Parameter sweep state
+        self.sweep = None
+        self.heatmap = None
+        self.sweep_metric_var = tk.StringVar(value=SWEEP_METRICS[0])
+        
+        # Strategy comparison state
+        self.comparison = None
+        self.compare_vars = {name: tk.BooleanVar(value=True) for name in STRATEGIES}
+        
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def create_widgets(self):
         # Main frame
@@ -60,11 +275,18 @@ class BacktestingApp:
         
         ttk.Label(strategy_frame, text="Strategy:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
         strategy_combo = ttk.Combobox(strategy_frame, textvariable=self.strategy_var, 
-                                    values=["WeightedStrat", "RSIStrategy", "MACDStrategy", "BBStrategy"],
+                                    values=list(STRATEGIES),
                                     state="readonly")
         strategy_combo.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 5))
         strategy_combo.bind('<<ComboboxSelected>>', self.on_strategy_change)
         
+        # Strategies included in a side-by-side comparison
+        ttk.Label(strategy_frame, text="Compare:").grid(row=1, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+        compare_frame = ttk.Frame(strategy_frame)
+        compare_frame.grid(row=1, column=1, sticky=tk.W, pady=(5, 0))
+        for name in STRATEGIES:
+            ttk.Checkbutton(compare_frame, text=name, variable=self.compare_vars[name]).pack(side=tk.LEFT, padx=(0, 10))
+        
         # Backtest parameters
         params_frame = ttk.LabelFrame(main_frame, text="Backtest Parameters", padding="10")
         params_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -94,8 +316,18 @@ class BacktestingApp:
         button_frame.grid(row=4, column=0, columnspan=2, pady=(0, 10))
         
         ttk.Button(button_frame, text="Run Backtest", command=self.run_backtest).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Run Sweep", command=self.run_sweep).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Compare Strategies", command=self.run_compare).pack(side=tk.LEFT, padx=(0, 5))
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_backtest, state="disabled")
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(button_frame, text="Clear Results", command=self.clear_results).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(button_frame, text="Save Results", command=self.save_results).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Save Results", command=self.save_results).pack(side=tk.LEFT, padx=(0, 15))
+        
+        ttk.Label(button_frame, text="Sweep Metric:").pack(side=tk.LEFT, padx=(0, 5))
+        metric_combo = ttk.Combobox(button_frame, textvariable=self.sweep_metric_var, values=SWEEP_METRICS,
+                                    state="readonly", width=18)
+        metric_combo.pack(side=tk.LEFT)
+        metric_combo.bind('<<ComboboxSelected>>', lambda event: self.update_heatmap())
         
         # Results display
         results_frame = ttk.LabelFrame(main_frame, text="Backtest Results", padding="10")
@@ -107,8 +339,8 @@ class BacktestingApp:
         self.results_text = scrolledtext.ScrolledText(results_frame, height=15, width=80)
         self.results_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
-        # Progress bar
-        self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
+        # Progress bar, driven by bar counts reported from the workers
+        self.progress = ttk.Progressbar(main_frame, mode='determinate', maximum=100)
         self.progress.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
         
     def browse_file(self):
@@ -122,52 +354,21 @@ class BacktestingApp:
     
     def validate_csv_file(self, filename):
         try:
-            df = pd.read_csv(filename, index_col=0, parse_dates=True)
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            
-            if not all(col in df.columns for col in required_columns):
-                messagebox.showerror("Invalid File", 
-                                   f"CSV file must contain columns: {', '.join(required_columns)}")
-                self.data_file.set("")
-                return False
-            
-            # Check for data type issues and clean the data
-            original_rows = len(df)
-            
-            # Clean price data - remove dollar signs and convert to numeric
-            price_columns = ['Open', 'High', 'Low', 'Close']
-            for col in price_columns:
-                df[col] = df[col].astype(str).str.replace('$', '', regex=False)
-                df[col] = df[col].str.replace(',', '', regex=False)
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+            df, report = load_price_csv(filename)
             
-            # Convert Volume to numeric
-            df['Volume'] = pd.to_numeric(df['Volume'], errors='coerce')
+            if report['removed_rows']:
+                self.results_text.insert(tk.END, f"⚠ Warning: {report['removed_rows']} rows with invalid data were removed\n")
             
-            # Remove rows with NaN values
-            df_clean = df.dropna()
-            rows_after_cleaning = len(df_clean)
-            
-            if rows_after_cleaning == 0:
-                messagebox.showerror("Invalid Data", "No valid numeric data found in the file")
-                self.data_file.set("")
-                return False
-            
-            if rows_after_cleaning < original_rows:
-                removed_rows = original_rows - rows_after_cleaning
-                self.results_text.insert(tk.END, f"⚠ Warning: {removed_rows} rows with invalid data were removed\n")
-            
-            # Check for negative or zero values
-            if (df_clean <= 0).any().any():
-                messagebox.showerror("Invalid Data", "Data contains zero or negative values")
-                self.data_file.set("")
-                return False
-            
-            self.results_text.insert(tk.END, f"✓ File loaded successfully: {rows_after_cleaning} rows\n")
-            self.results_text.insert(tk.END, f"  Date range: {df_clean.index[0]} to {df_clean.index[-1]}\n")
-            self.results_text.insert(tk.END, f"  Columns: {', '.join(df_clean.columns)}\n\n")
+            self.results_text.insert(tk.END, f"✓ File loaded successfully: {report['rows']} rows\n")
+            self.results_text.insert(tk.END, f"  Date range: {report['start']} to {report['end']}\n")
+            self.results_text.insert(tk.END, f"  Columns: {', '.join(report['columns'])}\n\n")
             return True
             
+        except ValueError as e:
+            messagebox.showerror("Invalid File", str(e))
+            self.data_file.set("")
+            return False
+            
         except Exception as e:
             messagebox.showerror("Error", f"Failed to read CSV file: {str(e)}")
             self.data_file.set("")
@@ -195,51 +396,16 @@ class BacktestingApp:
             self.create_bb_params()
     
     def create_weighted_strat_params(self):
-        params = [
-            ("RSI Period", "rsi_daily_days", 10),
-            ("RSI Upper Bound", "rsi_upper_bound", 70),
-            ("RSI Lower Bound", "rsi_lower_bound", 30),
-            ("MACD Fast", "fast_period", 12),
-            ("MACD Slow", "slow_period", 26),
-            ("MACD Signal", "signal_period", 9),
-            ("BB Period", "bb_period", 20),
-            ("BB Std Dev", "bb_stdev", 2.1),
-            ("RSI Buy Weight", "rsi_daily_weight_buy", 0.5),
-            ("RSI Sell Weight", "rsi_daily_weight_sell", 0.25),
-            ("MACD Weight", "macd_daily_weight", 0.5),
-            ("BB Weight", "bb_weight_buy", 0.5),
-            ("Buy Threshold", "buy_threshold", 1.0),
-            ("Sell Threshold", "sell_threshold", -1.0),
-        ]
-        
-        self.create_param_widgets(params)
+        self.create_param_widgets(STRATEGY_PARAMS["WeightedStrat"])
     
     def create_rsi_params(self):
-        params = [
-            ("RSI Period", "rsi_daily_days", 12),
-            ("RSI Upper Bound", "rsi_upper_bound", 75),
-            ("RSI Lower Bound", "rsi_lower_bound", 25),
-        ]
-        
-        self.create_param_widgets(params)
+        self.create_param_widgets(STRATEGY_PARAMS["RSIStrategy"])
     
     def create_macd_params(self):
-        params = [
-            ("Fast Period", "fast_period", 12),
-            ("Slow Period", "slow_period", 26),
-            ("Signal Period", "signal_period", 9),
-        ]
-        
-        self.create_param_widgets(params)
+        self.create_param_widgets(STRATEGY_PARAMS["MACDStrategy"])
     
     def create_bb_params(self):
-        params = [
-            ("BB Period", "bb_period", 20),
-            ("BB Std Dev", "bb_stdev", 2.1),
-            ("Volume Avg Period", "volume_avg_period", 20),
-        ]
-        
-        self.create_param_widgets(params)
+        self.create_param_widgets(STRATEGY_PARAMS["BBStrategy"])
     
     def create_param_widgets(self, params):
         row = 0
@@ -248,10 +414,11 @@ class BacktestingApp:
             ttk.Label(self.strategy_params_frame, text=f"{label}:").grid(
                 row=row, column=col*2, sticky=tk.W, padx=(0, 5), pady=2)
             
-            var = tk.DoubleVar(value=default_value)
+            # Text so a field can hold a sweep range such as "10:20:2" or "10,14,20"
+            var = tk.StringVar(value=str(default_value))
             self.strategy_params[param_name] = var
             
-            ttk.Entry(self.strategy_params_frame, textvariable=var, width=10).grid(
+            ttk.Entry(self.strategy_params_frame, textvariable=var, width=12).grid(
                 row=row, column=col*2+1, sticky=tk.W, padx=(0, 15), pady=2)
             
             col += 1
@@ -262,42 +429,11 @@ class BacktestingApp:
     def load_and_process_data(self, filename):
         """Load and process the CSV data"""
         try:
-            # Load the data
-            data = pd.read_csv(filename, index_col=0, parse_dates=True)
-            
-            # Ensure we have the required columns
-            required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-            if not all(col in data.columns for col in required_columns):
-                raise ValueError(f"Missing required columns: {set(required_columns) - set(data.columns)}")
-            
-            # Select only the required columns in the correct order
-            data = data[required_columns]
-            
-            # Clean price data - remove dollar signs and convert to numeric
-            price_columns = ['Open', 'High', 'Low', 'Close']
-            for col in price_columns:
-                # Remove dollar signs and any other non-numeric characters except decimal points
-                data[col] = data[col].astype(str).str.replace('$', '', regex=False)
-                data[col] = data[col].str.replace(',', '', regex=False)  # Remove commas if any
-                data[col] = pd.to_numeric(data[col], errors='coerce')
-            
-            # Convert Volume column to numeric (it might also have formatting issues)
-            data['Volume'] = pd.to_numeric(data['Volume'], errors='coerce')
+            # Parsed, cleaned and sorted once per file version (cached on disk)
+            data, report = load_price_csv(filename)
             
-            # Remove any rows with NaN values
-            original_length = len(data)
-            data = data.dropna()
-            
-            if len(data) < original_length:
-                removed_rows = original_length - len(data)
-                print(f"Removed {removed_rows} rows with invalid data")
-            
-            # Ensure all values are positive (stock prices shouldn't be negative)
-            if (data <= 0).any().any():
-                raise ValueError("Data contains zero or negative values")
-            
-            # Sort by date (newest first to oldest last for proper chronological order)
-            data = data.sort_index()
+            if report['removed_rows'] and not report['from_cache']:
+                print(f"Removed {report['removed_rows']} rows with invalid data")
             
             # Ensure we have enough data points
             if len(data) < 50:
@@ -314,30 +450,35 @@ class BacktestingApp:
         
         # Create parameters dictionary
         params = {}
-        for param_name, var in self.strategy_params.items():
-            params[param_name] = var.get()
+        for param_name, values in self.get_param_values().items():
+            if len(values) > 1:
+                raise ValueError(f"{param_name} has several values; use Run Sweep to test a range")
+            params[param_name] = values[0]
         
         # Get strategy class
-        if strategy_name == "WeightedStrat":
-            strategy_class = WeightedStrat
-        elif strategy_name == "RSIStrategy":
-            strategy_class = RSIStrategy
-        elif strategy_name == "MACDStrategy":
-            strategy_class = MACDStrategy
-        elif strategy_name == "BBStrategy":
-            strategy_class = BBStrategy
-        else:
+        if strategy_name not in STRATEGIES:
             raise ValueError(f"Unknown strategy: {strategy_name}")
+        strategy_class = STRATEGIES[strategy_name]
         
         return strategy_class, params
     
-    def run_backtest_thread(self):
-        """Run backtest in a separate thread"""
+    def get_param_values(self):
+        """Parse every parameter field into its list of values"""
+        param_values = {}
+        for param_name, var in self.strategy_params.items():
+            try:
+                param_values[param_name] = parse_param_values(var.get())
+            except ValueError as e:
+                raise ValueError(f"Invalid value for {param_name}: {e}")
+        return param_values
+    
+    def run_backtest(self):
+        """Load the data and submit the backtest to the worker pool"""
+        if not self.data_file.get():
+            messagebox.showerror("Error", "Please select a CSV file first")
+            return
+        
         try:
-            if not self.data_file.get():
-                messagebox.showerror("Error", "Please select a CSV file first")
-                return
-            
             self.results_text.insert(tk.END, "=" * 50 + "\n")
             self.results_text.insert(tk.END, f"Starting backtest at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             self.results_text.insert(tk.END, "=" * 50 + "\n\n")
@@ -353,91 +494,293 @@ class BacktestingApp:
             self.results_text.insert(tk.END, f"Data points: {len(data)}\n")
             self.results_text.insert(tk.END, f"Date range: {data.index[0]} to {data.index[-1]}\n\n")
             
-            # Create strategy class with parameters
-            class DynamicStrategy(strategy_class):
-                pass
-            
-            # Set strategy parameters
-            for param_name, param_value in strategy_params.items():
-                setattr(DynamicStrategy, param_name, param_value)
-            
-            # Run backtest
+            # Run backtest in a worker process to keep the GUI responsive
             self.results_text.insert(tk.END, "Running backtest...\n")
-            bt = Backtest(
-                data, 
-                DynamicStrategy, 
-                cash=self.cash_var.get(),
-                commission=self.commission_var.get(),
-                exclusive_orders=True
-            )
-            
-            # Run the backtest
-            result = bt.run()
-            
-            # Store results for saving
-            self.last_result = result
-            self.last_bt = bt
-            
-            # Display results
-            self.results_text.insert(tk.END, "\n" + "=" * 30 + " RESULTS " + "=" * 30 + "\n\n")
+            self.results_text.see(tk.END)
+            # Workers load the file from the csv_loader cache instead of receiving a pickled copy
+            job_id = self.jobs.submit(strategy_class.__name__, strategy_params, self.data_file.get(),
+                                      self.cash_var.get(), self.commission_var.get())
+            self.job_progress[job_id] = 0.0
             
-            # Key performance metrics
-            metrics = [
-                ("Start", result['Start']),
-                ("End", result['End']),
-                ("Duration", result['Duration']),
-                ("Exposure Time [%]", f"{result['Exposure Time [%]']:.2f}%"),
-                ("Equity Final [$]", f"${result['Equity Final [$]']:,.2f}"),
-                ("Equity Peak [$]", f"${result['Equity Peak [$]']:,.2f}"),
-                ("Return [%]", f"{result['Return [%]']:.2f}%"),
-                ("Buy & Hold Return [%]", f"{result['Buy & Hold Return [%]']:.2f}%"),
-                ("Return (Ann.) [%]", f"{result['Return (Ann.) [%]']:.2f}%"),
-                ("Volatility (Ann.) [%]", f"{result['Volatility (Ann.) [%]']:.2f}%"),
-                ("Sharpe Ratio", f"{result['Sharpe Ratio']:.3f}"),
-                ("Sortino Ratio", f"{result['Sortino Ratio']:.3f}"),
-                ("Calmar Ratio", f"{result['Calmar Ratio']:.3f}"),
-                ("Max. Drawdown [%]", f"{result['Max. Drawdown [%]']:.2f}%"),
-                ("Avg. Drawdown [%]", f"{result['Avg. Drawdown [%]']:.2f}%"),
-                ("Max. Drawdown Duration", result['Max. Drawdown Duration']),
-                ("Avg. Drawdown Duration", result['Avg. Drawdown Duration']),
-                ("# Trades", result['# Trades']),
-                ("Win Rate [%]", f"{result['Win Rate [%]']:.2f}%"),
-                ("Best Trade [%]", f"{result['Best Trade [%]']:.2f}%"),
-                ("Worst Trade [%]", f"{result['Worst Trade [%]']:.2f}%"),
-                ("Avg. Trade [%]", f"{result['Avg. Trade [%]']:.2f}%"),
-                ("Max. Trade Duration", result['Max. Trade Duration']),
-                ("Avg. Trade Duration", result['Avg. Trade Duration']),
-                ("Profit Factor", f"{result['Profit Factor']:.3f}"),
-                ("Expectancy [%]", f"{result['Expectancy [%]']:.2f}%"),
-                ("SQN", f"{result['SQN']:.3f}"),
-            ]
+        except Exception as e:
+            self.results_text.insert(tk.END, f"\nERROR: {str(e)}\n\n")
+            messagebox.showerror("Backtest Error", str(e))
+            return
+        
+        self.start_polling()
+    
+    def run_sweep(self):
+        """Submit one backtest per parameter combination and chart results as they finish"""
+        if not self.data_file.get():
+            messagebox.showerror("Error", "Please select a CSV file first")
+            return
+        if self.sweep is not None:
+            messagebox.showwarning("Sweep Running", "Wait for the current sweep to finish or cancel it")
+            return
+        
+        try:
+            strategy_name = self.strategy_var.get()
+            param_values = self.get_param_values()
+            swept = [name for name, values in param_values.items() if len(values) > 1]
+            if not swept:
+                raise ValueError("Enter a range (start:stop:step) or list (a,b,c) in at least one parameter")
+            
+            grid = expand_grid(param_values)
+            if len(grid) > SWEEP_CONFIRM_SIZE and not messagebox.askyesno(
+                    "Large Sweep", f"This sweep runs {len(grid)} backtests. Continue?"):
+                return
             
-            for metric, value in metrics:
-                self.results_text.insert(tk.END, f"{metric:<25}: {value}\n")
+            self.load_and_process_data(self.data_file.get())
             
-            self.results_text.insert(tk.END, "\n" + "=" * 66 + "\n\n")
-            self.results_text.insert(tk.END, f"Backtest completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        except Exception as e:
+            messagebox.showerror("Sweep Error", str(e))
+            return
+        
+        self.results_text.insert(tk.END, "=" * 50 + "\n")
+        self.results_text.insert(tk.END, f"Starting sweep at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        self.results_text.insert(tk.END, f"Strategy: {strategy_name}, {len(grid)} combinations over "
+                                         f"{', '.join(swept)}\n")
+        self.results_text.insert(tk.END, "=" * 50 + "\n\n")
+        
+        self.sweep = {
+            'strategy': strategy_name,
+            'param_values': param_values,
+            'swept': swept,
+            'jobs': set(),
+            'rows': [],
+        }
+        
+        if self.heatmap is None or not self.heatmap.exists() or self.heatmap.param_values != param_values:
+            if self.heatmap is not None and self.heatmap.exists():
+                self.heatmap.window.destroy()
+            self.heatmap = SweepHeatmap(self.root, param_values, swept)
+        self.update_heatmap()
+        
+        for params in grid:
+            job_id = self.jobs.submit(strategy_name, params, self.data_file.get(),
+                                      self.cash_var.get(), self.commission_var.get())
+            self.sweep['jobs'].add(job_id)
+            self.job_progress[job_id] = 0.0
+        
+        self.start_polling()
+    
+    def run_compare(self):
+        """Run the checked strategies side by side on the loaded data"""
+        if not self.data_file.get():
+            messagebox.showerror("Error", "Please select a CSV file first")
+            return
+        if self.comparison is not None:
+            messagebox.showwarning("Comparison Running", "Wait for the current comparison to finish or cancel it")
+            return
+        
+        selected = [name for name in STRATEGIES if self.compare_vars[name].get()]
+        if not selected:
+            messagebox.showerror("Error", "Select at least one strategy to compare")
+            return
+        
+        try:
+            data = self.load_and_process_data(self.data_file.get())
             
-            # Auto-scroll to bottom
-            self.results_text.see(tk.END)
+            # The strategy being edited uses its fields; the others use their defaults
+            strategy_params = {name: {param: default for _, param, default in STRATEGY_PARAMS[name]}
+                               for name in selected}
+            if self.strategy_var.get() in strategy_params:
+                strategy_params[self.strategy_var.get()] = self.get_strategy_class_and_params()[1]
             
         except Exception as e:
-            self.results_text.insert(tk.END, f"\nERROR: {str(e)}\n\n")
-            messagebox.showerror("Backtest Error", str(e))
+            messagebox.showerror("Comparison Error", str(e))
+            return
         
-        finally:
-            # Hide progress bar
-            self.root.after(0, self.progress.stop)
+        self.results_text.insert(tk.END, "=" * 50 + "\n")
+        self.results_text.insert(tk.END, f"Starting comparison at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        self.results_text.insert(tk.END, f"Strategies: {', '.join(selected)}\n")
+        self.results_text.insert(tk.END, f"Data points: {len(data)}, {data.index[0]} to {data.index[-1]}\n")
+        self.results_text.insert(tk.END, "=" * 50 + "\n\n")
+        
+        self.comparison = {
+            'jobs': {},
+            'results': {},
+            'table': ComparisonTable(self.root, selected),
+        }
+        
+        for name in selected:
+            job_id = self.jobs.submit(name, strategy_params[name], self.data_file.get(),
+                                      self.cash_var.get(), self.commission_var.get())
+            self.comparison['jobs'][job_id] = name
+            self.job_progress[job_id] = 0.0
+        
+        self.start_polling()
     
-    def run_backtest(self):
-        """Start backtest in a separate thread"""
-        # Show progress bar
-        self.progress.start()
+    def add_comparison_result(self, job_id, kind, message):
+        """Fill a strategy's column as its backtest finishes"""
+        name = self.comparison['jobs'][job_id]
+        table = self.comparison['table']
+        
+        if kind == 'done':
+            stats = message[2]['stats']
+            self.comparison['results'][name] = stats
+            table.set_column(name, dict(format_metrics(stats)))
+            self.results_text.insert(tk.END, f"{name}: Return {stats['Return [%]']:.2f}%, "
+                                             f"Sharpe {stats['Sharpe Ratio']:.3f}, # Trades {stats['# Trades']}\n")
+        elif kind == 'error':
+            table.set_column(name, "error")
+            self.results_text.insert(tk.END, f"{name}: ERROR {message[2]}\n")
+        else:
+            table.set_column(name, "cancelled")
+            self.results_text.insert(tk.END, f"{name}: cancelled\n")
+    
+    def finish_comparison(self):
+        """Print the comparison table once every strategy has finished"""
+        comparison = self.comparison
+        self.comparison = None
+        results = comparison['results']
+        
+        self.results_text.insert(tk.END, f"\nComparison finished: {len(results)}/{len(comparison['jobs'])} "
+                                         f"strategies completed\n")
+        if not results:
+            self.results_text.insert(tk.END, "\n")
+            return
+        
+        # Columns in the order the strategies were selected
+        names = [name for name in comparison['jobs'].values() if name in results]
+        formatted = {name: dict(format_metrics(results[name])) for name in names}
+        self.results_text.insert(tk.END, "\n" + f"{'Metric':<25}" + "".join(f" {name:>19}" for name in names) + "\n")
+        for metric, _ in RESULT_METRICS:
+            self.results_text.insert(tk.END, f"{metric:<25}" +
+                                     "".join(f" {formatted[name][metric]:>19}" for name in names) + "\n")
+        self.results_text.insert(tk.END, "\n")
+        
+        # Side-by-side stats become the result saved by Save Results
+        self.last_result = (pd.DataFrame({name: results[name] for name in names}).T.drop(columns=['_equity_curve', '_trades'], errors='ignore')
+                            .rename_axis('Strategy').reset_index())
+    
+    def start_polling(self):
+        self.cancel_button.config(state="normal")
+        self.update_progress()
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_INTERVAL_MS, self.poll_jobs)
+    
+    def poll_jobs(self):
+        """Apply worker messages on the Tk thread, then reschedule while jobs are active"""
+        for message in self.jobs.poll():
+            kind, job_id = message[0], message[1]
+            
+            if kind == 'progress':
+                bars_done, total_bars = message[2], message[3]
+                if job_id in self.job_progress and total_bars:
+                    self.job_progress[job_id] = bars_done / total_bars
+                continue
+            
+            # Finished jobs count as complete until the whole batch is done
+            self.job_progress[job_id] = 1.0
+            in_sweep = self.sweep is not None and job_id in self.sweep['jobs']
+            in_comparison = self.comparison is not None and job_id in self.comparison['jobs']
+            
+            if in_comparison:
+                self.add_comparison_result(job_id, kind, message)
+            elif kind == 'done' and in_sweep:
+                self.add_sweep_result(message[2])
+            elif kind == 'done':
+                self.display_results(message[2]['stats'])
+            elif kind == 'error':
+                self.results_text.insert(tk.END, f"\nERROR: {message[2]}\n\n")
+                if not in_sweep:
+                    messagebox.showerror("Backtest Error", message[2])
+            elif kind == 'cancelled' and not in_sweep:
+                self.results_text.insert(tk.END, "Backtest cancelled\n\n")
+        
+        self.update_progress()
+        self.update_heatmap()
+        
+        if self.jobs.active():
+            self.root.after(POLL_INTERVAL_MS, self.poll_jobs)
+        else:
+            self.polling = False
+            self.job_progress.clear()
+            self.cancel_button.config(state="disabled")
+            self.progress['value'] = 0
+            if self.sweep is not None:
+                self.finish_sweep()
+            if self.comparison is not None:
+                self.finish_comparison()
+        
+        self.results_text.see(tk.END)
+    
+    def update_progress(self):
+        """Show the average completion of the running jobs"""
+        if self.job_progress:
+            self.progress['value'] = 100 * sum(self.job_progress.values()) / len(self.job_progress)
+    
+    def add_sweep_result(self, result):
+        """Record one finished sweep backtest and print a one-line summary"""
+        stats = result['stats']
+        row = {'params': result['params']}
+        for metric in SWEEP_METRICS + ['# Trades']:
+            row[metric] = float(stats[metric]) if metric in stats and pd.notna(stats[metric]) else np.nan
+        row['stats'] = stats
+        self.sweep['rows'].append(row)
+        
+        swept_values = ", ".join(f"{name}={result['params'][name]:g}" for name in self.sweep['swept'])
+        self.results_text.insert(tk.END, f"[{len(self.sweep['rows'])}/{len(self.sweep['jobs'])}] {swept_values}: "
+                                         f"Sharpe {row['Sharpe Ratio']:.3f}, Return {row['Return [%]']:.2f}%\n")
+    
+    def update_heatmap(self):
+        if self.heatmap is not None and self.heatmap.exists():
+            rows = self.sweep['rows'] if self.sweep is not None else self.heatmap.rows
+            self.heatmap.update(rows, self.sweep_metric_var.get())
+    
+    def finish_sweep(self):
+        """Print the best combinations once every sweep job has finished"""
+        sweep = self.sweep
+        self.sweep = None
+        metric = self.sweep_metric_var.get()
+        
+        rows = [row for row in sweep['rows'] if not np.isnan(row[metric])]
+        self.results_text.insert(tk.END, f"\nSweep finished: {len(sweep['rows'])}/{len(sweep['jobs'])} "
+                                         f"backtests completed\n")
+        if not rows:
+            self.results_text.insert(tk.END, "\n")
+            return
+        
+        rows.sort(key=lambda row: row[metric], reverse=True)
+        self.results_text.insert(tk.END, f"\nTop combinations by {metric}:\n")
+        for row in rows[:5]:
+            params = ", ".join(f"{name}={row['params'][name]:g}" for name in sweep['swept'])
+            self.results_text.insert(tk.END, f"  {params}: {metric} {row[metric]:.3f}, "
+                                             f"# Trades {row['# Trades']:.0f}\n")
+        self.results_text.insert(tk.END, "\n")
         
-        # Run backtest in separate thread to prevent GUI freezing
-        thread = threading.Thread(target=self.run_backtest_thread)
-        thread.daemon = True
-        thread.start()
+        # Best run becomes the result saved by Save Results
+        self.last_result = rows[0]['stats']
+    
+    def cancel_backtest(self):
+        """Cancel queued and running backtests"""
+        if self.jobs.active():
+            self.results_text.insert(tk.END, "Cancelling...\n")
+            self.jobs.cancel()
+    
+    def display_results(self, result):
+        """Print the key performance metrics of a finished backtest"""
+        # Store results for saving
+        self.last_result = result
+        
+        # Display results
+        self.results_text.insert(tk.END, "\n" + "=" * 30 + " RESULTS " + "=" * 30 + "\n\n")
+        
+        # Key performance metrics
+        metrics = format_metrics(result)
+        
+        for metric, value in metrics:
+            self.results_text.insert(tk.END, f"{metric:<25}: {value}\n")
+        
+        self.results_text.insert(tk.END, "\n" + "=" * 66 + "\n\n")
+        self.results_text.insert(tk.END, f"Backtest completed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    
+    def on_close(self):
+        """Stop worker processes before closing the window"""
+        self.jobs.shutdown()
+        self.root.destroy()
     
     def clear_results(self):
         """Clear the results text"""
@@ -458,8 +801,9 @@ class BacktestingApp:
         if filename:
             try:
                 if filename.endswith('.csv'):
-                    # Save as CSV
-                    df = pd.DataFrame([self.last_result])
+                    # Save as CSV (a comparison is already one row per strategy)
+                    df = self.last_result if isinstance(self.last_result, pd.DataFrame) \
+                        else pd.DataFrame([self.last_result])
                     df.to_csv(filename, index=False)
                 else:
                     # Save as text
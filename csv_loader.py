@@ -0,0 +1,142 @@
+"""
+Price CSV loading for the desktop app.
+
+Parses OHLCV exports (including Nasdaq-style files with "$1,234.56" prices
+and newest-first rows) in a single read, and caches the cleaned frame in a
+Parquet sidecar next to the CSV, with the load report in a JSON one. The
+sidecars are keyed by the CSV's mtime and size, so repeat runs on an
+unchanged file skip parsing entirely. Neither format can run code when read,
+so sidecars in shared or downloaded folders are safe to open.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+# Bump when the cleaning rules change so old sidecars are ignored
+CACHE_VERSION = 1
+
+# Cleaned frames already loaded in this process, keyed by (path, mtime_ns, size)
+_memory_cache = {}
+
+
+def parse_number(value):
+    """Converter for price cells such as "$1,234.56"; unparseable cells become NaN"""
+    try:
+        return float(value.replace('$', '').replace(',', ''))
+    except (AttributeError, ValueError):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+
+def sidecar_paths(filename):
+    """Hidden cache files stored next to the CSV: (Parquet data, JSON report)"""
+    directory, name = os.path.split(os.path.abspath(filename))
+    base = os.path.join(directory, f".{name}.cache")
+    return f"{base}.parquet", f"{base}.json"
+
+
+def _file_key(filename):
+    stat = os.stat(filename)
+    return (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+
+
+def _parse_csv(filename):
+    """Read, clean and sort a price CSV; returns (data, report)"""
+    header = pd.read_csv(filename, index_col=0, nrows=0).columns
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise ValueError(f"CSV file must contain columns: {', '.join(REQUIRED_COLUMNS)} "
+                         f"(missing {', '.join(missing)})")
+
+    # Convert currency strings while reading instead of cleaning the columns afterwards
+    data = pd.read_csv(
+        filename,
+        index_col=0,
+        parse_dates=True,
+        usecols=[0] + [header.get_loc(col) + 1 for col in REQUIRED_COLUMNS],
+        converters={col: parse_number for col in PRICE_COLUMNS},
+    )[REQUIRED_COLUMNS]
+
+    # Volume is usually plain integers; only clean it when it was formatted too
+    if data['Volume'].dtype == object:
+        data['Volume'] = data['Volume'].map(parse_number)
+
+    # Remove rows with NaN values
+    original_rows = len(data)
+    data = data.dropna()
+
+    if data.empty:
+        raise ValueError("No valid numeric data found in the file")
+
+    # Check for negative or zero values
+    if (data.to_numpy() <= 0).any():
+        raise ValueError("Data contains zero or negative values")
+
+    # Sort once; newest-first exports only need reversing
+    if data.index.is_monotonic_decreasing:
+        data = data.iloc[::-1]
+    elif not data.index.is_monotonic_increasing:
+        data = data.sort_index()
+
+    report = {
+        'rows': len(data),
+        'removed_rows': original_rows - len(data),
+        'start': data.index[0],
+        'end': data.index[-1],
+        'columns': list(data.columns),
+    }
+    return data, report
+
+
+def load_price_csv(filename, use_cache=True):
+    """Load a cleaned OHLCV frame sorted oldest first; returns (data, report)
+
+    report holds rows, removed_rows, start, end, columns and from_cache.
+    Raises ValueError when the file is missing columns or holds no usable data.
+    """
+    key = _file_key(filename)
+
+    if use_cache and key in _memory_cache:
+        data, report = _memory_cache[key]
+        return data.copy(), dict(report, from_cache=True)
+
+    data_file, report_file = sidecar_paths(filename)
+    if use_cache and os.path.exists(report_file):
+        try:
+            with open(report_file) as f:
+                cached = json.load(f)
+            if cached.get('version') == CACHE_VERSION and cached.get('key') == list(key[1:]):
+                data = pd.read_parquet(data_file)
+                report = dict(cached['report'], start=data.index[0], end=data.index[-1])
+                _memory_cache[key] = (data, report)
+                return data.copy(), dict(report, from_cache=True)
+        except Exception:
+            pass  # Unreadable or stale sidecar; parse the CSV again
+
+    data, report = _parse_csv(filename)
+
+    if use_cache:
+        _memory_cache[key] = (data, report)
+        try:
+            # The report is written last, so it only ever describes a complete data file
+            data.to_parquet(f"{data_file}.tmp")
+            os.replace(f"{data_file}.tmp", data_file)
+            cached = {
+                'version': CACHE_VERSION,
+                'key': list(key[1:]),
+                'report': {name: value for name, value in report.items() if name not in ('start', 'end')},
+            }
+            with open(f"{report_file}.tmp", 'w') as f:
+                json.dump(cached, f)
+            os.replace(f"{report_file}.tmp", report_file)
+        except (OSError, ImportError, ValueError):
+            pass  # Read-only location or no Parquet engine; the in-process cache still applies
+
+    return data.copy(), dict(report, from_cache=False)
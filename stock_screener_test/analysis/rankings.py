@@ -7,42 +7,124 @@ import numpy as np
 from typing import Dict, List
 import logging
 
+# Piecewise scoring tables: (lower, upper, score) bands checked in order with
+# inclusive bounds; values matching no band get the table default.
+PE_SCORE_BANDS = (
+    (10, 20, 1.0),
+    (5, 25, 0.7),
+    (-np.inf, 30, 0.4),
+)
+RSI_SCORE_BANDS = (
+    (40, 60, 1.0),
+    (30, 70, 0.7),
+    (20, 80, 0.4),
+)
+MARKET_CAP_SCORE_BANDS = (  # In billions
+    (2, 10, 1.0),      # Mid-cap
+    (10, 50, 0.9),     # Large-cap
+    (1, 2, 0.6),       # Small-cap
+    (50, np.inf, 0.7), # Mega-cap
+)
+VOLATILITY_SCORE_BANDS = (
+    (1, 3, 1.0),       # Moderate volatility
+    (0.5, 5, 0.7),
+    (-np.inf, 8, 0.4),
+)
+
+
+def banded_score(values: np.ndarray, bands, default: float,
+                 positive_only: bool = False) -> np.ndarray:
+    """Score an array against a band table in one vectorized pass.
+
+    NaN inputs (and non-positive inputs when ``positive_only``) score 0.
+    """
+    values = np.asarray(values, dtype=float)
+    conditions = [(values >= lower) & (values <= upper) for lower, upper, _ in bands]
+    choices = [score for _, _, score in bands]
+    scores = np.select(conditions, choices, default=default)
+
+    invalid = np.isnan(values)
+    if positive_only:
+        invalid |= values <= 0
+    scores[invalid] = 0.0
+    return scores
+
+
+def min_max_normalize(values: np.ndarray, higher_is_better: bool = True) -> np.ndarray:
+    """Normalize an array to 0-1 using its finite min/max.
+
+    Missing values map to 0 and a constant array maps to 0.5.
+    """
+    values = np.asarray(values, dtype=float)
+    finite = values[np.isfinite(values)]
+
+    if finite.size == 0:
+        return np.zeros(values.shape)
+
+    min_val = finite.min()
+    max_val = finite.max()
+
+    if max_val == min_val:
+        return np.full(values.shape, 0.5)
+
+    normalized = (values - min_val) / (max_val - min_val)
+
+    if not higher_is_better:
+        normalized = 1 - normalized
+
+    return np.where(np.isnan(normalized), 0.0, normalized)
+
+
 class StockRanker:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def rank_by_composite_score(self, stocks_df: pd.DataFrame, criteria: Dict) -> pd.DataFrame:
-        """Rank stocks using a composite scoring system"""
+    def rank_by_composite_score(self, stocks_df: pd.DataFrame, criteria: Dict,
+                                top_k: int = None) -> pd.DataFrame:
+        """Rank stocks using a composite scoring system
+        
+        With ``top_k`` only the best ``top_k`` rows are selected (partial
+        selection) and sorted, so every returned row is ranked. The result's
+        ``attrs`` carry ``cutoff_score`` (score of the last row kept) and
+        ``candidates`` (rows scored).
+        """
         if stocks_df.empty:
             return stocks_df
         
         try:
-            # Initialize ranking score
-            stocks_df['ranking_score'] = 0.0
+            # Weighted section scores, accumulated on arrays
+            ranking_score = np.zeros(len(stocks_df))
             
             # Financial ranking components
             if 'financial' in criteria:
                 financial_score = self._calculate_financial_score(stocks_df, criteria['financial'])
                 stocks_df['financial_score'] = financial_score
-                stocks_df['ranking_score'] += financial_score * 0.4  # 40% weight
+                ranking_score += financial_score.to_numpy() * 0.4  # 40% weight
             
             # Technical ranking components
             if 'technical' in criteria:
                 technical_score = self._calculate_technical_score(stocks_df, criteria['technical'])
                 stocks_df['technical_score'] = technical_score
-                stocks_df['ranking_score'] += technical_score * 0.4  # 40% weight
+                ranking_score += technical_score.to_numpy() * 0.4  # 40% weight
             
             # Market/momentum ranking components
             if 'market' in criteria:
                 market_score = self._calculate_market_score(stocks_df, criteria['market'])
                 stocks_df['market_score'] = market_score
-                stocks_df['ranking_score'] += market_score * 0.2  # 20% weight
+                ranking_score += market_score.to_numpy() * 0.2  # 20% weight
             
-            # Sort by ranking score (highest first)
-            stocks_df = stocks_df.sort_values('ranking_score', ascending=False)
+            stocks_df['ranking_score'] = ranking_score
+            candidates = len(stocks_df)
+            
+            # Order by ranking score (highest first, missing scores last)
+            order = self._top_k_order(ranking_score, top_k)
+            stocks_df = stocks_df.take(order)
             
             # Add ranking position
-            stocks_df['rank'] = range(1, len(stocks_df) + 1)
+            stocks_df['rank'] = np.arange(1, len(stocks_df) + 1)
+            
+            stocks_df.attrs['cutoff_score'] = float(ranking_score[order[-1]])
+            stocks_df.attrs['candidates'] = candidates
             
             return stocks_df
             
@@ -50,114 +132,111 @@ class StockRanker:
             self.logger.error(f"Error in composite ranking: {e}")
             return stocks_df
     
+    @staticmethod
+    def _top_k_order(scores: np.ndarray, top_k: int = None) -> np.ndarray:
+        """Row positions of the best ``top_k`` scores, highest first
+        
+        Uses argpartition so only the winners are fully sorted; ties keep
+        their original row order.
+        """
+        keys = -np.where(np.isnan(scores), -np.inf, scores)
+        
+        if top_k is not None and 0 < top_k < len(keys):
+            winners = np.sort(np.argpartition(keys, top_k - 1)[:top_k])
+        else:
+            winners = np.arange(len(keys))
+        
+        return winners[np.argsort(keys[winners], kind='stable')]
+    
     def _calculate_financial_score(self, stocks_df: pd.DataFrame, financial_criteria: Dict) -> pd.Series:
         """Calculate financial component of ranking score"""
-        score = pd.Series(0.0, index=stocks_df.index)
+        score = np.zeros(len(stocks_df))
         
         # ROE scoring
         if 'roe' in stocks_df.columns:
-            roe_scores = self._normalize_metric(stocks_df['roe'], higher_is_better=True)
-            score += roe_scores * 0.3
+            score += min_max_normalize(self._as_array(stocks_df['roe'])) * 0.3
         
         # P/E ratio scoring (lower is better, but not too low)
         if 'pe_ratio' in stocks_df.columns:
             # Ideal P/E range is 10-20
-            pe_scores = stocks_df['pe_ratio'].apply(self._pe_scoring_function)
-            pe_scores = (pe_scores - pe_scores.min()) / (pe_scores.max() - pe_scores.min())
-            score += pe_scores * 0.25
+            pe_scores = banded_score(self._as_array(stocks_df['pe_ratio']), PE_SCORE_BANDS,
+                                     default=0.1, positive_only=True)
+            score += min_max_normalize(pe_scores) * 0.25
         
         # Debt-to-equity scoring (lower is better)
         if 'debt_to_equity' in stocks_df.columns:
-            debt_scores = self._normalize_metric(stocks_df['debt_to_equity'], higher_is_better=False)
-            score += debt_scores * 0.2
+            score += min_max_normalize(self._as_array(stocks_df['debt_to_equity']),
+                                       higher_is_better=False) * 0.2
         
         # Net margin scoring
         if 'net_margin' in stocks_df.columns:
-            margin_scores = self._normalize_metric(stocks_df['net_margin'], higher_is_better=True)
-            score += margin_scores * 0.25
+            score += min_max_normalize(self._as_array(stocks_df['net_margin'])) * 0.25
         
-        return score
+        return pd.Series(score, index=stocks_df.index)
     
     def _calculate_technical_score(self, stocks_df: pd.DataFrame, technical_criteria: Dict) -> pd.Series:
         """Calculate technical component of ranking score"""
-        score = pd.Series(0.0, index=stocks_df.index)
+        score = np.zeros(len(stocks_df))
         
         # Price momentum scoring
         momentum_weight = 0.4
         if 'price_change_1d' in stocks_df.columns:
-            momentum_scores = self._normalize_metric(stocks_df['price_change_1d'], higher_is_better=True)
+            momentum_scores = min_max_normalize(self._as_array(stocks_df['price_change_1d']))
             score += momentum_scores * momentum_weight * 0.3
         
         if 'price_change_1m' in stocks_df.columns:
-            momentum_scores = self._normalize_metric(stocks_df['price_change_1m'], higher_is_better=True)
+            momentum_scores = min_max_normalize(self._as_array(stocks_df['price_change_1m']))
             score += momentum_scores * momentum_weight * 0.7
         
         # RSI scoring (prefer values between 30-70, avoid extremes)
         if 'rsi' in stocks_df.columns:
-            rsi_scores = stocks_df['rsi'].apply(self._rsi_scoring_function)
-            rsi_scores = (rsi_scores - rsi_scores.min()) / (rsi_scores.max() - rsi_scores.min())
-            score += rsi_scores * 0.2
+            rsi_scores = banded_score(self._as_array(stocks_df['rsi']), RSI_SCORE_BANDS, default=0.1)
+            score += min_max_normalize(rsi_scores) * 0.2
         
         # Volume scoring
         if 'volume_ratio' in stocks_df.columns:
-            volume_scores = self._normalize_metric(stocks_df['volume_ratio'], higher_is_better=True)
-            score += volume_scores * 0.2
+            score += min_max_normalize(self._as_array(stocks_df['volume_ratio'])) * 0.2
         
         # Moving average position scoring
         if 'price_above_ma20' in stocks_df.columns:
-            ma_scores = stocks_df['price_above_ma20'].astype(float)
-            score += ma_scores * 0.2
+            score += self._as_array(stocks_df['price_above_ma20']) * 0.2
         
-        return score
+        return pd.Series(score, index=stocks_df.index)
     
     def _calculate_market_score(self, stocks_df: pd.DataFrame, market_criteria: Dict) -> pd.Series:
         """Calculate market component of ranking score"""
-        score = pd.Series(0.0, index=stocks_df.index)
+        score = np.zeros(len(stocks_df))
         
         # Market cap scoring (prefer mid-cap to large-cap for growth)
         if 'market_cap' in stocks_df.columns:
-            market_cap_scores = stocks_df['market_cap'].apply(self._market_cap_scoring_function)
-            market_cap_scores = (market_cap_scores - market_cap_scores.min()) / (market_cap_scores.max() - market_cap_scores.min())
-            score += market_cap_scores * 0.5
+            market_cap_scores = banded_score(self._as_array(stocks_df['market_cap']) / 1e9,
+                                             MARKET_CAP_SCORE_BANDS, default=0.3, positive_only=True)
+            score += min_max_normalize(market_cap_scores) * 0.5
         
         # Volatility scoring (prefer moderate volatility)
         if 'atr_percent' in stocks_df.columns:
-            vol_scores = stocks_df['atr_percent'].apply(self._volatility_scoring_function)
-            vol_scores = (vol_scores - vol_scores.min()) / (vol_scores.max() - vol_scores.min())
-            score += vol_scores * 0.3
+            vol_scores = banded_score(self._as_array(stocks_df['atr_percent']),
+                                      VOLATILITY_SCORE_BANDS, default=0.1)
+            score += min_max_normalize(vol_scores) * 0.3
         
         # Quality score if available
         if 'quality_score' in stocks_df.columns:
-            quality_scores = self._normalize_metric(stocks_df['quality_score'], higher_is_better=True)
-            score += quality_scores * 0.2
+            score += min_max_normalize(self._as_array(stocks_df['quality_score'])) * 0.2
         
-        return score
+        return pd.Series(score, index=stocks_df.index)
     
     def _normalize_metric(self, series: pd.Series, higher_is_better: bool = True) -> pd.Series:
         """Normalize a metric to 0-1 scale"""
-        if series.isna().all():
-            return pd.Series(0.0, index=series.index)
-        
-        series_clean = series.replace([np.inf, -np.inf], np.nan).dropna()
-        
-        if len(series_clean) == 0:
-            return pd.Series(0.0, index=series.index)
-        
-        min_val = series_clean.min()
-        max_val = series_clean.max()
-        
-        if max_val == min_val:
-            return pd.Series(0.5, index=series.index)
-        
-        normalized = (series - min_val) / (max_val - min_val)
-        
-        if not higher_is_better:
-            normalized = 1 - normalized
-        
-        return normalized.fillna(0)
+        return pd.Series(min_max_normalize(self._as_array(series), higher_is_better),
+                         index=series.index)
+    
+    @staticmethod
+    def _as_array(series: pd.Series) -> np.ndarray:
+        """Float view of a metric column, with None/NA as NaN"""
+        return series.to_numpy(dtype=float, na_value=np.nan)
     
     def _pe_scoring_function(self, pe: float) -> float:
-        """Scoring function for P/E ratio (prefers moderate values)"""
+        """Scalar P/E score, kept as the reference for PE_SCORE_BANDS"""
         if pd.isna(pe) or pe <= 0:
             return 0
         
@@ -171,7 +250,7 @@ class StockRanker:
             return 0.1
     
     def _rsi_scoring_function(self, rsi: float) -> float:
-        """Scoring function for RSI (prefers non-extreme values)"""
+        """Scalar RSI score, kept as the reference for RSI_SCORE_BANDS"""
         if pd.isna(rsi):
             return 0
         
@@ -185,7 +264,7 @@ class StockRanker:
             return 0.1
     
     def _market_cap_scoring_function(self, market_cap: float) -> float:
-        """Scoring function for market cap (prefers mid to large cap)"""
+        """Scalar market cap score, kept as the reference for MARKET_CAP_SCORE_BANDS"""
         if pd.isna(market_cap) or market_cap <= 0:
             return 0
         
@@ -204,7 +283,7 @@ class StockRanker:
             return 0.3
     
     def _volatility_scoring_function(self, volatility: float) -> float:
-        """Scoring function for volatility (prefers moderate volatility)"""
+        """Scalar volatility score, kept as the reference for VOLATILITY_SCORE_BANDS"""
         if pd.isna(volatility):
             return 0
         
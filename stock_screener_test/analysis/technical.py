@@ -5,13 +5,16 @@ Technical analysis calculations
 import pandas as pd
 import numpy as np
 import talib as ta
-from typing import Dict
+from typing import Dict, Tuple
 import logging
 
 class TechnicalAnalysis:
     def __init__(self, futu_client):
         self.futu_client = futu_client
         self.logger = logging.getLogger(__name__)
+        
+        # Daily-bar indicators, reused until the underlying bars change
+        self._metrics_cache: Dict[str, Tuple[tuple, Dict]] = {}
     
     def get_technical_metrics(self, stock_code: str) -> Dict:
         """Calculate technical indicators for a stock"""
@@ -34,6 +37,12 @@ class TechnicalAnalysis:
             low = hist_data['low'].values
             volume = hist_data['volume'].values
             
+            # Reuse indicators if the bars are unchanged since the last run
+            bars_version = self._bars_version(hist_data)
+            cached = self._metrics_cache.get(stock_code)
+            if cached is not None and cached[0] == bars_version:
+                return dict(cached[1])
+            
             metrics = {}
             
             # Price change metrics
@@ -128,12 +137,21 @@ class TechnicalAnalysis:
                 if not np.isnan(cci[-1]):
                     metrics['cci'] = cci[-1]
             
-            return metrics
+            self._metrics_cache[stock_code] = (bars_version, metrics)
+            
+            return dict(metrics)
             
         except Exception as e:
             self.logger.error(f"Error calculating technical metrics for {stock_code}: {e}")
             return {}
     
+    @staticmethod
+    def _bars_version(hist_data: pd.DataFrame) -> tuple:
+        """Identify a bar series by length, last bar time and last bar values"""
+        last = hist_data.iloc[-1]
+        return (len(hist_data), last.get('time_key'), last['close'], last['high'],
+                last['low'], last['volume'])
+    
     def calculate_volatility(self, hist_data: pd.DataFrame, periods: int = 20) -> float:
         """Calculate historical volatility"""
         if len(hist_data) < periods:
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming Excel export against cell-by-cell writing
+Run: python benchmarks/bench_excel_export.py [--sizes 1000,20000] [--metrics 40]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import openpyxl
+from openpyxl.styles import Border, Side
+
+# Add the screener root and benchmarks dir to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_rankings import make_candidates
+from output.excel_export import ExcelReporter
+
+
+def make_results(n: int, metrics: int):
+    """Ranked screening frame with extra metric columns"""
+    rng = np.random.default_rng(7)
+    df = make_candidates(n)
+    for i in range(metrics):
+        df[f"metric_{i:02d}"] = rng.normal(0, 1, n)
+    df['ranking_score'] = rng.random(n)
+    df['rank'] = np.arange(1, n + 1)
+    return df
+
+
+def legacy_export(reporter: ExcelReporter, results_df, output_file: str):
+    """Cell-by-cell writer: one sheet, per-cell borders, width scan over cells"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    display_df = results_df[reporter._get_display_columns(results_df)].round(2)
+    border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                    top=Side(style='thin'), bottom=Side(style='thin'))
+
+    for col, header in enumerate(display_df.columns, 1):
+        ws.cell(row=4, column=col, value=header)
+    for row_idx, (_, row) in enumerate(display_df.iterrows(), 5):
+        for col_idx, value in enumerate(row, 1):
+            ws.cell(row=row_idx, column=col_idx, value=value).border = border
+
+    for column in ws.columns:
+        max_length = max((len(str(cell.value)) for cell in column if cell.value), default=0)
+        ws.column_dimensions[column[0].column_letter].width = min(max_length + 2, 30)
+
+    wb.save(output_file)
+
+
+def time_call(func) -> float:
+    """Wall time in seconds"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Excel export benchmark')
+    parser.add_argument('--sizes', default='1000,5000,20000',
+                       help='Comma-separated result row counts')
+    parser.add_argument('--metrics', type=int, default=40,
+                       help='Extra metric columns per row')
+    args = parser.parse_args()
+
+    reporter = ExcelReporter()
+
+    print(f"{'rows':>8} {'legacy s':>10} {'stream s':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(s) for s in args.sizes.split(',')]:
+            results_df = make_results(n, args.metrics)
+
+            legacy_s = time_call(lambda: legacy_export(reporter, results_df, os.path.join(tmp, 'legacy.xlsx')))
+            stream_s = time_call(lambda: reporter.generate_report({'benchmark': results_df},
+                                                                  os.path.join(tmp, 'stream.xlsx')))
+
+            print(f"{n:>8} {legacy_s:>10.2f} {stream_s:>10.2f} {legacy_s / stream_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
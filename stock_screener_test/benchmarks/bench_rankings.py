@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark vectorized StockRanker scoring against the row-wise scorers
+Run: python benchmarks/bench_rankings.py [--sizes 1000,5000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+# Add the screener root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis.rankings import StockRanker
+
+
+def make_candidates(n: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic screening frame covering every metric the ranker scores"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'symbol': [f"US.SYM{i:05d}" for i in range(n)],
+        'roe': rng.normal(12, 10, n),
+        'pe_ratio': rng.lognormal(3, 0.6, n) * rng.choice([1, -1], n, p=[0.9, 0.1]),
+        'debt_to_equity': rng.gamma(2, 0.4, n),
+        'net_margin': rng.normal(8, 12, n),
+        'price_change_1d': rng.normal(0, 2.5, n),
+        'price_change_1m': rng.normal(1, 9, n),
+        'rsi': rng.uniform(5, 95, n),
+        'volume_ratio': rng.lognormal(0, 0.5, n),
+        'price_above_ma20': rng.random(n) > 0.5,
+        'market_cap': rng.lognormal(22, 1.8, n),
+        'atr_percent': rng.gamma(2, 1.5, n),
+        'quality_score': rng.uniform(0, 100, n),
+    })
+    # Sprinkle missing values the way sparse API responses do
+    for col in ['roe', 'pe_ratio', 'rsi', 'market_cap', 'atr_percent']:
+        df.loc[rng.random(n) < 0.05, col] = np.nan
+    return df
+
+
+def legacy_scores(ranker: StockRanker, df: pd.DataFrame, criteria: dict) -> pd.Series:
+    """Composite score computed with the original Series.apply scorers"""
+
+    def normalize(series: pd.Series) -> pd.Series:
+        return (series - series.min()) / (series.max() - series.min())
+
+    total = pd.Series(0.0, index=df.index)
+
+    if 'financial' in criteria:
+        score = pd.Series(0.0, index=df.index)
+        score += ranker._normalize_metric(df['roe']) * 0.3
+        score += normalize(df['pe_ratio'].apply(ranker._pe_scoring_function)) * 0.25
+        score += ranker._normalize_metric(df['debt_to_equity'], higher_is_better=False) * 0.2
+        score += ranker._normalize_metric(df['net_margin']) * 0.25
+        total += score * 0.4
+
+    if 'technical' in criteria:
+        score = pd.Series(0.0, index=df.index)
+        score += ranker._normalize_metric(df['price_change_1d']) * 0.4 * 0.3
+        score += ranker._normalize_metric(df['price_change_1m']) * 0.4 * 0.7
+        score += normalize(df['rsi'].apply(ranker._rsi_scoring_function)) * 0.2
+        score += ranker._normalize_metric(df['volume_ratio']) * 0.2
+        score += df['price_above_ma20'].astype(float) * 0.2
+        total += score * 0.4
+
+    if 'market' in criteria:
+        score = pd.Series(0.0, index=df.index)
+        score += normalize(df['market_cap'].apply(ranker._market_cap_scoring_function)) * 0.5
+        score += normalize(df['atr_percent'].apply(ranker._volatility_scoring_function)) * 0.3
+        score += ranker._normalize_metric(df['quality_score']) * 0.2
+        total += score * 0.2
+
+    return total
+
+
+def vector_scores(ranker: StockRanker, df: pd.DataFrame, criteria: dict) -> np.ndarray:
+    """Composite score computed with the vectorized section scorers"""
+    total = np.zeros(len(df))
+    if 'financial' in criteria:
+        total += ranker._calculate_financial_score(df, criteria['financial']).to_numpy() * 0.4
+    if 'technical' in criteria:
+        total += ranker._calculate_technical_score(df, criteria['technical']).to_numpy() * 0.4
+    if 'market' in criteria:
+        total += ranker._calculate_market_score(df, criteria['market']).to_numpy() * 0.2
+    return total
+
+
+def time_call(func, repeat: int) -> float:
+    """Best-of-N wall time in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='StockRanker scoring benchmark')
+    parser.add_argument('--sizes', default='1000,5000,20000',
+                       help='Comma-separated candidate counts')
+    parser.add_argument('--repeat', type=int, default=5,
+                       help='Timing repetitions (best is reported)')
+    parser.add_argument('--strategies-file', default='config/strategies.yaml',
+                       help='Strategies file path')
+    args = parser.parse_args()
+
+    with open(args.strategies_file, 'r') as f:
+        strategies = yaml.safe_load(f)
+
+    ranker = StockRanker()
+
+    print(f"{'rows':>8} {'strategy':<20} {'legacy ms':>10} {'vector ms':>10} {'speedup':>8} {'max diff':>10}")
+    for n in [int(s) for s in args.sizes.split(',')]:
+        candidates = make_candidates(n)
+
+        for strategy_name, criteria in strategies.items():
+            expected = legacy_scores(ranker, candidates, criteria)
+            actual = ranker.rank_by_composite_score(candidates.copy(), criteria)['ranking_score'].sort_index()
+
+            max_diff = float(np.nanmax(np.abs(actual.values - expected.values)))
+            if not np.allclose(actual.values, expected.values, equal_nan=True):
+                raise AssertionError(f"{strategy_name}: vectorized scores diverge (max diff {max_diff})")
+
+            legacy_ms = time_call(lambda: legacy_scores(ranker, candidates, criteria), args.repeat)
+            vector_ms = time_call(lambda: vector_scores(ranker, candidates, criteria), args.repeat)
+
+            print(f"{n:>8} {strategy_name:<20} {legacy_ms:>10.2f} {vector_ms:>10.2f} "
+                  f"{legacy_ms / vector_ms:>7.1f}x {max_diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+End-to-end screening benchmark against the local OpenD simulator
+Run: python benchmarks/bench_screening.py [--symbols 5000] [--strategy value_stocks] [--runs 2]
+
+Each run goes through main.run_screening with a warm ScreeningSession, so
+later runs show the incremental cache at work. Stage timings, OpenD calls and
+per-symbol latency come from the run's metrics record; the simulator reports
+calls it throttled under OpenD's limits (with --rate-limits).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+SCREENER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SCREENER_DIR)
+sys.path.append(os.path.join(os.path.dirname(SCREENER_DIR), 'FutuAPI'))
+
+import main as screener_main
+from data.bar_store import BarStore
+from opend_simulator import OpenDSimulator, SimMarket, DEFAULT_RATE_LIMITS
+
+
+def load_history(root: str, ktype: str = 'K_DAY') -> dict:
+    """Recorded daily bars from a BarStore, to serve instead of synthetic ones"""
+    store = BarStore(root)
+    return {code: store.read_kline(code, ktype) for code in store.codes(ktype)}
+
+
+def print_run(run: int, record: dict):
+    latency = record['symbol_latency']
+    print(f"\nRun {run}: {record['total_seconds']:.2f}s, {latency['count']} symbols, "
+          f"p50 {latency['p50']}s, p95 {latency['p95']}s per symbol")
+
+    stages = pd.DataFrame(record['stages']).T
+    worker = pd.DataFrame(record['worker_stages']).T
+    if not worker.empty:
+        worker.index = [f"{name} (summed)" for name in worker.index]
+    print(pd.concat([stages, worker]).to_string(float_format='{:,.3f}'.format))
+
+    calls = pd.DataFrame(record['opend_calls']).T
+    if not calls.empty:
+        print(calls.sort_values('calls', ascending=False).to_string(float_format='{:,.3f}'.format))
+
+    cache = pd.DataFrame(record['cache']).T
+    if not cache.empty:
+        print(cache.to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end screening benchmark on a simulated OpenD')
+    parser.add_argument('--symbols', type=int, default=5000, help='Simulated stocks per market')
+    parser.add_argument('--market', default='US', help='Market to screen (US/HK/CN)')
+    parser.add_argument('--strategy', default='value_stocks',
+                        help='Screening strategy (or comma-separated list, or all)')
+    parser.add_argument('--runs', type=int, default=2, help='Screening runs on one warm session')
+    parser.add_argument('--max-workers', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Mean simulated OpenD latency per call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Standard deviation of the latency')
+    parser.add_argument('--rate-limits', action='store_true',
+                        help="Enforce OpenD's per-30-second request limits")
+    parser.add_argument('--no-server-filter', action='store_true',
+                        help='Fetch every stock instead of pruning the universe on OpenD first')
+    parser.add_argument('--bar-store', help='Serve recorded daily bars from this bar store')
+    parser.add_argument('--config', default=os.path.join(SCREENER_DIR, 'config/settings.yaml'))
+    parser.add_argument('--strategies-file', default=os.path.join(SCREENER_DIR, 'config/strategies.yaml'))
+    args = parser.parse_args()
+
+    settings = screener_main.load_config(args.config)
+    strategies = screener_main.load_strategies(args.strategies_file)
+    logging.basicConfig(level=logging.WARNING)
+
+    markets = {'CN': ('SH', 'SZ')}.get(args.market.upper(), (args.market.upper(),))
+    history = load_history(args.bar_store) if args.bar_store else None
+    sim = OpenDSimulator(SimMarket(n_symbols=args.symbols, markets=markets, history=history),
+                         latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         rate_limits=DEFAULT_RATE_LIMITS if args.rate_limits else {})
+    start = time.perf_counter()
+    sim.market.build_all()
+    print(f"Built {len(sim.market.all_codes())} simulated stocks in {time.perf_counter() - start:.1f}s")
+
+    # Caches, exports and the metrics file stay out of the working tree
+    workdir = tempfile.mkdtemp(prefix='bench_screening_')
+    os.chdir(workdir)
+    metrics_path = os.path.join(workdir, 'screener_metrics.jsonl')
+    settings['output']['save_path'] = os.path.join(workdir, 'results')
+    settings['archive'] = {'enabled': False}
+    settings['metrics'] = {'enabled': True, 'path': metrics_path}
+    if args.no_server_filter:
+        settings['server_filter'] = {'enabled': False}
+
+    screen_args = screener_main.build_parser().parse_args([
+        '--market', args.market, '--strategy', args.strategy, '--output', 'csv',
+        '--max-workers', str(args.max_workers), '--max-results', '50',
+    ])
+
+    print(f"Screening {args.symbols} simulated {args.market} stocks with {args.strategy} "
+          f"(latency {args.latency_ms}ms, rate limits {'on' if args.rate_limits else 'off'})")
+    with sim.patch():
+        session = screener_main.ScreeningSession(settings, strategies,
+                                                 os.path.join(SCREENER_DIR, 'config/watchlists.yaml'))
+        try:
+            for run in range(1, args.runs + 1):
+                start = time.perf_counter()
+                results = screener_main.run_screening(screen_args, settings, strategies, session=session)
+                elapsed = time.perf_counter() - start
+
+                with open(metrics_path) as f:
+                    record = json.loads(f.readlines()[-1])
+                print_run(run, record)
+                found = {name: len(df) for name, df in results.items()}
+                print(f"Results: {found} in {elapsed:.2f}s")
+        finally:
+            session.close()
+
+    requests, _ = sim.stats()
+    print("\nSimulator requests")
+    print(requests.to_string())
+    print(f"\nOutput in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
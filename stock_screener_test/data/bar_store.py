@@ -0,0 +1,165 @@
+"""
+Local columnar store of downloaded K-line bars, one directory per K-line type and code
+"""
+
+import pandas as pd
+import logging
+from typing import List, Optional
+import glob
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Futu columns kept in the store; code and K-line type live in the path
+BAR_COLUMNS = ['time_key', 'open', 'close', 'high', 'low', 'volume', 'turnover',
+               'pe_ratio', 'turnover_rate', 'change_rate', 'last_close']
+
+# Store column -> backtesting.py column
+OHLCV_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+class BarStore:
+    """Parquet bars laid out as <root>/ktype=<K_DAY>/code=<HK.00700>/
+
+    Downloaded pages land as part-NNNNNN.parquet files and are merged into
+    bars.parquet once a code's download completes. Readers see the merged
+    file plus any pending parts, deduplicated on time_key. Part numbers only
+    grow until the next compaction, so later parts hold later downloads.
+    """
+
+    def __init__(self, root: str = './data_store/bars/'):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+
+        if not PYARROW_AVAILABLE:
+            self.logger.warning("pyarrow not available. Bar store is disabled.")
+
+    def _code_dir(self, code: str, ktype: str) -> str:
+        return os.path.join(self.root, f"ktype={ktype}", f"code={code}")
+
+    def _files(self, code: str, ktype: str) -> List[str]:
+        directory = self._code_dir(code, ktype)
+        merged = os.path.join(directory, 'bars.parquet')
+        files = [merged] if os.path.exists(merged) else []
+        return files + sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+
+    @staticmethod
+    def _write(table: 'pa.Table', path: str):
+        """Write under a hidden temporary name so readers never see a partial file"""
+        directory, name = os.path.split(path)
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+
+    def _to_table(self, bars: pd.DataFrame) -> 'pa.Table':
+        """Normalize a Futu K-line page so every file shares one schema"""
+        df = pd.DataFrame({'time_key': pd.to_datetime(bars['time_key']).astype('datetime64[ns]')})
+        for col in BAR_COLUMNS[1:]:
+            if col == 'volume':
+                df[col] = bars[col].astype('int64') if col in bars else 0
+            else:
+                df[col] = bars[col].astype('float64') if col in bars else float('nan')
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def last_part(self, code: str, ktype: str) -> int:
+        """Highest pending part number, 0 when there are none"""
+        parts = [os.path.basename(path) for path in self._files(code, ktype)
+                 if os.path.basename(path).startswith('part-')]
+        return int(parts[-1][len('part-'):-len('.parquet')]) if parts else 0
+
+    def write_page(self, code: str, ktype: str, page_no: int, bars: pd.DataFrame):
+        """Persist one downloaded page; rewriting the same page number replaces it"""
+        if not PYARROW_AVAILABLE or bars.empty:
+            return
+
+        directory = self._code_dir(code, ktype)
+        os.makedirs(directory, exist_ok=True)
+        self._write(self._to_table(bars), os.path.join(directory, f"part-{page_no:06d}.parquet"))
+
+    def compact(self, code: str, ktype: str) -> int:
+        """Merge pending pages into bars.parquet; returns the stored bar count"""
+        if not PYARROW_AVAILABLE:
+            return 0
+
+        files = self._files(code, ktype)
+        parts = [path for path in files if os.path.basename(path).startswith('part-')]
+        if not parts:
+            return pq.ParquetFile(files[0]).metadata.num_rows if files else 0
+
+        # Later pages win when a resumed download refetched overlapping bars
+        df = pd.concat([pq.read_table(path).to_pandas() for path in files], ignore_index=True)
+        df = df.drop_duplicates('time_key', keep='last').sort_values('time_key', ignore_index=True)
+
+        self._write(pa.Table.from_pandas(df, preserve_index=False),
+                    os.path.join(self._code_dir(code, ktype), 'bars.parquet'))
+        for path in parts:
+            os.remove(path)
+
+        return len(df)
+
+    def read_bars(self, code: str, ktype: str = 'K_DAY', start: str = None, end: str = None,
+                  columns: List[str] = None) -> pd.DataFrame:
+        """Stored bars oldest first, with time_key as a timestamp"""
+        try:
+            files = self._files(code, ktype) if PYARROW_AVAILABLE else []
+            if not files:
+                return pd.DataFrame()
+
+            filters = []
+            if start:
+                filters.append(('time_key', '>=', pd.Timestamp(start)))
+            if end:
+                # Date-only end bounds include that whole day
+                end_time = pd.Timestamp(end)
+                if len(str(end)) <= 10:
+                    end_time += pd.Timedelta(days=1) - pd.Timedelta(1)
+                filters.append(('time_key', '<=', end_time))
+            if columns:
+                columns = ['time_key'] + [col for col in columns if col != 'time_key']
+
+            df = pd.concat([pq.read_table(path, columns=columns, filters=filters or None).to_pandas()
+                            for path in files], ignore_index=True)
+            if len(files) > 1:
+                df = df.drop_duplicates('time_key', keep='last')
+            return df.sort_values('time_key', ignore_index=True)
+
+        except Exception as e:
+            self.logger.error(f"Error reading stored bars for {code} {ktype}: {e}")
+            return pd.DataFrame()
+
+    def read_kline(self, code: str, ktype: str = 'K_DAY', count: int = None) -> pd.DataFrame:
+        """Latest bars shaped like a get_history_kline response (code and string time_key)"""
+        df = self.read_bars(code, ktype)
+        if df.empty:
+            return df
+        if count:
+            df = df.tail(count).reset_index(drop=True)
+
+        df['time_key'] = df['time_key'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        df.insert(0, 'code', code)
+        return df
+
+    def read_ohlcv(self, code: str, ktype: str = 'K_DAY', start: str = None,
+                   end: str = None) -> pd.DataFrame:
+        """Bars as an Open/High/Low/Close/Volume frame indexed by time, as backtesting.py expects"""
+        df = self.read_bars(code, ktype, start, end, columns=list(OHLCV_COLUMNS))
+        if df.empty:
+            return df
+        return df.set_index('time_key').rename(columns=OHLCV_COLUMNS)[list(OHLCV_COLUMNS.values())]
+
+    def last_time(self, code: str, ktype: str = 'K_DAY') -> Optional[pd.Timestamp]:
+        """Timestamp of the newest stored bar, or None when nothing is stored"""
+        df = self.read_bars(code, ktype, columns=['time_key'])
+        return None if df.empty else df['time_key'].iloc[-1]
+
+    def codes(self, ktype: str = 'K_DAY') -> List[str]:
+        """Codes with stored bars for a K-line type"""
+        directory = os.path.join(self.root, f"ktype={ktype}")
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[len('code='):] for name in os.listdir(directory)
+                      if name.startswith('code=') and self._files(name[len('code='):], ktype))
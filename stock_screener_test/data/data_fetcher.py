@@ -8,7 +8,10 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import logging
+import re
+import run_metrics
 from .futu_client import FutuClient
+from .record_store import HistoryPanel
 
 class DataFetcher:
     def __init__(self, futu_client: FutuClient, cache_config: Dict):
@@ -17,6 +20,9 @@ class DataFetcher:
         self.cache_ttl = cache_config.get('ttl_minutes', 30)
         self.cache_dir = 'cache'
         
+        # Price histories live here rather than inside per-stock records
+        self.history_panel = HistoryPanel()
+        
         self.logger = logging.getLogger(__name__)
         
         # Create cache directory if it doesn't exist
@@ -41,16 +47,20 @@ class DataFetcher:
             return None
         
         cache_path = self._get_cache_path(key)
+        # Key type without the code or market, e.g. stock_data_HK.00700 -> stock_data
+        key_type = f"fetcher:{re.match(r'[a-z_]+?(?=_[A-Z0-9]|$)', key).group()}"
         
         if self._is_cache_valid(cache_path):
             try:
                 with open(cache_path, 'rb') as f:
                     data = pickle.load(f)
                     self.logger.debug(f"Loaded {key} from cache")
+                    run_metrics.record_cache(key_type, True)
                     return data
             except Exception as e:
                 self.logger.warning(f"Failed to load cache for {key}: {e}")
         
+        run_metrics.record_cache(key_type, False)
         return None
     
     def _save_to_cache(self, key: str, data: any):
@@ -110,9 +120,7 @@ class DataFetcher:
         
         # Historical data if requested
         if include_history:
-            hist_data = self.futu_client.get_historical_data(stock_code, '3M')
-            if not hist_data.empty:
-                stock_data['historical_data'] = hist_data
+            self.get_history(stock_code)
         
         # Add metadata
         stock_data['symbol'] = stock_code
@@ -123,6 +131,16 @@ class DataFetcher:
         
         return stock_data
     
+    def get_history(self, stock_code: str, period: str = '3M') -> pd.DataFrame:
+        """Get price history from the panel, fetching it on first use"""
+        hist_data = self.history_panel.get(stock_code)
+        if hist_data is not None:
+            return hist_data
+        
+        hist_data = self.futu_client.get_historical_data(stock_code, period)
+        self.history_panel.put(stock_code, hist_data)
+        return hist_data
+    
     def get_batch_quotes(self, stock_codes: List[str]) -> pd.DataFrame:
         """Get batch quotes with caching"""
         cache_key = f"batch_quotes_{len(stock_codes)}_{hash(tuple(sorted(stock_codes)))}"
@@ -7,14 +7,19 @@ import pandas as pd
 import logging
 from typing import List, Dict, Optional
 import time
+import run_metrics
 
 class FutuClient:
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, bar_store=None, bar_store_max_age_days: int = 3):
         """Initialize Futu client with configuration"""
         self.host = config.get('host', '127.0.0.1')
         self.port = config.get('port', 11111)
         self.timeout = config.get('timeout', 10)
         
+        # Downloaded bars (see download_history.py) replace get_history_kline while fresh
+        self.bar_store = bar_store
+        self.bar_store_max_age_days = bar_store_max_age_days
+        
         self.logger = logging.getLogger(__name__)
         
         # Initialize contexts
@@ -26,7 +31,9 @@ class FutuClient:
     def _connect(self):
         """Establish connection to Futu OpenAPI"""
         try:
-            self.quote_ctx = ft.OpenQuoteContext(host=self.host, port=self.port)
+            # Calls are counted per endpoint while a screening run collects metrics
+            self.quote_ctx = run_metrics.InstrumentedContext(
+                ft.OpenQuoteContext(host=self.host, port=self.port))
             self.logger.info(f"Connected to Futu OpenAPI at {self.host}:{self.port}")
         except Exception as e:
             self.logger.error(f"Failed to connect to Futu OpenAPI: {e}")
@@ -130,6 +137,10 @@ class FutuClient:
                 ktype = ft.KLType.K_DAY
                 num = 30
             
+            stored = self._get_stored_bars(stock_code, ktype, num)
+            if not stored.empty:
+                return stored
+            
             ret, data = self.quote_ctx.get_history_kline(stock_code, 
                                                         start=None, 
                                                         end=None, 
@@ -147,6 +158,20 @@ class FutuClient:
             self.logger.error(f"Error getting historical data for {stock_code}: {e}")
             return pd.DataFrame()
     
+    def _get_stored_bars(self, stock_code: str, ktype: str, num: int) -> pd.DataFrame:
+        """Latest bars from the local bar store when it covers the request and is recent"""
+        if self.bar_store is None:
+            return pd.DataFrame()
+        
+        data = self.bar_store.read_kline(stock_code, ktype, num)
+        if len(data) < num:
+            return pd.DataFrame()
+        
+        age = pd.Timestamp.now() - pd.Timestamp(data['time_key'].iloc[-1])
+        if age > pd.Timedelta(days=self.bar_store_max_age_days):
+            return pd.DataFrame()
+        return data
+    
     def get_financial_data(self, stock_code: str) -> Dict:
         """Get financial statement data"""
         try:
@@ -0,0 +1,254 @@
+"""
+Bulk K-line history download into the local bar store
+"""
+
+import futu as ft
+import pandas as pd
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+import run_metrics
+from .bar_store import BarStore
+
+# OpenD allows 60 request_history_kline calls per 30 seconds
+HISTORY_REQUEST_LIMIT = 60
+HISTORY_REQUEST_WINDOW = 30
+
+# Largest page request_history_kline returns
+MAX_PAGE_SIZE = 1000
+
+class RateLimiter:
+    """Sliding-window limiter shared by all download threads"""
+
+    def __init__(self, max_requests: int = HISTORY_REQUEST_LIMIT,
+                 window_seconds: float = HISTORY_REQUEST_WINDOW, name: str = 'request_history_kline'):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.name = name
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until another request fits in the window"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.window_seconds:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_requests:
+                    self._calls.append(now)
+                    return
+                wait = self.window_seconds - (now - self._calls[0])
+            run_metrics.record_wait(self.name, wait)
+            time.sleep(wait)
+
+class HistoryDownloader:
+    """Download K-line history for many codes and K-line types concurrently
+
+    Each (code, ktype) job pages through request_history_kline with large
+    pages, and jobs run side by side under one shared rate limit. Every
+    page is written to the bar store before its page_req_key is saved to
+    the checkpoint file, so an interrupted download resumes at the next
+    page instead of starting over. An unfinished job is always resumed with
+    the start and end it was planned with, then continued to a later end if
+    one was asked for. Each job numbers its pages after the parts already
+    pending, so it never overwrites bars another job left behind.
+    """
+
+    def __init__(self, quote_ctx, store: BarStore, checkpoint_path: str = './data_store/history_checkpoint.json',
+                 max_workers: int = 4, page_size: int = MAX_PAGE_SIZE, retries: int = 3,
+                 rate_limiter: RateLimiter = None):
+        self.quote_ctx = quote_ctx
+        self.store = store
+        self.checkpoint_path = checkpoint_path
+        self.max_workers = max_workers
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.retries = retries
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+        self.logger = logging.getLogger(__name__)
+
+        self._checkpoint_lock = threading.Lock()
+        self._checkpoint = self._load_checkpoint()
+
+    def _load_checkpoint(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return {}
+
+    def _save_checkpoint(self, key: str, state: Optional[Dict]):
+        """Update or clear one job's state and rewrite the checkpoint file atomically"""
+        with self._checkpoint_lock:
+            if state is None:
+                self._checkpoint.pop(key, None)
+            else:
+                self._checkpoint[key] = state
+
+            directory = os.path.dirname(self.checkpoint_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.checkpoint_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._checkpoint, f, indent=2)
+            os.replace(tmp_path, self.checkpoint_path)
+
+    @staticmethod
+    def _job_key(code: str, ktype: str, autype: str) -> str:
+        return f"{code}|{ktype}|{autype}"
+
+    def _job_state(self, code: str, ktype: str, autype: str, start: Optional[str], end: str,
+                   incremental: bool) -> Dict:
+        """Resume the unfinished job for this code, K-line type and autype, otherwise plan a fresh one"""
+        state = self._checkpoint.get(self._job_key(code, ktype, autype))
+        if state:
+            return dict(state, resumed=True)
+        return self._new_job(code, ktype, start, end, incremental)
+
+    def _new_job(self, code: str, ktype: str, start: Optional[str], end: str, incremental: bool) -> Dict:
+        # Only fetch bars newer than what is already stored
+        if incremental:
+            last = self.store.last_time(code, ktype)
+            if last is not None:
+                last_date = last.strftime('%Y-%m-%d')
+                if start is None or last_date > start:
+                    start = last_date
+
+        return {'start': start, 'end': end, 'page_req_key': None, 'pages': 0, 'rows': 0,
+                'part_offset': self.store.last_part(code, ktype), 'resumed': False}
+
+    def log_quota(self, codes: List[str], ktypes: List[str]):
+        """Warn when the download would need more new history-quota codes than remain"""
+        try:
+            ret, data = self.quote_ctx.get_history_kl_quota(get_detail=False)
+            if ret != ft.RET_OK:
+                self.logger.warning(f"Could not read history K-line quota: {data}")
+                return
+
+            used, remain = data[0], data[1]
+            stored = set().union(*(self.store.codes(ktype) for ktype in ktypes)) if ktypes else set()
+            new_codes = len(set(codes) - stored)
+            self.logger.info(f"History K-line quota: {used} used, {remain} remaining, "
+                             f"{new_codes} codes not yet stored")
+            if new_codes > remain:
+                self.logger.warning(f"Only {remain} quota codes remain for {new_codes} new codes; "
+                                    f"later codes will fail until the quota resets")
+        except Exception as e:
+            self.logger.warning(f"Could not read history K-line quota: {e}")
+
+    def download(self, codes: List[str], ktypes: List[str] = None, start: str = None, end: str = None,
+                 autype: str = ft.AuType.QFQ, incremental: bool = True) -> pd.DataFrame:
+        """Download every (code, ktype) pair; returns one summary row per job
+
+        start/end are YYYY-MM-DD; end defaults to today. With incremental=True,
+        codes already in the store only fetch bars from their last stored date.
+        """
+        ktypes = ktypes or [ft.KLType.K_DAY]
+        end = end or datetime.now().strftime('%Y-%m-%d')
+        jobs = [(code, ktype) for ktype in ktypes for code in codes]
+        if not jobs:
+            return pd.DataFrame()
+
+        self.log_quota(codes, ktypes)
+        start_time = time.perf_counter()
+        summary = []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            futures = {executor.submit(self._download_job, code, ktype, start, end, autype, incremental):
+                       (code, ktype) for code, ktype in jobs}
+
+            for future in as_completed(futures):
+                code, ktype = futures[future]
+                try:
+                    summary.append(future.result())
+                except Exception as e:
+                    self.logger.error(f"Error downloading {code} {ktype}: {e}")
+                    summary.append({'code': code, 'ktype': ktype, 'status': 'error', 'error': str(e)})
+
+        summary_df = pd.DataFrame(summary).sort_values(['ktype', 'code'], ignore_index=True)
+        completed = int((summary_df['status'] == 'done').sum())
+        self.logger.info(f"Downloaded {completed}/{len(jobs)} jobs, "
+                         f"{int(summary_df['rows'].fillna(0).sum())} bars in "
+                         f"{time.perf_counter() - start_time:.1f}s")
+        return summary_df
+
+    def _request_page(self, code: str, ktype: str, autype: str, state: Dict, page_req_key: Optional[bytes]):
+        """One rate-limited page request, retried with backoff"""
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.acquire()
+            ret, data, next_key = self.quote_ctx.request_history_kline(
+                code, start=state['start'], end=state['end'], ktype=ktype, autype=autype,
+                max_count=self.page_size, page_req_key=page_req_key)
+            if ret == ft.RET_OK:
+                return data, next_key
+            if attempt < self.retries:
+                self.logger.warning(f"Retrying {code} {ktype} page {state['pages'] + 1}: {data}")
+                run_metrics.record_retry('request_history_kline', 2 ** attempt)
+                time.sleep(2 ** attempt)
+        raise RuntimeError(data)
+
+    def _download_job(self, code: str, ktype: str, start: Optional[str], end: str, autype: str,
+                      incremental: bool) -> Dict:
+        """Page through one code's history, checkpointing after every stored page"""
+        key = self._job_key(code, ktype, autype)
+        state = self._job_state(code, ktype, autype, start, end, incremental)
+        resumed = state.pop('resumed')
+        if resumed:
+            self.logger.info(f"Resuming {code} {ktype} after page {state['pages']}")
+        first_start, pages, rows = state['start'], 0, 0
+
+        try:
+            self._fetch_pages(code, ktype, autype, key, state)
+            pages, rows = state['pages'], state['rows']
+
+            # The resumed job stopped at its own end; fetch the rest of this run's range
+            if resumed and state['end'] < end:
+                self.logger.info(f"Continuing {code} {ktype} from {state['end']} to {end}")
+                self._save_checkpoint(key, None)
+                state = self._new_job(code, ktype, state['end'], end, incremental)
+                state.pop('resumed')
+                self._fetch_pages(code, ktype, autype, key, state)
+                pages, rows = pages + state['pages'], rows + state['rows']
+
+        except Exception as e:
+            # Pages already stored stay put; the checkpoint resumes after the last one
+            self.logger.error(f"Download of {code} {ktype} stopped after page {state['pages']}: {e}")
+            return {'code': code, 'ktype': ktype, 'start': first_start, 'end': end,
+                    'pages': pages + state['pages'], 'rows': rows + state['rows'], 'stored': None,
+                    'status': 'error', 'error': str(e)}
+
+        stored = self.store.compact(code, ktype)
+        self._save_checkpoint(key, None)
+        self.logger.debug(f"Downloaded {code} {ktype}: {rows} bars in {pages} pages")
+
+        return {'code': code, 'ktype': ktype, 'start': first_start, 'end': end,
+                'pages': pages, 'rows': rows, 'stored': stored,
+                'status': 'done', 'error': None}
+
+    def _fetch_pages(self, code: str, ktype: str, autype: str, key: str, state: Dict):
+        """Request and store pages until the job's range is exhausted, updating state in place"""
+        page_req_key = base64.b64decode(state['page_req_key']) if state['page_req_key'] else None
+        part_offset = state.get('part_offset', 0)
+
+        while True:
+            data, page_req_key = self._request_page(code, ktype, autype, state, page_req_key)
+
+            state['pages'] += 1
+            state['rows'] += len(data)
+            self.store.write_page(code, ktype, part_offset + state['pages'], data)
+
+            if page_req_key is None:
+                break
+            state['page_req_key'] = base64.b64encode(page_req_key).decode('ascii')
+            self._save_checkpoint(key, state)
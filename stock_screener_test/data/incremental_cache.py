@@ -0,0 +1,155 @@
+"""
+Incremental data refresh for repeated screenings within a trading day
+"""
+
+import pandas as pd
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict
+import logging
+import run_metrics
+from utils import is_market_open, last_market_close
+
+# How long each Futu data source stays valid once fetched
+#   'daily'   - until the calendar date changes
+#   'session' - for quote_ttl_seconds while the stock's market is open,
+#               then from the first fetch after the close until the next open
+#   'quote'   - for quote_ttl_seconds
+REFRESH_POLICIES = {
+    'basic_info': 'daily',
+    'financial': 'daily',
+    'history': 'session',
+    'quote': 'quote',
+}
+
+# Futu code prefix -> market in utils.get_market_hours
+CODE_MARKETS = {'US': 'US', 'HK': 'HK', 'SH': 'CN', 'SZ': 'CN'}
+
+
+class IncrementalClient:
+    """FutuClient wrapper that refetches each data source only when stale
+
+    Basic info and quarterly financials are fetched once per day; quotes
+    are refetched after a short TTL. Daily bars are refetched on the quote
+    TTL while the stock's market is open, since today's bar is still
+    forming, and once more after the close, so midday and evening runs
+    screen on current bars. Each entry records when it was fetched and when
+    its value last changed. Methods not listed here pass through to the
+    wrapped client.
+    """
+
+    def __init__(self, futu_client, refresh_config: Dict = None):
+        refresh_config = refresh_config or {}
+        self.futu_client = futu_client
+        self.enabled = refresh_config.get('enabled', True)
+        self.quote_ttl = refresh_config.get('quote_ttl_seconds', 60)
+
+        self.logger = logging.getLogger(__name__)
+
+        # (source, key) -> entry dict
+        self._entries: Dict[tuple, Dict[str, Any]] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'changed': 0}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name == 'futu_client':
+            raise AttributeError(name)
+        return getattr(self.futu_client, name)
+
+    def _is_fresh(self, source: str, key: tuple, entry: Dict) -> bool:
+        """Check an entry against its source's refresh policy"""
+        policy = REFRESH_POLICIES[source]
+        if policy == 'daily':
+            return entry['fetched_on'] == date.today()
+        if policy == 'session':
+            market = CODE_MARKETS.get(key[0].split('.')[0].upper(), 'US')
+            if not is_market_open(market):
+                # Complete once fetched after the latest close
+                return entry['fetched_at'] >= last_market_close(market).timestamp()
+        return time.time() - entry['fetched_at'] < self.quote_ttl
+
+    @staticmethod
+    def _same_value(old: Any, new: Any) -> bool:
+        if isinstance(old, pd.DataFrame) or isinstance(new, pd.DataFrame):
+            return isinstance(old, pd.DataFrame) and isinstance(new, pd.DataFrame) and old.equals(new)
+        return old == new
+
+    def _get(self, source: str, key: tuple, fetch):
+        """Return a fresh cached value or fetch and record it"""
+        if not self.enabled:
+            return fetch()
+
+        entry = self._entries.get((source, key))
+        if entry is not None and self._is_fresh(source, key, entry):
+            with self._lock:
+                self._stats['hits'] += 1
+            run_metrics.record_cache(f"incremental:{source}", True)
+            return entry['value']
+
+        run_metrics.record_cache(f"incremental:{source}", False)
+        value = fetch()
+        now = time.time()
+
+        # Empty responses are errors or missing data; retry them next time
+        empty = value.empty if isinstance(value, pd.DataFrame) else not value
+        if empty:
+            return value
+
+        changed = entry is None or not self._same_value(entry['value'], value)
+        self._entries[(source, key)] = {
+            'value': value,
+            'fetched_on': date.today(),
+            'fetched_at': now,
+            'changed_at': now if changed else entry['changed_at'],
+        }
+
+        with self._lock:
+            self._stats['misses'] += 1
+            if changed and entry is not None:
+                self._stats['changed'] += 1
+
+        return value
+
+    def get_basic_info(self, stock_code: str) -> Dict:
+        """Get basic stock information (refreshed daily)"""
+        return dict(self._get('basic_info', (stock_code,),
+                              lambda: self.futu_client.get_basic_info(stock_code)))
+
+    def get_financial_data(self, stock_code: str) -> Dict:
+        """Get financial statement data (refreshed daily)"""
+        return dict(self._get('financial', (stock_code,),
+                              lambda: self.futu_client.get_financial_data(stock_code)))
+
+    def get_historical_data(self, stock_code: str, period: str = '1M') -> pd.DataFrame:
+        """Get daily bars (refreshed on the quote TTL during market hours and once after the close)"""
+        return self._get('history', (stock_code, period),
+                         lambda: self.futu_client.get_historical_data(stock_code, period))
+
+    def get_current_price(self, stock_code: str) -> Dict:
+        """Get current price data (refreshed after the quote TTL)"""
+        return dict(self._get('quote', (stock_code,),
+                              lambda: self.futu_client.get_current_price(stock_code)))
+
+    def last_changed(self, stock_code: str) -> Dict[str, datetime]:
+        """When each data source last changed for a stock"""
+        changed = {}
+        for (source, key), entry in list(self._entries.items()):
+            if key[0] == stock_code:
+                changed[source] = datetime.fromtimestamp(entry['changed_at'])
+        return changed
+
+    def log_summary(self):
+        """Log and reset the refresh counters for the finished run"""
+        with self._lock:
+            stats = dict(self._stats)
+            self._stats = {'hits': 0, 'misses': 0, 'changed': 0}
+
+        total = stats['hits'] + stats['misses']
+        if total:
+            self.logger.info(f"Incremental refresh: {stats['hits']}/{total} reused, "
+                             f"{stats['misses']} fetched, {stats['changed']} changed since last fetch")
+
+    def clear(self):
+        """Forget all cached sources"""
+        self._entries.clear()
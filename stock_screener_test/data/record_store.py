@@ -0,0 +1,213 @@
+"""
+Columnar storage for screening records and price histories
+"""
+
+import pandas as pd
+import numpy as np
+import threading
+from typing import Dict, List, Optional, Tuple
+import logging
+
+# Fixed screening schema: column -> kind ('str', 'float' or 'bool')
+SCREENING_SCHEMA = {
+    # Identity and basic info
+    'symbol': 'str',
+    'name': 'str',
+    'sector': 'str',
+    'stock_type': 'str',
+    'market_cap': 'float',
+    'lot_size': 'float',
+
+    # Quote
+    'price': 'float',
+    'change_rate': 'float',
+    'volume': 'float',
+    'turnover': 'float',
+    'high': 'float',
+    'low': 'float',
+    'open': 'float',
+
+    # Fundamentals
+    'pe_ratio': 'float',
+    'pb_ratio': 'float',
+    'ps_ratio': 'float',
+    'roe': 'float',
+    'roa': 'float',
+    'net_margin': 'float',
+    'debt_to_equity': 'float',
+    'debt_to_assets': 'float',
+    'asset_turnover': 'float',
+    'enterprise_value': 'float',
+    'ev_revenue': 'float',
+    'revenue_growth': 'float',
+    'earnings_growth': 'float',
+    'dividend_yield': 'float',
+    'payout_ratio': 'float',
+    'quality_score': 'float',
+
+    # Technicals
+    'price_change_1d': 'float',
+    'price_change_5d': 'float',
+    'price_change_1m': 'float',
+    'price_change_52w': 'float',
+    'price_52w_high': 'float',
+    'price_52w_low': 'float',
+    'distance_from_52w_high': 'float',
+    'rsi': 'float',
+    'macd': 'float',
+    'macd_signal': 'float',
+    'macd_histogram': 'float',
+    'ma20': 'float',
+    'ma50': 'float',
+    'ma200': 'float',
+    'price_above_ma20': 'bool',
+    'price_above_ma50': 'bool',
+    'price_above_ma200': 'bool',
+    'distance_from_ma20': 'float',
+    'bb_upper': 'float',
+    'bb_middle': 'float',
+    'bb_lower': 'float',
+    'bb_position': 'float',
+    'avg_volume_20d': 'float',
+    'volume_ratio': 'float',
+    'stoch_k': 'float',
+    'stoch_d': 'float',
+    'williams_r': 'float',
+    'atr': 'float',
+    'atr_percent': 'float',
+    'cci': 'float',
+}
+
+
+class ScreeningRecordStore:
+    """Preallocated column buffers, one row per candidate symbol
+
+    Workers write their row in place; rows are only kept once marked
+    valid. Columns that no record ever set are left out of the frame, the
+    same as building a DataFrame from dicts.
+    """
+
+    def __init__(self, capacity: int, schema: Dict[str, str] = None):
+        self.capacity = capacity
+        self.schema = dict(schema or SCREENING_SCHEMA)
+        self.logger = logging.getLogger(__name__)
+
+        self._columns = {column: self._allocate(kind, capacity) for column, kind in self.schema.items()}
+        # Booleans have no NaN, so they carry an explicit presence mask
+        self._present = {column: np.zeros(capacity, dtype=bool)
+                         for column, kind in self.schema.items() if kind == 'bool'}
+
+        self._seen = set()
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _allocate(kind: str, capacity: int) -> np.ndarray:
+        """Allocate one typed column"""
+        if kind == 'float':
+            return np.full(capacity, np.nan)
+        if kind == 'bool':
+            return np.zeros(capacity, dtype=bool)
+        if kind == 'str':
+            return np.full(capacity, None, dtype=object)
+        raise ValueError(f"Unknown column kind: {kind}")
+
+    def write(self, row: int, record: Dict):
+        """Write a record's schema fields into a row and mark it valid"""
+        new_columns = []
+
+        for column, value in record.items():
+            values = self._columns.get(column)
+            if values is None:
+                continue
+
+            if column not in self._seen:
+                new_columns.append(column)
+
+            if value is None:
+                continue
+
+            kind = self.schema[column]
+            try:
+                if kind == 'float':
+                    values[row] = float(value)
+                elif kind == 'bool':
+                    values[row] = bool(value)
+                    self._present[column][row] = True
+                else:
+                    values[row] = value
+            except (TypeError, ValueError):
+                self.logger.debug(f"Unusable {column} value {value!r} in row {row}")
+
+        if new_columns:
+            with self._lock:
+                self._seen.update(new_columns)
+
+        self._valid[row] = True
+
+    def discard(self, row: int):
+        """Drop a row from the output (e.g. delisted symbol)"""
+        self._valid[row] = False
+
+    def __len__(self) -> int:
+        return int(self._valid.sum())
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materialize valid rows as a DataFrame"""
+        rows = np.flatnonzero(self._valid)
+        data = {}
+
+        for column, kind in self.schema.items():
+            if column not in self._seen:
+                continue
+
+            values = self._columns[column][rows]
+            if kind == 'bool':
+                present = self._present[column][rows]
+                if not present.all():
+                    values = pd.arrays.BooleanArray(values, ~present)
+
+            data[column] = values
+
+        return pd.DataFrame(data, index=pd.RangeIndex(len(rows)))
+
+
+class HistoryPanel:
+    """Per-symbol price histories kept outside the screening records"""
+
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self):
+        self._histories: Dict[str, Tuple[np.ndarray, np.ndarray, Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, stock_code: str, hist_data: pd.DataFrame):
+        """Store a history frame as a time index plus an OHLCV matrix"""
+        if hist_data is None or hist_data.empty:
+            return
+
+        fields = [field for field in self.FIELDS if field in hist_data.columns]
+        times = pd.to_datetime(hist_data['time_key']).to_numpy() if 'time_key' in hist_data.columns \
+            else hist_data.index.to_numpy()
+        values = hist_data[fields].to_numpy(dtype=float)
+
+        with self._lock:
+            self._histories[stock_code] = (times, values, tuple(fields))
+
+    def get(self, stock_code: str) -> Optional[pd.DataFrame]:
+        """Rebuild the stored history in the Futu kline layout"""
+        entry = self._histories.get(stock_code)
+        if entry is None:
+            return None
+
+        times, values, fields = entry
+        hist_data = pd.DataFrame(values, columns=list(fields))
+        hist_data.insert(0, 'time_key', times)
+        return hist_data
+
+    def symbols(self) -> List[str]:
+        """Symbols with a stored history"""
+        return list(self._histories.keys())
+
+    def __contains__(self, stock_code: str) -> bool:
+        return stock_code in self._histories
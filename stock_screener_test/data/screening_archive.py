@@ -0,0 +1,191 @@
+"""
+Append-only archive of ranked screening results, partitioned by date and strategy
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import logging
+from typing import Dict, List, Optional
+import os
+import uuid
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Columns added to every archived row
+RUN_COLUMNS = ['run_id', 'run_time', 'date', 'strategy']
+
+class ScreeningArchive:
+    """Parquet archive laid out as <root>/date=YYYY-MM-DD/strategy=<name>/<run_id>.parquet
+    
+    Each run adds new files and never rewrites old ones, so concurrent
+    readers always see complete runs.
+    """
+    
+    def __init__(self, root: str = './results/archive/'):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+        
+        if not PYARROW_AVAILABLE:
+            self.logger.warning("pyarrow not available. Screening archive is disabled.")
+    
+    def append(self, screening_results: Dict[str, pd.DataFrame], run_time: datetime = None) -> Optional[str]:
+        """Archive one run's ranked results; returns the run id"""
+        if not PYARROW_AVAILABLE:
+            return None
+        
+        run_time = run_time or datetime.now()
+        run_id = f"{run_time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        date = run_time.strftime('%Y-%m-%d')
+        
+        archived = 0
+        for strategy_name, results_df in screening_results.items():
+            if results_df.empty:
+                continue
+            
+            table = self._to_table(results_df, run_id, run_time, results_df.attrs)
+            partition = os.path.join(self.root, f"date={date}", f"strategy={strategy_name}")
+            os.makedirs(partition, exist_ok=True)
+            
+            # Write under a hidden temporary name so readers never pick up a partial file
+            path = os.path.join(partition, f"{run_id}.parquet")
+            tmp_path = os.path.join(partition, f".{run_id}.parquet.tmp")
+            pq.write_table(table, tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+            archived += table.num_rows
+        
+        self.logger.info(f"Archived run {run_id}: {archived} ranked rows")
+        return run_id
+    
+    def _to_table(self, df: pd.DataFrame, run_id: str, run_time: datetime, attrs: Dict) -> 'pa.Table':
+        """Normalize column types so files from different runs share one schema"""
+        df = df.copy()
+        
+        for col in df.columns:
+            if col == 'rank':
+                df[col] = df[col].astype('int64')
+            elif pd.api.types.is_bool_dtype(df[col]):
+                df[col] = df[col].astype('boolean')
+            elif pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = df[col].astype('float64')
+        
+        df.insert(0, 'run_id', run_id)
+        df.insert(1, 'run_time', pd.Timestamp(run_time))
+        df['candidates'] = float(attrs.get('candidates', len(df)))
+        
+        # Partition values live in the directory names, not the files
+        return pa.Table.from_pandas(df, preserve_index=False)
+    
+    def _dataset(self) -> Optional['ds.Dataset']:
+        """Open all archived files as one dataset with a unified schema"""
+        if not PYARROW_AVAILABLE or not os.path.isdir(self.root):
+            return None
+        
+        partitioning = ds.partitioning(pa.schema([('date', pa.string()), ('strategy', pa.string())]),
+                                       flavor='hive')
+        dataset = ds.dataset(self.root, format='parquet', partitioning=partitioning,
+                             exclude_invalid_files=True)
+        
+        # Strategies export different metric columns; merge them into one schema
+        schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+        if not schemas:
+            return None
+        schema = pa.unify_schemas(schemas + [partitioning.schema])
+        return ds.dataset(self.root, format='parquet', partitioning=partitioning,
+                          schema=schema, exclude_invalid_files=True)
+    
+    def load(self, start: str = None, end: str = None, strategies: List[str] = None,
+             symbols: List[str] = None, columns: List[str] = None) -> pd.DataFrame:
+        """Read archived rows, pruning partitions by date (YYYY-MM-DD) and strategy"""
+        try:
+            dataset = self._dataset()
+            if dataset is None:
+                return pd.DataFrame()
+            
+            condition = None
+            filters = []
+            if start:
+                filters.append(ds.field('date') >= start)
+            if end:
+                filters.append(ds.field('date') <= end)
+            if strategies:
+                filters.append(ds.field('strategy').isin(strategies))
+            if symbols:
+                filters.append(ds.field('symbol').isin(symbols))
+            for expression in filters:
+                condition = expression if condition is None else condition & expression
+            
+            if columns:
+                columns = list(dict.fromkeys(RUN_COLUMNS + columns))
+                columns = [col for col in columns if col in dataset.schema.names]
+            
+            table = dataset.to_table(columns=columns, filter=condition)
+            return table.to_pandas().sort_values(['run_time', 'strategy', 'rank']
+                                                 if 'rank' in table.column_names else ['run_time'],
+                                                 ignore_index=True)
+        
+        except Exception as e:
+            self.logger.error(f"Error reading screening archive: {e}")
+            return pd.DataFrame()
+    
+    def runs(self) -> pd.DataFrame:
+        """One row per archived run and strategy with its result count"""
+        df = self.load(columns=['symbol'])
+        if df.empty:
+            return df
+        
+        return (df.groupby(['run_id', 'run_time', 'date', 'strategy'], observed=True)
+                  .size().rename('stocks').reset_index())
+    
+    def symbol_history(self, symbol: str, start: str = None, end: str = None,
+                       strategies: List[str] = None) -> pd.DataFrame:
+        """Every archived appearance of a symbol, oldest first"""
+        columns = ['symbol', 'rank', 'ranking_score', 'price', 'candidates']
+        return self.load(start, end, strategies, symbols=[symbol], columns=columns)
+    
+    def hit_rates(self, horizon_days: int = 5, threshold: float = 0.0, start: str = None,
+                  end: str = None, strategies: List[str] = None,
+                  prices: pd.DataFrame = None) -> pd.DataFrame:
+        """Share of each run's picks whose price rose by more than threshold (%) after horizon_days
+        
+        Forward prices come from `prices` (columns symbol, date, price) when given,
+        otherwise from later archived observations of the same symbol.
+        """
+        picks = self.load(start, end, strategies, columns=['symbol', 'price'])
+        if picks.empty or 'price' not in picks.columns:
+            return pd.DataFrame()
+        
+        if prices is None:
+            prices = self.load(start, columns=['symbol', 'price'])
+            prices = prices[['symbol', 'run_time', 'price']].rename(columns={'run_time': 'date'})
+        prices = prices.dropna(subset=['price']).assign(date=lambda p: pd.to_datetime(p['date']))
+        
+        # First observed price at least horizon_days after each pick
+        picks = picks.dropna(subset=['price']).copy()
+        picks['target_time'] = picks['run_time'] + pd.Timedelta(days=horizon_days)
+        forward = pd.merge_asof(
+            picks.sort_values('target_time'),
+            prices.rename(columns={'date': 'target_time', 'price': 'forward_price'})
+                  .sort_values('target_time')[['symbol', 'target_time', 'forward_price']],
+            on='target_time', by='symbol', direction='forward'
+        )
+        
+        forward['forward_return'] = (forward['forward_price'] / forward['price'] - 1) * 100
+        forward['hit'] = np.where(forward['forward_return'].notna(),
+                                  forward['forward_return'] > threshold, np.nan)
+        
+        summary = forward.groupby(['date', 'strategy', 'run_id'], observed=True).agg(
+            picks=('symbol', 'size'),
+            evaluated=('forward_return', 'count'),
+            hits=('hit', 'sum'),
+            avg_return=('forward_return', 'mean'),
+        ).reset_index()
+        summary['hit_rate'] = summary['hits'] / summary['evaluated'].replace(0, np.nan)
+        
+        return summary.sort_values(['date', 'strategy'], ignore_index=True)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Bulk K-line history download into the local bar store
+Run: python download_history.py --watchlist tech_giants --ktypes K_DAY,K_60M --start 2018-01-01
+
+Re-running the command resumes an interrupted download from its checkpoint,
+whatever --end it is given; later runs only fetch bars newer than what is stored.
+"""
+
+import argparse
+import logging
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from main import load_config, setup_logging
+from data.futu_client import FutuClient
+from data.stock_universe import StockUniverse
+from data.bar_store import BarStore
+from data.history_downloader import HistoryDownloader, MAX_PAGE_SIZE
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description='Download K-line history into the local bar store')
+    parser.add_argument('--symbols',
+                       help='Comma-separated codes, e.g. HK.00700,US.AAPL')
+    parser.add_argument('--watchlist',
+                       help='Download every stock in a watchlist')
+    parser.add_argument('--market', default='US',
+                       help='Market prefix for codes given without one (US/HK/SH/SZ)')
+    parser.add_argument('--ktypes', default='K_DAY',
+                       help='Comma-separated K-line types (K_DAY/K_WEEK/K_60M/K_1M/...)')
+    parser.add_argument('--start',
+                       help='First date YYYY-MM-DD (default: from the last stored bar, or one year back)')
+    parser.add_argument('--end',
+                       help='Last date YYYY-MM-DD (default: today)')
+    parser.add_argument('--full', action='store_true',
+                       help='Refetch from --start even for codes already stored')
+    parser.add_argument('--workers', type=int, default=4,
+                       help='Codes downloaded concurrently')
+    parser.add_argument('--page-size', type=int, default=MAX_PAGE_SIZE,
+                       help='Bars per request_history_kline page')
+    parser.add_argument('--log-level', default='INFO',
+                       help='Logging level (DEBUG/INFO/WARNING/ERROR)')
+    parser.add_argument('--config', default='config/settings.yaml',
+                       help='Configuration file path')
+    return parser
+
+def get_codes(args) -> list:
+    """Codes from --symbols and --watchlist, with the market prefix added where missing"""
+    codes = args.symbols.split(',') if args.symbols else []
+    if args.watchlist:
+        codes += StockUniverse('config/watchlists.yaml').get_watchlist(args.watchlist)
+
+    prefixed = [code.strip() if '.' in code else f"{args.market.upper()}.{code.strip()}"
+                for code in codes if code.strip()]
+    return list(dict.fromkeys(prefixed))
+
+def main():
+    """Main entry point"""
+    args = build_parser().parse_args()
+    setup_logging(args.log_level)
+    logger = logging.getLogger(__name__)
+
+    codes = get_codes(args)
+    if not codes:
+        logger.error("No codes to download; pass --symbols or --watchlist")
+        sys.exit(1)
+
+    settings = load_config(args.config)
+    store_settings = settings.get('bar_store', {})
+    store = BarStore(store_settings.get('path', './data_store/bars/'))
+
+    futu_client = FutuClient(settings['futu'])
+    try:
+        downloader = HistoryDownloader(
+            futu_client.quote_ctx, store,
+            checkpoint_path=store_settings.get('checkpoint', './data_store/history_checkpoint.json'),
+            max_workers=args.workers, page_size=args.page_size)
+        summary = downloader.download(codes, args.ktypes.split(','), args.start, args.end,
+                                      incremental=not args.full)
+        print(summary.to_string(index=False))
+
+        if (summary['status'] != 'done').any():
+            sys.exit(1)
+    finally:
+        futu_client.close()
+
+if __name__ == "__main__":
+    main()
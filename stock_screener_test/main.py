@@ -9,8 +9,8 @@ import yaml
 import logging
 import sys
 import os
-from datetime import datetime
-from typing import Dict, List
+import time
+from typing import Dict, List, Tuple
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -18,10 +18,15 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from data.futu_client import FutuClient
 from data.data_fetcher import DataFetcher
 from data.stock_universe import StockUniverse
+from data.incremental_cache import IncrementalClient
+from data.screening_archive import ScreeningArchive
+from data.bar_store import BarStore
 from screening.filters import StockFilter
 from screening.criteria import ScreeningCriteria
-from output.excel_export import ExcelReporter
-from output.csv_export import CSVExporter
+from screening.server_filter import ServerFilter
+from output.export_pipeline import ExportPipeline, parse_formats
+from utils import log_screening_session
+import run_metrics
 
 def setup_logging(log_level: str = 'INFO'):
     """Setup logging configuration"""
@@ -52,12 +57,72 @@ def load_strategies(strategies_path: str = 'config/strategies.yaml') -> Dict:
         logging.error(f"Failed to load strategies from {strategies_path}: {e}")
         raise
 
-def get_stock_universe(args, stock_universe: StockUniverse, futu_client: FutuClient) -> List[str]:
+class ScreeningSession:
+    """Long-lived screening components shared across runs
+    
+    Keeps the OpenD connection, loaded configs, market universes and
+    screeners warm so a scheduler can run many jobs in one process.
+    """
+    
+    def __init__(self, settings: Dict, strategies: Dict,
+                 watchlists_path: str = 'config/watchlists.yaml'):
+        self.settings = settings
+        self.strategies = strategies
+        self.logger = logging.getLogger(__name__)
+        
+        # Bars from download_history.py stand in for get_history_kline when enabled
+        store_settings = settings.get('bar_store', {})
+        bar_store = BarStore(store_settings.get('path', './data_store/bars/')) \
+            if store_settings.get('enabled', False) else None
+        self.futu_client = FutuClient(settings['futu'], bar_store,
+                                      store_settings.get('max_age_days', 3))
+        # Screeners read through this so same-day runs only refresh quotes
+        self.incremental_client = IncrementalClient(self.futu_client, settings.get('refresh', {}))
+        self.data_fetcher = DataFetcher(self.futu_client, settings.get('cache', {}))
+        self.stock_universe = StockUniverse(watchlists_path)
+        self.criteria_manager = ScreeningCriteria()
+        # Prunes market universes on OpenD before per-stock fetching
+        self.server_filter = ServerFilter(self.futu_client.quote_ctx, settings.get('server_filter', {}))
+        
+        archive_settings = settings.get('archive', {})
+        self.archive = ScreeningArchive(archive_settings.get('path', './results/archive/')) \
+            if archive_settings.get('enabled', True) else None
+        
+        self.universe_ttl = settings.get('cache', {}).get('ttl_minutes', 30) * 60
+        self._universes: Dict[str, Tuple[float, List[str]]] = {}
+        self._screeners: Dict[int, StockFilter] = {}
+    
+    def get_screener(self, max_workers: int) -> StockFilter:
+        """Get a screener for the worker count, reusing earlier instances"""
+        max_workers = min(max_workers, 20)  # Limit to prevent API overload
+        if max_workers not in self._screeners:
+            self._screeners[max_workers] = StockFilter(self.incremental_client, max_workers=max_workers)
+        return self._screeners[max_workers]
+    
+    def get_market_stocks(self, market: str) -> List[str]:
+        """Get a market's stock list, cached in memory for the cache TTL"""
+        cached = self._universes.get(market)
+        fresh = bool(cached) and time.time() - cached[0] < self.universe_ttl
+        run_metrics.record_cache('universe', fresh)
+        if fresh:
+            self.logger.debug(f"Using cached {market} universe ({len(cached[1])} stocks)")
+            return cached[1]
+        
+        stocks = self.futu_client.get_stock_list(market)
+        if stocks:
+            self._universes[market] = (time.time(), stocks)
+        return stocks
+    
+    def close(self):
+        """Close the OpenD connection"""
+        self.futu_client.close()
+
+def get_stock_universe(args, session: ScreeningSession) -> List[str]:
     """Get the stock universe to screen"""
     
     if args.watchlist:
         # Use specific watchlist
-        stocks = stock_universe.get_watchlist(args.watchlist)
+        stocks = session.stock_universe.get_watchlist(args.watchlist)
         if not stocks:
             logging.warning(f"Watchlist '{args.watchlist}' is empty or not found")
             return []
@@ -72,40 +137,69 @@ def get_stock_universe(args, stock_universe: StockUniverse, futu_client: FutuCli
     
     else:
         # Use market data
-        stocks = futu_client.get_stock_list(args.market)
+        stocks = session.get_market_stocks(args.market)
         if args.max_stocks and len(stocks) > args.max_stocks:
             stocks = stocks[:args.max_stocks]
         logging.info(f"Using {len(stocks)} stocks from {args.market} market")
         return stocks
 
-def run_screening(args, settings: Dict, strategies: Dict):
-    """Main screening logic"""
+def run_screening(args, settings: Dict, strategies: Dict, session: ScreeningSession = None) -> Dict:
+    """Main screening logic
+    
+    Pass a ScreeningSession to reuse warm components; otherwise one is
+    created for this run and closed afterwards.
+    """
     
     logger = logging.getLogger(__name__)
     
     logger.info(f"Starting stock screening - Strategy: {args.strategy}, Market: {args.market}")
     
     # Initialize components
+    owns_session = session is None
+    if owns_session:
+        try:
+            session = ScreeningSession(settings, strategies)
+        except Exception as e:
+            logger.error(f"Failed to initialize components: {e}")
+            return {}
+    
     try:
-        futu_client = FutuClient(settings['futu'])
-        data_fetcher = DataFetcher(futu_client, settings.get('cache', {}))
-        stock_universe = StockUniverse('config/watchlists.yaml')
-        criteria_manager = ScreeningCriteria()
-        
-        # Initialize screener with max workers
-        max_workers = min(args.max_workers, 20)  # Limit to prevent API overload
-        screener = StockFilter(futu_client, max_workers=max_workers)
-        
-    except Exception as e:
-        logger.error(f"Failed to initialize components: {e}")
-        return
+        return _run_strategies(args, settings, strategies, session)
+    finally:
+        # Clean up
+        if owns_session:
+            session.close()
+
+def _run_strategies(args, settings: Dict, strategies: Dict, session: ScreeningSession) -> Dict:
+    """Screen and export, appending the run's metrics as a JSON line when enabled"""
+    
+    metrics_settings = settings.get('metrics', {})
+    if not metrics_settings.get('enabled', True):
+        return _screen_strategies(args, settings, strategies, session)
+    
+    run_metrics.start_run(strategy=args.strategy, market=args.market, max_workers=args.max_workers)
+    try:
+        return _screen_strategies(args, settings, strategies, session)
+    finally:
+        record = run_metrics.finish_run(metrics_settings.get('path', 'screener_metrics.jsonl'))
+        logging.getLogger(__name__).info(
+            f"Run metrics: {record['total_seconds']:.1f}s, {record['symbol_latency']['count']} symbols, "
+            f"p95 {record['symbol_latency']['p95']}s per symbol")
+
+def _screen_strategies(args, settings: Dict, strategies: Dict, session: ScreeningSession) -> Dict:
+    """Screen the universe with each requested strategy and export results"""
+    
+    logger = logging.getLogger(__name__)
+    criteria_manager = session.criteria_manager
+    screener = session.get_screener(args.max_workers)
     
     # Get stock universe
-    stock_list = get_stock_universe(args, stock_universe, futu_client)
+    with run_metrics.stage('universe'):
+        stock_list = get_stock_universe(args, session)
     
     if not stock_list:
         logger.error("No stocks to screen")
-        return
+        return {}
     
     # Determine strategies to run
     if args.strategy == 'all':
@@ -118,7 +212,7 @@ def run_screening(args, settings: Dict, strategies: Dict):
         if strategy_name not in strategies:
             logger.error(f"Strategy '{strategy_name}' not found")
             logger.info(f"Available strategies: {list(strategies.keys())}")
-            return
+            return {}
     
     # Run screening
     all_results = {}
@@ -138,14 +232,20 @@ def run_screening(args, settings: Dict, strategies: Dict):
         logger.info(criteria_manager.get_criteria_description(criteria))
         
         try:
+            started = time.time()
+            
+            # Let OpenD drop stocks that cannot match before fetching each one
+            with run_metrics.stage('server_filter'):
+                filtered_stocks = session.server_filter.prune(stock_list, criteria, args.market)
+            
             # Apply quick pre-filtering if specified
-            filtered_stocks = stock_list
             if args.quick_filter:
-                filtered_stocks = screener.quick_screen(
-                    stock_list, 
-                    min_price=1.0,  # $1 minimum
-                    min_volume=100000  # 100k minimum volume
-                )
+                with run_metrics.stage('quick_screen'):
+                    filtered_stocks = screener.quick_screen(
+                        filtered_stocks, 
+                        min_price=1.0,  # $1 minimum
+                        min_volume=100000  # 100k minimum volume
+                    )
             
             # Run main screening
             results = screener.screen_stocks(
@@ -156,6 +256,10 @@ def run_screening(args, settings: Dict, strategies: Dict):
             
             all_results[strategy_name] = results
             
+            elapsed = time.time() - started
+            run_metrics.record_strategy(strategy_name, len(results), elapsed)
+            log_screening_session(strategy_name, len(results), elapsed, criteria)
+            
             if not results.empty:
                 logger.info(f"Strategy '{strategy_name}': {len(results)} stocks found")
                 logger.info(f"Top 5 stocks: {results.head()['symbol'].tolist()}")
@@ -166,72 +270,51 @@ def run_screening(args, settings: Dict, strategies: Dict):
             logger.error(f"Error running strategy {strategy_name}: {e}")
             continue
     
-    # Generate output
+    session.incremental_client.log_summary()
+    
+    # Generate output and keep the ranked results for later analysis
     if any(not df.empty for df in all_results.values()):
-        generate_output(all_results, args, settings)
+        with run_metrics.stage('export'):
+            generate_output(all_results, args, settings)
+        if session.archive is not None:
+            try:
+                with run_metrics.stage('archive'):
+                    session.archive.append(all_results)
+            except Exception as e:
+                logger.error(f"Failed to archive screening results: {e}")
     else:
         logger.warning("No results to export")
     
-    # Clean up
-    futu_client.close()
     logger.info("Screening completed")
+    return all_results
 
 def generate_output(screening_results: Dict, args, settings: Dict):
     """Generate output files"""
     
     logger = logging.getLogger(__name__)
     
-    # Create output directory if it doesn't exist
-    output_dir = settings['output'].get('save_path', './results/')
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_filename = f"stock_screen_{timestamp}"
+    output_settings = settings.get('output', {})
+    output_dir = output_settings.get('save_path', './results/')
     
-    # Generate reports based on output format
-    output_formats = args.output.split(',') if ',' in args.output else [args.output]
+    try:
+        formats = parse_formats(args.output)
+    except ValueError as e:
+        logger.error(str(e))
+        return
     
-    for output_format in output_formats:
-        output_format = output_format.strip()
-        
-        if output_format in ['excel', 'both']:
-            try:
-                excel_reporter = ExcelReporter()
-                excel_file = os.path.join(output_dir, f"{base_filename}.xlsx")
-                excel_reporter.generate_report(screening_results, excel_file)
-                logger.info(f"Excel report saved: {excel_file}")
-            except Exception as e:
-                logger.error(f"Failed to generate Excel report: {e}")
-        
-        if output_format in ['csv', 'both']:
-            try:
-                csv_exporter = CSVExporter()
-                csv_exporter.export_screening_results(screening_results, 
-                                                    os.path.join(output_dir, base_filename))
-                logger.info(f"CSV reports saved in {output_dir}")
-            except Exception as e:
-                logger.error(f"Failed to generate CSV reports: {e}")
-    
-    # Generate watchlists if requested
-    if args.watchlist_export:
-        csv_exporter = CSVExporter()
-        for strategy_name, results_df in screening_results.items():
-            if not results_df.empty:
-                watchlist_file = os.path.join(output_dir, f"{strategy_name}_watchlist_{timestamp}.txt")
-                csv_exporter.export_watchlist(results_df, watchlist_file, 'simple')
+    # Every format and strategy is written concurrently
+    pipeline = ExportPipeline(output_dir, max_workers=output_settings.get('export_workers', 4))
+    pipeline.run(screening_results, formats, watchlist_export=args.watchlist_export)
 
-def main():
-    """Main entry point"""
-    
-    # Parse command line arguments
+def build_parser() -> argparse.ArgumentParser:
+    """Command line interface, shared with the in-process scheduler"""
     parser = argparse.ArgumentParser(description='Stock Screener')
     parser.add_argument('--strategy', default='all', 
                        help='Screening strategy to run (or comma-separated list)')
     parser.add_argument('--market', default='US', 
                        help='Market to screen (US/HK/CN)')
     parser.add_argument('--output', default='excel', 
-                       help='Output format (excel/csv/both)')
+                       help='Output formats, comma-separated (excel/csv/parquet/arrow/both)')
     parser.add_argument('--watchlist', 
                        help='Use specific watchlist instead of market data')
     parser.add_argument('--symbols', 
@@ -256,7 +339,13 @@ def main():
                        help='List available strategies and exit')
     parser.add_argument('--list-watchlists', action='store_true',
                        help='List available watchlists and exit')
+    return parser
+
+def main():
+    """Main entry point"""
     
+    # Parse command line arguments
+    parser = build_parser()
     args = parser.parse_args()
     
     # Setup logging
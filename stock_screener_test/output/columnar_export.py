@@ -0,0 +1,94 @@
+"""
+Parquet and Arrow IPC export
+"""
+
+import pandas as pd
+from datetime import datetime
+import json
+import logging
+from typing import Callable, Dict, List, Tuple
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# File extension per columnar format
+COLUMNAR_FORMATS = {
+    'parquet': 'parquet',
+    'arrow': 'arrow',
+}
+
+class ColumnarExporter:
+    def __init__(self, file_format: str = 'parquet'):
+        if file_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unknown columnar format: {file_format}")
+        
+        self.file_format = file_format
+        self.logger = logging.getLogger(__name__)
+        
+        if not PYARROW_AVAILABLE:
+            self.logger.warning(f"pyarrow not available. {file_format} export will be skipped.")
+    
+    def export_screening_results(self, screening_results: Dict[str, pd.DataFrame],
+                                base_filename: str):
+        """Export each strategy's results to its own columnar file"""
+        for _, write in self.export_tasks(screening_results, base_filename):
+            write()
+    
+    def export_tasks(self, screening_results: Dict[str, pd.DataFrame], base_filename: str,
+                     timestamp: str = None) -> List[Tuple[str, Callable]]:
+        """List (filename, writer) pairs, one per strategy"""
+        if not PYARROW_AVAILABLE:
+            return []
+        
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_name = os.path.splitext(base_filename)[0]
+        extension = COLUMNAR_FORMATS[self.file_format]
+        
+        tasks = []
+        for strategy_name, results_df in screening_results.items():
+            if not results_df.empty:
+                filename = f"{base_name}_{strategy_name}_{timestamp}.{extension}"
+                tasks.append((filename, lambda df=results_df, name=strategy_name, path=filename:
+                              self.export_strategy_results(df, path, name)))
+        
+        return tasks
+    
+    def export_strategy_results(self, results_df: pd.DataFrame, filename: str, strategy_name: str):
+        """Write one strategy's ranked rows with screening metadata in the schema"""
+        table = self._to_table(results_df, strategy_name, results_df.attrs)
+        
+        if self.file_format == 'parquet':
+            pq.write_table(table, filename, compression='zstd')
+        else:
+            # Arrow IPC file (Feather v2), uncompressed for memory-mapped reads
+            feather.write_feather(table, filename, compression='uncompressed')
+        
+        self.logger.info(f"Strategy results exported to {filename}")
+    
+    def _to_table(self, df: pd.DataFrame, strategy_name: str, attrs: Dict) -> 'pa.Table':
+        """Convert results to an Arrow table, keeping full precision"""
+        
+        # Identity columns first, the rest as screened
+        leading = [col for col in ['rank', 'symbol', 'name', 'ranking_score'] if col in df.columns]
+        columns = leading + [col for col in df.columns if col not in leading]
+        
+        table = pa.Table.from_pandas(df[columns], preserve_index=False)
+        
+        metadata = {
+            'strategy': strategy_name,
+            'generated': datetime.now().isoformat(timespec='seconds'),
+            'total_stocks': len(df),
+        }
+        for key in ['candidates', 'cutoff_score']:
+            if key in attrs:
+                metadata[key] = attrs[key]
+        
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata[b'screening'] = json.dumps(metadata, default=float).encode()
+        return table.replace_schema_metadata(schema_metadata)
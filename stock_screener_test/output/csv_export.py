@@ -6,7 +6,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
-from typing import Dict, List
+from typing import Callable, Dict, List, Tuple
 import os
 
 class CSVExporter:
@@ -17,17 +17,28 @@ class CSVExporter:
                                 base_filename: str):
         """Export screening results to CSV files"""
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        for _, write in self.export_tasks(screening_results, base_filename):
+            write()
+    
+    def export_tasks(self, screening_results: Dict[str, pd.DataFrame], base_filename: str,
+                     timestamp: str = None) -> List[Tuple[str, Callable]]:
+        """List (filename, writer) pairs for the summary and each strategy; writers are independent"""
+        
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
         base_name = os.path.splitext(base_filename)[0]
         
-        # Export summary
-        self._export_summary(screening_results, f"{base_name}_summary_{timestamp}.csv")
+        # Summary
+        summary_file = f"{base_name}_summary_{timestamp}.csv"
+        tasks = [(summary_file, lambda: self._export_summary(screening_results, summary_file))]
         
-        # Export individual strategies
+        # Individual strategies
         for strategy_name, results_df in screening_results.items():
             if not results_df.empty:
                 filename = f"{base_name}_{strategy_name}_{timestamp}.csv"
-                self._export_strategy_results(results_df, filename, strategy_name)
+                tasks.append((filename, lambda df=results_df, name=strategy_name, path=filename:
+                              self._export_strategy_results(df, path, name)))
+        
+        return tasks
     
     def _export_summary(self, screening_results: Dict, filename: str):
         """Export summary statistics to CSV"""
@@ -67,15 +78,17 @@ class CSVExporter:
         # Select and order columns for export
         export_df = self._prepare_export_dataframe(results_df)
         
-        # Add metadata header
-        with open(filename, 'w') as f:
+        # Metadata header and data in a single pass over one file handle
+        with open(filename, 'w', newline='') as f:
             f.write(f"# Stock Screening Results - {strategy_name}\n")
             f.write(f"# Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"# Total stocks: {len(export_df)}\n")
+            if 'candidates' in results_df.attrs:
+                f.write(f"# Candidates ranked: {results_df.attrs['candidates']} "
+                        f"(cutoff score {results_df.attrs['cutoff_score']:.4f})\n")
             f.write("# \n")
+            export_df.to_csv(f, index=False)
         
-        # Append the data
-        export_df.to_csv(filename, mode='a', index=False)
         self.logger.info(f"Strategy results exported to {filename}")
     
     def _prepare_export_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
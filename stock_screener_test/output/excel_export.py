@@ -6,12 +6,15 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
-from typing import Dict, List
+from typing import Callable, Dict, List, Tuple
 import os
 
 try:
     import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.formatting.rule import FormulaRule
     from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+    from openpyxl.utils import get_column_letter
     from openpyxl.utils.dataframe import dataframe_to_rows
     EXCEL_AVAILABLE = True
 except ImportError:
@@ -25,19 +28,24 @@ class ExcelReporter:
             self.logger.warning("openpyxl not available. Excel reports will be basic CSV files.")
     
     def generate_report(self, screening_results: Dict[str, pd.DataFrame], 
-                       output_file: str, include_charts: bool = False):
-        """Generate comprehensive Excel report"""
+                       output_file: str, include_charts: bool = False, raise_errors: bool = False):
+        """Generate comprehensive Excel report
+        
+        Falls back to CSV files when the workbook can't be written; with
+        ``raise_errors`` the failure is re-raised after the fallback, so
+        callers can tell the workbook is missing.
+        """
         
         if not EXCEL_AVAILABLE:
             self._generate_csv_reports(screening_results, output_file)
+            if raise_errors:
+                raise RuntimeError(f"openpyxl not available, {output_file} not written")
             return
         
         try:
-            # Create workbook
-            wb = openpyxl.Workbook()
-            
-            # Remove default sheet
-            wb.remove(wb.active)
+            # Write-only workbook: rows are streamed to disk as they are appended,
+            # so sheets must be written in order and widths set before any rows
+            wb = openpyxl.Workbook(write_only=True)
             
             # Add summary sheet
             self._create_summary_sheet(wb, screening_results)
@@ -58,51 +66,53 @@ class ExcelReporter:
             self.logger.error(f"Error generating Excel report: {e}")
             # Fallback to CSV
             self._generate_csv_reports(screening_results, output_file)
+            if raise_errors:
+                raise
+    
+    def export_tasks(self, screening_results: Dict[str, pd.DataFrame], base_filename: str,
+                     timestamp: str = None) -> List[Tuple[str, Callable]]:
+        """List (filename, writer) pairs; the workbook is written as one task"""
+        output_file = f"{os.path.splitext(base_filename)[0]}.xlsx"
+        return [(output_file, lambda: self.generate_report(screening_results, output_file, raise_errors=True))]
     
     def _create_summary_sheet(self, wb, screening_results: Dict):
         """Create summary overview sheet"""
-        ws = wb.create_sheet(title="Summary", index=0)
-        
-        # Title
-        ws['A1'] = "Stock Screening Report"
-        ws['A1'].font = Font(size=16, bold=True)
-        ws['A2'] = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        
-        # Summary statistics
-        row = 4
-        ws[f'A{row}'] = "Strategy Summary"
-        ws[f'A{row}'].font = Font(size=14, bold=True)
-        row += 2
+        ws = wb.create_sheet(title="Summary")
         
         # Headers
         headers = ["Strategy", "Stocks Found", "Top Stock", "Avg Score"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-        
-        row += 1
         
         # Strategy data
+        rows = []
         for strategy_name, results_df in screening_results.items():
             if not results_df.empty:
-                ws.cell(row=row, column=1, value=strategy_name)
-                ws.cell(row=row, column=2, value=len(results_df))
-                ws.cell(row=row, column=3, value=results_df.iloc[0]['symbol'] if 'symbol' in results_df.columns else 'N/A')
-                
+                top_stock = results_df.iloc[0]['symbol'] if 'symbol' in results_df.columns else 'N/A'
                 avg_score = results_df['ranking_score'].mean() if 'ranking_score' in results_df.columns else 0
-                ws.cell(row=row, column=4, value=f"{avg_score:.2f}")
-                row += 1
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+                rows.append([strategy_name, len(results_df), top_stock, f"{avg_score:.2f}"])
+        
+        title = "Stock Screening Report"
+        generated = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        
+        # Auto-adjust column widths from the values about to be written
+        columns = [list(column) for column in zip(headers, *rows)]
+        columns[0] += [title, generated, "Strategy Summary"]
+        self._set_column_widths(ws, [self._text_width(column) for column in columns], 50)
+        
+        # Title
+        ws.append([self._styled_cell(ws, title, font=Font(size=16, bold=True))])
+        ws.append([generated])
+        ws.append([])
+        
+        # Summary statistics
+        ws.append([self._styled_cell(ws, "Strategy Summary", font=Font(size=14, bold=True))])
+        ws.append([])
+        
+        header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+        ws.append([self._styled_cell(ws, header, font=Font(bold=True), fill=header_fill)
+                   for header in headers])
+        
+        for row in rows:
+            ws.append(row)
     
     def _create_strategy_sheet(self, wb, strategy_name: str, results_df: pd.DataFrame):
         """Create sheet for individual strategy results"""
@@ -110,11 +120,6 @@ class ExcelReporter:
         sheet_name = strategy_name.replace('_', ' ').title()[:31]  # Excel sheet name limit
         ws = wb.create_sheet(title=sheet_name)
         
-        # Add title
-        ws['A1'] = f"{sheet_name} Results"
-        ws['A1'].font = Font(size=14, bold=True)
-        ws['A2'] = f"Found {len(results_df)} stocks"
-        
         # Select key columns for display
         display_columns = self._get_display_columns(results_df)
         display_df = results_df[display_columns].copy()
@@ -123,55 +128,62 @@ class ExcelReporter:
         numeric_columns = display_df.select_dtypes(include=[np.number]).columns
         display_df[numeric_columns] = display_df[numeric_columns].round(2)
         
-        # Add data starting from row 4
-        start_row = 4
+        # Column widths come from the column data, not from cell objects
+        widths = [max(len(str(column)), self._text_width(display_df[column]))
+                  for column in display_df.columns]
+        self._set_column_widths(ws, widths, 30)
         
-        # Add headers
-        for col, header in enumerate(display_df.columns, 1):
-            cell = ws.cell(row=start_row, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
-        
-        # Add data
-        for row_idx, (_, row) in enumerate(display_df.iterrows(), start_row + 1):
-            for col_idx, value in enumerate(row, 1):
-                ws.cell(row=row_idx, column=col_idx, value=value)
+        # Add title
+        ws.append([self._styled_cell(ws, f"{sheet_name} Results", font=Font(size=14, bold=True))])
+        ws.append([f"Found {len(results_df)} stocks"])
+        ws.append([])
         
-        # Apply formatting
-        self._format_sheet(ws, len(display_df), len(display_columns), start_row)
+        # Add headers starting from row 4
+        thin_border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        header_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+        ws.append([self._styled_cell(ws, header, font=Font(bold=True), fill=header_fill, border=thin_border)
+                   for header in display_df.columns])
+        
+        # Add data as whole rows built from the column arrays
+        columns = [self._cell_values(display_df[column]) for column in display_df.columns]
+        for row in zip(*columns):
+            ws.append(list(row))
+        
+        # Grid the data block with one always-true rule instead of styling every cell
+        if len(display_df) and len(display_columns):
+            data_range = f"A5:{get_column_letter(len(display_columns))}{4 + len(display_df)}"
+            ws.conditional_formatting.add(data_range, FormulaRule(formula=['TRUE'], border=thin_border))
     
     def _create_analysis_sheet(self, wb, screening_results: Dict):
         """Create analysis and insights sheet"""
         ws = wb.create_sheet(title="Analysis")
         
-        ws['A1'] = "Screening Analysis"
-        ws['A1'].font = Font(size=14, bold=True)
-        
-        row = 3
+        ws.append([self._styled_cell(ws, "Screening Analysis", font=Font(size=14, bold=True))])
+        ws.append([])
         
         # Overall statistics
         total_stocks = sum(len(df) for df in screening_results.values())
-        ws[f'A{row}'] = f"Total stocks found across all strategies: {total_stocks}"
-        row += 2
+        ws.append([f"Total stocks found across all strategies: {total_stocks}"])
+        ws.append([])
         
         # Strategy performance comparison
         if len(screening_results) > 1:
-            ws[f'A{row}'] = "Strategy Comparison"
-            ws[f'A{row}'].font = Font(bold=True)
-            row += 1
+            ws.append([self._styled_cell(ws, "Strategy Comparison", font=Font(bold=True))])
             
             for strategy_name, results_df in screening_results.items():
                 if not results_df.empty and 'ranking_score' in results_df.columns:
                     avg_score = results_df['ranking_score'].mean()
                     max_score = results_df['ranking_score'].max()
-                    ws[f'A{row}'] = f"{strategy_name}: Avg Score {avg_score:.2f}, Max Score {max_score:.2f}"
-                    row += 1
+                    ws.append([f"{strategy_name}: Avg Score {avg_score:.2f}, Max Score {max_score:.2f}"])
         
         # Common stocks across strategies
-        row += 1
-        ws[f'A{row}'] = "Cross-Strategy Analysis"
-        ws[f'A{row}'].font = Font(bold=True)
-        row += 1
+        ws.append([])
+        ws.append([self._styled_cell(ws, "Cross-Strategy Analysis", font=Font(bold=True))])
         
         if len(screening_results) > 1:
             all_symbols = []
@@ -184,11 +196,9 @@ class ExcelReporter:
             multi_strategy_stocks = symbol_counts[symbol_counts > 1]
             
             if not multi_strategy_stocks.empty:
-                ws[f'A{row}'] = "Stocks appearing in multiple strategies:"
-                row += 1
+                ws.append(["Stocks appearing in multiple strategies:"])
                 for symbol, count in multi_strategy_stocks.items():
-                    ws[f'A{row}'] = f"{symbol}: {count} strategies"
-                    row += 1
+                    ws.append([f"{symbol}: {count} strategies"])
     
     def _get_display_columns(self, df: pd.DataFrame) -> List[str]:
         """Select key columns for display in Excel"""
@@ -208,29 +218,37 @@ class ExcelReporter:
         
         return display_columns
     
-    def _format_sheet(self, ws, num_rows: int, num_cols: int, start_row: int):
-        """Apply formatting to worksheet"""
-        # Add borders
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        for row in range(start_row, start_row + num_rows + 1):
-            for col in range(1, num_cols + 1):
-                ws.cell(row=row, column=col).border = thin_border
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            adjusted_width = min(max_length + 2, 30)
-            ws.column_dimensions[column_letter].width = adjusted_width
+    @staticmethod
+    def _styled_cell(ws, value, font=None, fill=None, border=None):
+        """Create a write-only cell carrying its own style"""
+        cell = WriteOnlyCell(ws, value=value)
+        if font is not None:
+            cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if border is not None:
+            cell.border = border
+        return cell
+    
+    @staticmethod
+    def _cell_values(series: pd.Series) -> List:
+        """Column values as Python scalars, with missing values as empty cells"""
+        return series.astype(object).where(series.notna(), None).tolist()
+    
+    @staticmethod
+    def _text_width(values) -> int:
+        """Longest rendered length among non-empty values"""
+        values = pd.Series(values, dtype=object).dropna()
+        values = values[values.astype(bool)]
+        if values.empty:
+            return 0
+        return int(values.astype(str).str.len().max())
+    
+    @staticmethod
+    def _set_column_widths(ws, widths: List[int], max_width: int):
+        """Set column widths; write-only sheets need this before any rows"""
+        for col, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(col)].width = min(width + 2, max_width)
     
     def _generate_csv_reports(self, screening_results: Dict, base_filename: str):
         """Generate CSV reports as fallback when Excel is not available"""
@@ -0,0 +1,98 @@
+"""
+Concurrent export of screening results to every requested format
+"""
+
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import logging
+from typing import Callable, Dict, List, Tuple
+import os
+import time
+
+from output.excel_export import ExcelReporter
+from output.csv_export import CSVExporter
+from output.columnar_export import ColumnarExporter
+
+# Format name -> exporter factory; each exporter provides export_tasks()
+EXPORT_FORMATS: Dict[str, Callable] = {
+    'excel': ExcelReporter,
+    'csv': CSVExporter,
+    'parquet': lambda: ColumnarExporter('parquet'),
+    'arrow': lambda: ColumnarExporter('arrow'),
+}
+
+# Shorthands accepted on the command line
+FORMAT_ALIASES = {
+    'both': ['excel', 'csv'],
+}
+
+def parse_formats(output: str) -> List[str]:
+    """Expand a comma-separated --output value into known format names"""
+    formats = []
+    for name in output.split(','):
+        name = name.strip().lower()
+        for fmt in FORMAT_ALIASES.get(name, [name]):
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(f"Unknown output format: {fmt} "
+                                 f"(choose from {', '.join(list(EXPORT_FORMATS) + list(FORMAT_ALIASES))})")
+            if fmt not in formats:
+                formats.append(fmt)
+    return formats
+
+class ExportPipeline:
+    def __init__(self, output_dir: str, max_workers: int = 4):
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+    
+    def build_tasks(self, screening_results: Dict[str, pd.DataFrame], formats: List[str],
+                    timestamp: str, watchlist_export: bool = False) -> List[Tuple[str, Callable]]:
+        """Collect independent (filename, writer) tasks across formats and strategies"""
+        base_filename = os.path.join(self.output_dir, f"stock_screen_{timestamp}")
+        tasks = []
+        
+        for fmt in formats:
+            exporter = EXPORT_FORMATS[fmt]()
+            tasks.extend(exporter.export_tasks(screening_results, base_filename, timestamp))
+        
+        if watchlist_export:
+            csv_exporter = CSVExporter()
+            for strategy_name, results_df in screening_results.items():
+                if not results_df.empty:
+                    watchlist_file = os.path.join(self.output_dir, f"{strategy_name}_watchlist_{timestamp}.txt")
+                    tasks.append((watchlist_file, lambda df=results_df, path=watchlist_file:
+                                  csv_exporter.export_watchlist(df, path, 'simple')))
+        
+        return tasks
+    
+    def run(self, screening_results: Dict[str, pd.DataFrame], formats: List[str],
+            watchlist_export: bool = False) -> List[str]:
+        """Write all outputs concurrently; returns the files written successfully"""
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        tasks = self.build_tasks(screening_results, formats, timestamp, watchlist_export)
+        if not tasks:
+            return []
+        
+        start = time.perf_counter()
+        written = []
+        
+        # Writers only read the shared result frames, so they can run side by side;
+        # pyarrow and file I/O release the GIL while openpyxl serializes
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+            futures = {executor.submit(write): filename for filename, write in tasks}
+            
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    future.result()
+                    written.append(filename)
+                except Exception as e:
+                    self.logger.error(f"Failed to export {filename}: {e}")
+        
+        self.logger.info(f"Exported {len(written)}/{len(tasks)} files to {self.output_dir} "
+                         f"in {time.perf_counter() - start:.2f}s")
+        return sorted(written)
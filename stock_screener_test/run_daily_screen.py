@@ -2,17 +2,24 @@
 """
 Daily automated screening script
 Schedule and run stock screening automatically
+
+Jobs run in this process against a warm ScreeningSession, so the OpenD
+connection, configs and cached universes survive between jobs.
 """
 
 import schedule
 import time
-import subprocess
 import logging
 import yaml
 import os
 from datetime import datetime
 from typing import List
 
+import main as screener_main
+
+# Warm screening components shared by every scheduled job
+_session = None
+
 def setup_logging():
     """Setup logging for the scheduler"""
     logging.basicConfig(
@@ -34,6 +41,29 @@ def load_schedule_config() -> dict:
         logging.error(f"Failed to load schedule config: {e}")
         return {}
 
+def get_session() -> 'screener_main.ScreeningSession':
+    """Get the warm screening session, creating it on first use"""
+    global _session
+    
+    if _session is None:
+        settings = screener_main.load_config('config/settings.yaml')
+        strategies = screener_main.load_strategies('config/strategies.yaml')
+        _session = screener_main.ScreeningSession(settings, strategies)
+        logging.getLogger(__name__).info("Screening session started")
+    
+    return _session
+
+def close_session():
+    """Close the warm session; the next job reconnects"""
+    global _session
+    
+    if _session is not None:
+        try:
+            _session.close()
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Error closing screening session: {e}")
+        _session = None
+
 def run_screening(strategies: List[str] = None, market: str = 'US', output: str = 'both'):
     """Run screening with specified parameters"""
     
@@ -42,8 +72,7 @@ def run_screening(strategies: List[str] = None, market: str = 'US', output: str
     try:
         strategies_arg = ','.join(strategies) if strategies else 'all'
         
-        cmd = [
-            'python', 'main.py',
+        cli_args = [
             '--strategy', strategies_arg,
             '--market', market,
             '--output', output,
@@ -51,28 +80,22 @@ def run_screening(strategies: List[str] = None, market: str = 'US', output: str
             '--watchlist-export',
             '--max-results', '30'
         ]
+        args = screener_main.build_parser().parse_args(cli_args)
         
-        logger.info(f"Running screening: {' '.join(cmd)}")
+        logger.info(f"Running screening: {' '.join(cli_args)}")
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=1800)  # 30 min timeout
+        start_time = time.time()
+        session = get_session()
+        results = screener_main.run_screening(args, session.settings, session.strategies, session=session)
         
-        if result.returncode == 0:
-            logger.info(f"Screening completed successfully")
-            # Log some of the output for monitoring
-            if result.stdout:
-                lines = result.stdout.split('\n')
-                for line in lines[-10:]:  # Last 10 lines
-                    if line.strip():
-                        logger.info(f"Output: {line}")
-        else:
-            logger.error(f"Screening failed with return code {result.returncode}")
-            if result.stderr:
-                logger.error(f"Error output: {result.stderr}")
+        found = sum(len(df) for df in results.values())
+        logger.info(f"Screening completed successfully in {time.time() - start_time:.1f}s "
+                    f"({len(results)} strategies, {found} stocks)")
                 
-    except subprocess.TimeoutExpired:
-        logger.error("Screening timed out after 30 minutes")
     except Exception as e:
         logger.error(f"Error running screening: {e}")
+        # Drop a possibly broken connection so the next job starts clean
+        close_session()
 
 def morning_screening():
     """Morning screening routine"""
@@ -187,6 +210,8 @@ def run_scheduler():
     except Exception as e:
         logger.error(f"Scheduler error: {e}")
         raise
+    finally:
+        close_session()
 
 def manual_run():
     """Manual run for testing"""
@@ -214,6 +239,8 @@ def manual_run():
         weekly_screening()
     else:
         logger.info("No action specified. Use --test, --morning, --evening, or --weekly")
+    
+    close_session()
 
 def check_system_status():
     """Check if system is ready for automated screening"""
@@ -238,15 +265,14 @@ def check_system_status():
         os.makedirs('results')
         logger.info("Created results directory")
     
-    # Test Futu connection (simplified)
+    # Test Futu connection by starting the warm session
     try:
-        result = subprocess.run(['python', 'main.py', '--list-strategies'], 
-                              capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
+        session = get_session()
+        if session.strategies:
             logger.info("System check passed")
             return True
         else:
-            logger.error("System check failed - unable to list strategies")
+            logger.error("System check failed - no strategies configured")
             return False
     except Exception as e:
         logger.error(f"System check failed: {e}")
@@ -0,0 +1,193 @@
+"""
+Structured metrics for screening runs, written as JSON lines
+"""
+
+import numpy as np
+import futu as ft
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+class RunMetrics:
+    """Thread-safe counters and timings collected during one screening run"""
+
+    def __init__(self, **context):
+        self.context = context
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+        # Wall time of pipeline stages, and time summed over worker threads
+        self.stages = defaultdict(lambda: {'seconds': 0.0, 'count': 0})
+        self.worker_stages = defaultdict(lambda: {'seconds': 0.0, 'count': 0})
+        self.calls = defaultdict(lambda: {'calls': 0, 'errors': 0, 'seconds': 0.0})
+        self.cache = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self.retries = defaultdict(lambda: {'retries': 0, 'backoff_seconds': 0.0})
+        self.rate_limit_waits = defaultdict(lambda: {'waits': 0, 'seconds': 0.0})
+        self.symbol_latencies = []
+        self.strategies = {}
+
+    def add_stage(self, name: str, seconds: float, worker: bool = False):
+        with self._lock:
+            entry = (self.worker_stages if worker else self.stages)[name]
+            entry['seconds'] += seconds
+            entry['count'] += 1
+
+    def record_call(self, endpoint: str, seconds: float, ok: bool):
+        with self._lock:
+            entry = self.calls[endpoint]
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['errors'] += 0 if ok else 1
+
+    def record_cache(self, key_type: str, hit: bool):
+        with self._lock:
+            self.cache[key_type]['hits' if hit else 'misses'] += 1
+
+    def record_retry(self, source: str, backoff_seconds: float = 0.0):
+        with self._lock:
+            self.retries[source]['retries'] += 1
+            self.retries[source]['backoff_seconds'] += backoff_seconds
+
+    def record_wait(self, source: str, seconds: float):
+        with self._lock:
+            self.rate_limit_waits[source]['waits'] += 1
+            self.rate_limit_waits[source]['seconds'] += seconds
+
+    def record_symbol(self, seconds: float):
+        with self._lock:
+            self.symbol_latencies.append(seconds)
+
+    def record_strategy(self, name: str, results: int, seconds: float):
+        with self._lock:
+            self.strategies[name] = {'results': results, 'seconds': round(seconds, 3)}
+
+    def to_dict(self) -> Dict:
+        """One JSON-serializable record for the run"""
+        with self._lock:
+            latencies = np.array(self.symbol_latencies)
+            cache = {
+                key_type: dict(counts, hit_ratio=round(counts['hits'] / (counts['hits'] + counts['misses']), 4))
+                for key_type, counts in sorted(self.cache.items())
+            }
+            api_seconds = sum(entry['seconds'] for entry in self.calls.values())
+
+            return {
+                'timestamp': self.started.isoformat(timespec='seconds'),
+                **self.context,
+                'total_seconds': round(time.perf_counter() - self._start, 3),
+                'stages': _rounded(self.stages),
+                'worker_stages': _rounded(self.worker_stages),
+                'strategies': dict(self.strategies),
+                'opend_calls': _rounded(self.calls),
+                'opend_seconds': round(api_seconds, 3),
+                'cache': cache,
+                'retries': _rounded(self.retries),
+                'rate_limit_waits': _rounded(self.rate_limit_waits),
+                'symbol_latency': {
+                    'count': int(latencies.size),
+                    'p50': round(float(np.percentile(latencies, 50)), 4) if latencies.size else None,
+                    'p95': round(float(np.percentile(latencies, 95)), 4) if latencies.size else None,
+                    'max': round(float(latencies.max()), 4) if latencies.size else None,
+                },
+            }
+
+def _rounded(entries: Dict) -> Dict:
+    return {name: {key: round(value, 4) if isinstance(value, float) else value
+                   for key, value in entry.items()}
+            for name, entry in sorted(entries.items())}
+
+# The run being collected; helpers below do nothing while it is None
+_active: Optional[RunMetrics] = None
+
+def active() -> Optional[RunMetrics]:
+    return _active
+
+def start_run(**context) -> RunMetrics:
+    """Begin collecting metrics for a screening run"""
+    global _active
+    _active = RunMetrics(**context)
+    return _active
+
+def finish_run(path: str = None) -> Optional[Dict]:
+    """Stop collecting and append the run's record to a JSON lines file"""
+    global _active
+    metrics, _active = _active, None
+    if metrics is None:
+        return None
+
+    record = metrics.to_dict()
+    if path:
+        try:
+            with open(path, 'a') as f:
+                f.write(json.dumps(record, default=str) + '\n')
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Failed to write run metrics to {path}: {e}")
+    return record
+
+@contextmanager
+def stage(name: str, worker: bool = False):
+    """Time a pipeline stage; worker=True for time summed across worker threads"""
+    metrics = _active
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_stage(name, time.perf_counter() - start, worker)
+
+def record_cache(key_type: str, hit: bool):
+    if _active is not None:
+        _active.record_cache(key_type, hit)
+
+def record_retry(source: str, backoff_seconds: float = 0.0):
+    if _active is not None:
+        _active.record_retry(source, backoff_seconds)
+
+def record_wait(source: str, seconds: float):
+    if _active is not None:
+        _active.record_wait(source, seconds)
+
+def record_symbol(seconds: float):
+    if _active is not None:
+        _active.record_symbol(seconds)
+
+def record_strategy(name: str, results: int, seconds: float):
+    if _active is not None:
+        _active.record_strategy(name, results, seconds)
+
+class InstrumentedContext:
+    """OpenD context proxy that counts and times every API call by endpoint"""
+
+    def __init__(self, ctx):
+        self._ctx = ctx
+
+    def __getattr__(self, name):
+        attr = getattr(self._ctx, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            metrics = _active
+            if metrics is None:
+                return attr(*args, **kwargs)
+
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = attr(*args, **kwargs)
+                # OpenD calls return (ret, data, ...) with ret == RET_OK on success
+                ok = not isinstance(result, tuple) or result[0] == ft.RET_OK
+                return result
+            finally:
+                metrics.record_call(name, time.perf_counter() - start, ok)
+
+        return call
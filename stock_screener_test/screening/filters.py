@@ -6,10 +6,13 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple
 import logging
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from analysis.technical import TechnicalAnalysis
 from analysis.fundamental import FundamentalAnalysis
 from analysis.rankings import StockRanker
+from data.record_store import ScreeningRecordStore
+import run_metrics
 
 class StockFilter:
     def __init__(self, futu_client, max_workers: int = 10):
@@ -26,28 +29,30 @@ class StockFilter:
         """Apply screening criteria to stock list"""
         self.logger.info(f"Screening {len(stock_list)} stocks with {len(criteria)} criteria sections")
         
-        # Get stock data in parallel
-        stock_data_list = self._get_stocks_data_parallel(stock_list)
+        # Get stock data in parallel into columnar buffers
+        with run_metrics.stage('fetch'):
+            record_store = self._get_stocks_data_parallel(stock_list)
         
-        if not stock_data_list:
+        if not len(record_store):
             self.logger.warning("No stock data retrieved")
             return pd.DataFrame()
         
-        # Convert to DataFrame
-        stocks_df = pd.DataFrame(stock_data_list)
+        stocks_df = record_store.to_frame()
         
         self.logger.info(f"Retrieved data for {len(stocks_df)} stocks")
         
         # Apply filters
-        filtered_df = self._apply_filters(stocks_df, criteria)
+        with run_metrics.stage('filter'):
+            filtered_df = self._apply_filters(stocks_df, criteria)
         
         self.logger.info(f"After filtering: {len(filtered_df)} stocks remain")
         
-        # Rank results
+        # Rank results, selecting only the top max_results when limited
         if not filtered_df.empty:
-            ranked_df = self.ranker.rank_by_composite_score(filtered_df, criteria)
+            with run_metrics.stage('rank'):
+                ranked_df = self.ranker.rank_by_composite_score(filtered_df, criteria, top_k=max_results)
             
-            # Limit results if specified
+            # Ranking fell back to the unranked frame; still honour the limit
             if max_results and len(ranked_df) > max_results:
                 ranked_df = ranked_df.head(max_results)
             
@@ -55,9 +60,9 @@ class StockFilter:
         
         return pd.DataFrame()
     
-    def _get_stocks_data_parallel(self, stock_list: List[str]) -> List[Dict]:
-        """Get stock data for multiple stocks in parallel"""
-        stock_data_list = []
+    def _get_stocks_data_parallel(self, stock_list: List[str]) -> ScreeningRecordStore:
+        """Get stock data for multiple stocks in parallel, one store row per stock"""
+        record_store = ScreeningRecordStore(len(stock_list))
         
         # Process in smaller batches to manage memory and API limits
         batch_size = min(self.max_workers, 50)
@@ -66,26 +71,32 @@ class StockFilter:
             batch = stock_list[i:i + batch_size]
             
             with ThreadPoolExecutor(max_workers=min(len(batch), self.max_workers)) as executor:
-                # Submit tasks
+                # Submit tasks; each worker owns the row matching its stock's position
                 future_to_stock = {
-                    executor.submit(self._get_stock_data, stock_code): stock_code
-                    for stock_code in batch
+                    executor.submit(self._fill_stock_row, record_store, row, stock_code): stock_code
+                    for row, stock_code in enumerate(batch, i)
                 }
                 
                 # Collect results
                 for future in as_completed(future_to_stock, timeout=60):
                     stock_code = future_to_stock[future]
                     try:
-                        stock_data = future.result()
-                        if stock_data:  # Only add if we got valid data
-                            stock_data_list.append(stock_data)
+                        future.result()
                     except Exception as e:
                         self.logger.warning(f"Error processing {stock_code}: {e}")
             
             # Progress indicator
             self.logger.info(f"Processed {min(i + batch_size, len(stock_list))}/{len(stock_list)} stocks")
         
-        return stock_data_list
+        return record_store
+    
+    def _fill_stock_row(self, record_store: ScreeningRecordStore, row: int, stock_code: str):
+        """Fetch a stock's data and write it into its record store row"""
+        start = time.perf_counter()
+        stock_data = self._get_stock_data(stock_code)
+        run_metrics.record_symbol(time.perf_counter() - start)
+        if stock_data:  # Only keep rows with valid data
+            record_store.write(row, stock_data)
     
     def _get_stock_data(self, stock_code: str) -> Dict:
         """Fetch all required data for a stock"""
@@ -105,15 +116,18 @@ class StockFilter:
                 return None
             
             # Financial data
-            financial_data = self.fundamental.get_financial_metrics(stock_code)
+            with run_metrics.stage('fundamental', worker=True):
+                financial_data = self.fundamental.get_financial_metrics(stock_code)
             stock_data.update(financial_data)
             
             # Technical data
-            technical_data = self.technical.get_technical_metrics(stock_code)
+            with run_metrics.stage('technical', worker=True):
+                technical_data = self.technical.get_technical_metrics(stock_code)
             stock_data.update(technical_data)
             
             # Quality score
-            quality_data = self.fundamental.get_quality_score(stock_code)
+            with run_metrics.stage('fundamental', worker=True):
+                quality_data = self.fundamental.get_quality_score(stock_code)
             if quality_data:
                 stock_data['quality_score'] = quality_data.get('quality_score', 0)
             
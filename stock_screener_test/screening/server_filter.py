@@ -0,0 +1,232 @@
+"""
+Server-side universe pruning with OpenD's get_stock_filter
+"""
+
+import futu as ft
+import hashlib
+import logging
+import os
+import pickle
+import time
+from typing import Dict, List, Optional, Tuple
+from data.history_downloader import RateLimiter
+import run_metrics
+
+# OpenD allows 10 get_stock_filter calls per 30 seconds, 200 stocks per page
+FILTER_REQUEST_LIMIT = 10
+FILTER_REQUEST_WINDOW = 30
+FILTER_PAGE_SIZE = 200
+
+# Screener market -> OpenD markets searched
+FILTER_MARKETS = {
+    'US': [ft.Market.US],
+    'HK': [ft.Market.HK],
+    'CN': [ft.Market.SH, ft.Market.SZ],
+}
+
+# Criteria metric -> (filter kind, StockField, scale from our units to OpenD's)
+# Percent metrics are already in percent on both sides; ratios we keep as
+# fractions are scaled to OpenD's percent values.
+SERVER_FIELDS = {
+    'price': ('simple', ft.StockField.CUR_PRICE, 1),
+    'market_cap': ('simple', ft.StockField.MARKET_VAL, 1),
+    'volume': ('simple', ft.StockField.VOLUME, 1),
+    'pe_ratio': ('simple', ft.StockField.PE_TTM, 1),
+    'pb_ratio': ('simple', ft.StockField.PB_RATE, 1),
+    'ps_ratio': ('simple', ft.StockField.PS_TTM, 1),
+    'price_change_1d': ('simple', ft.StockField.CHANGE_RATE, 1),
+    'roe': ('financial', ft.StockField.RETURN_ON_EQUITY_RATE, 1),
+    'roa': ('financial', ft.StockField.ROA_TTM, 1),
+    'net_margin': ('financial', ft.StockField.NET_PROFIT_RATE, 1),
+    'debt_to_assets': ('financial', ft.StockField.DEBT_ASSET_RATE, 100),
+    'revenue_growth': ('financial', ft.StockField.SUM_OF_BUSINESS_GROWTH, 1),
+    'earnings_growth': ('financial', ft.StockField.NET_PROFIX_GROWTH, 1),
+    'rsi': ('indicator', ft.StockField.RSI, 1),
+}
+
+# Boolean criteria -> (StockField compared with the price, relative position when true)
+SERVER_CROSSES = {
+    'price_above_ma20': (ft.StockField.MA20, ft.RelativePosition.MORE),
+}
+
+class ServerFilter:
+    """Prune a screening universe on OpenD before per-stock fetching
+
+    Criteria with an OpenD equivalent become SimpleFilter, FinancialFilter
+    or CustomIndicatorFilter conditions, widened by slack_percent because
+    OpenD's definitions (e.g. TTM P/E) differ slightly from ours. StockFilter
+    still applies the exact criteria to the survivors. Result pages are
+    cached for the TTL and requested as fast as the quota allows, backing
+    off only when OpenD reports throttling.
+    """
+
+    def __init__(self, quote_ctx, config: Dict = None, cache_dir: str = 'cache'):
+        config = config or {}
+        self.quote_ctx = quote_ctx
+        self.enabled = config.get('enabled', True)
+        self.min_universe = config.get('min_universe', 200)
+        self.slack = config.get('slack_percent', 10) / 100
+        self.ttl = config.get('ttl_minutes', 30) * 60
+        self.cache_dir = cache_dir
+        self.rate_limiter = RateLimiter(FILTER_REQUEST_LIMIT, FILTER_REQUEST_WINDOW, name='get_stock_filter')
+
+        self.logger = logging.getLogger(__name__)
+
+        # cache key -> (fetched_at, codes)
+        self._cache: Dict[str, Tuple[float, List[str]]] = {}
+
+    def _widen(self, bound: float, is_min: bool) -> float:
+        """Loosen a bound by the slack so server-side differences never drop a match"""
+        delta = abs(bound) * self.slack
+        return bound - delta if is_min else bound + delta
+
+    def build_filters(self, criteria: Dict) -> List:
+        """Translate the criteria OpenD can evaluate; others are left to StockFilter"""
+        filters = []
+
+        for section_criteria in criteria.values():
+            for metric, condition in section_criteria.items():
+                if metric in SERVER_CROSSES and isinstance(condition, bool):
+                    field, position = SERVER_CROSSES[metric]
+                    indicator = ft.CustomIndicatorFilter()
+                    indicator.ktype = ft.KLType.K_DAY
+                    indicator.stock_field1 = ft.StockField.PRICE
+                    indicator.stock_field2 = field
+                    indicator.relative_position = position if condition else (
+                        ft.RelativePosition.LESS if position == ft.RelativePosition.MORE
+                        else ft.RelativePosition.MORE)
+                    indicator.is_no_filter = False
+                    filters.append(indicator)
+                    continue
+
+                if metric not in SERVER_FIELDS or not isinstance(condition, dict):
+                    continue
+
+                kind, field, scale = SERVER_FIELDS[metric]
+                low = self._widen(condition['min'] * scale, True) if 'min' in condition else None
+                high = self._widen(condition['max'] * scale, False) if 'max' in condition else None
+
+                if kind == 'indicator':
+                    # Compare the indicator with a constant on each side of the range
+                    for bound, position in ((low, ft.RelativePosition.MORE), (high, ft.RelativePosition.LESS)):
+                        if bound is None:
+                            continue
+                        indicator = ft.CustomIndicatorFilter()
+                        indicator.ktype = ft.KLType.K_DAY
+                        indicator.stock_field1 = field
+                        indicator.stock_field1_para = [14]
+                        indicator.stock_field2 = ft.StockField.VALUE
+                        indicator.stock_field2_para = [bound]
+                        indicator.relative_position = position
+                        indicator.is_no_filter = False
+                        filters.append(indicator)
+                    continue
+
+                server_filter = ft.FinancialFilter() if kind == 'financial' else ft.SimpleFilter()
+                if kind == 'financial':
+                    server_filter.quarter = ft.FinancialQuarter.ANNUAL
+                server_filter.stock_field = field
+                server_filter.filter_min = low
+                server_filter.filter_max = high
+                server_filter.is_no_filter = False
+                filters.append(server_filter)
+
+        return filters
+
+    @staticmethod
+    def _describe(server_filter) -> tuple:
+        return (type(server_filter).__name__,) + tuple(sorted((k, str(v)) for k, v in vars(server_filter).items()))
+
+    def _cache_key(self, market: str, filters: List) -> str:
+        description = repr((market, sorted(self._describe(f) for f in filters)))
+        return hashlib.sha1(description.encode()).hexdigest()[:16]
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"stock_filter_{key}.pkl")
+
+    def _load_cached(self, key: str) -> Optional[List[str]]:
+        """Codes from memory or the disk cache while inside the TTL"""
+        cached = self._cache.get(key)
+        if cached is None and os.path.exists(self._cache_path(key)):
+            try:
+                with open(self._cache_path(key), 'rb') as f:
+                    cached = pickle.load(f)
+                self._cache[key] = cached
+            except Exception as e:
+                self.logger.warning(f"Failed to load stock filter cache {key}: {e}")
+
+        fresh = bool(cached) and time.time() - cached[0] < self.ttl
+        run_metrics.record_cache('server_filter', fresh)
+        return cached[1] if fresh else None
+
+    def _save_cached(self, key: str, codes: List[str]):
+        self._cache[key] = (time.time(), codes)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._cache_path(key), 'wb') as f:
+                pickle.dump(self._cache[key], f)
+        except Exception as e:
+            self.logger.warning(f"Failed to save stock filter cache {key}: {e}")
+
+    def _request_page(self, market, filters: List, begin: int, retries: int = 4):
+        """One quota-paced page, backing off when OpenD throttles"""
+        backoff = 2.0
+        for attempt in range(retries + 1):
+            self.rate_limiter.acquire()
+            ret, data = self.quote_ctx.get_stock_filter(market=market, filter_list=filters,
+                                                        begin=begin, num=FILTER_PAGE_SIZE)
+            if ret == ft.RET_OK:
+                return data
+            if attempt < retries:
+                self.logger.warning(f"Stock filter page at {begin} failed ({data}); retrying in {backoff:.0f}s")
+                run_metrics.record_retry('get_stock_filter', backoff)
+                time.sleep(backoff)
+                backoff *= 2
+        raise RuntimeError(data)
+
+    def fetch_codes(self, market: str, filters: List) -> List[str]:
+        """All codes matching the filters in a screener market (US/HK/CN)"""
+        key = self._cache_key(market, filters)
+        cached = self._load_cached(key)
+        if cached is not None:
+            self.logger.info(f"Using cached server filter results ({len(cached)} stocks)")
+            return cached
+
+        codes = []
+        for futu_market in FILTER_MARKETS[market.upper()]:
+            begin = 0
+            while True:
+                last_page, all_count, items = self._request_page(futu_market, filters, begin)
+                codes.extend(item.stock_code for item in items)
+                begin += len(items)
+                if last_page or not items or begin >= all_count:
+                    break
+
+        self._save_cached(key, codes)
+        return codes
+
+    def prune(self, stock_list: List[str], criteria: Dict, market: str = 'US') -> List[str]:
+        """Keep only stocks OpenD reports as matching; returns stock_list unchanged when it can't help"""
+        if not self.enabled or len(stock_list) < self.min_universe or market.upper() not in FILTER_MARKETS:
+            return stock_list
+
+        filters = self.build_filters(criteria)
+        if not filters:
+            return stock_list
+
+        try:
+            start = time.perf_counter()
+            matched = set(self.fetch_codes(market, filters))
+        except Exception as e:
+            self.logger.warning(f"Server-side filtering failed, screening the full universe: {e}")
+            return stock_list
+
+        # Universe codes may come without the market prefix (e.g. from watchlists)
+        prefix = f"{market.upper()}."
+        pruned = [code for code in stock_list
+                  if code in matched or (prefix + code) in matched
+                  or (market.upper() == 'CN' and (f"SH.{code}" in matched or f"SZ.{code}" in matched))]
+
+        self.logger.info(f"Server filter ({len(filters)} conditions): {len(stock_list)} -> {len(pruned)} stocks "
+                         f"in {time.perf_counter() - start:.1f}s")
+        return pruned
@@ -96,6 +96,25 @@ def is_market_open(market: str = 'US') -> bool:
     
     return open_time <= now <= close_time
 
+def last_market_close(market: str = 'US') -> datetime:
+    """Most recent weekday close at or before now, in the market's timezone (holidays ignored)"""
+    import pytz
+    
+    hours = get_market_hours(market)
+    tz = pytz.timezone(hours['timezone'])
+    now = datetime.now(tz)
+    
+    close_time = now.replace(hour=int(hours['close'][:2]), 
+                            minute=int(hours['close'][3:]), 
+                            second=0, microsecond=0)
+    if close_time > now:
+        close_time -= timedelta(days=1)
+    while close_time.weekday() >= 5:
+        close_time -= timedelta(days=1)
+    
+    # Rebuild on the earlier date so the offset is right across DST changes
+    return tz.localize(close_time.replace(tzinfo=None))
+
 def calculate_sharpe_ratio(returns: pd.Series, risk_free_rate: float = 0.02) -> float:
     """Calculate Sharpe ratio"""
     if len(returns) < 2: